@@ -0,0 +1,162 @@
+"""Services and wiring shared by the desktop apps, charts.py and chart_with_trade.py.
+
+Each script builds its own window and controls, then hands the rest to a
+TradingApp: the heavy libraries are imported on a background thread, the
+REST session, candle cache and order executor are created once they are
+in, and the scheduler, market hub, account jobs, order ticker and shutdown
+are the same for both apps.
+"""
+from governor import GovernedSession, governor
+from instruments import InstrumentRegistry
+from market_hub import MarketHub
+from netloop import NetworkLoop
+from orders import OrderExecutor
+from scheduler import RefreshScheduler
+from startup import StartupTimer, import_modules, run_in_background
+from streams import MarketStream
+from watchlist import fetch_tickers, parse_tickers
+
+# pandas, matplotlib and pybit take seconds to import, so they are imported on
+# a background thread once the window is up; see TradingApp.load()
+HEAVY_MODULES = [
+    "pandas", "matplotlib.figure", "matplotlib.backends.backend_tkagg", "pybit.unified_trading",
+    "candles", "candle_store", "indicators", "renderer", "chart_pane"
+]
+DEFAULT_SYMBOL = "BTCUSDT"
+
+
+class TradingApp:
+    """Market data, account and order services behind one desktop window.
+
+    `session`, `candle_cache`, `order_executor`, `scheduler` and `hub` are
+    None until load() has finished; a script may replace `market_stream`,
+    `candle_cache` and `order_executor` (a replay does) before start_hub().
+    """
+
+    def __init__(self, started, streaming=True):
+        self.startup = StartupTimer(started)
+        self.streaming = streaming  # False polls the REST API only
+        self.instruments = InstrumentRegistry(None)
+        self.network = NetworkLoop()
+        self.market_stream = MarketStream()
+        self.session = None
+        self.candle_cache = None
+        self.order_executor = None
+        self.scheduler = None
+        self.hub = None
+        self.ticker_sub = None
+        self.root = None
+        self.console = None
+
+    def known_symbols(self):
+        """Last run's instruments, so nothing waits on the network before the window shows."""
+        self.instruments.load_cached()
+        return self.instruments.known_symbols() or [DEFAULT_SYMBOL]
+
+    def load(self, root, on_loaded, prepare=None):
+        """Import HEAVY_MODULES (and run prepare()) on a thread, then on_loaded(result) on the Tk thread."""
+        self.root = root
+        root.protocol("WM_DELETE_WINDOW", self.close)
+        root.update_idletasks()
+        self.startup.mark("window")
+
+        def load_libraries():
+            import_modules(HEAVY_MODULES)
+            return prepare() if prepare is not None else None
+
+        def loaded(result, error):
+            if error is not None:
+                print(f"Error loading libraries: {error}")
+                return
+            self.startup.mark("imports")
+            on_loaded(result)
+
+        run_in_background(root, load_libraries, loaded)
+
+    def start_live(self):
+        """REST session, stored candle cache and order executor for the live market."""
+        from pybit.unified_trading import HTTP
+        from keys import api, secret
+        from candles import CandleCache
+        from candle_store import CandleStore
+
+        self.session = GovernedSession(HTTP(api_key=api, api_secret=secret), governor)
+        self.instruments.session = self.session
+        self.candle_cache = CandleCache(store=CandleStore(), backfill_pages=5)
+        self.order_executor = OrderExecutor(self.session, self.instruments)
+
+    def start_hub(self):
+        """Scheduler and market hub; the hub adds a poll job per feed, used while the stream is down."""
+        self.scheduler = RefreshScheduler(self.root, self.network)
+        self.hub = MarketHub(self.root, self.market_stream, self.scheduler, self.candle_cache,
+                             streaming=self.streaming)
+        if self.streaming:
+            self.market_stream.start()
+
+    def start_jobs(self, symbol, on_instruments_loaded, show_balance, watchlist):
+        """Symbols, balance, watchlist and a warm order connection, all through the scheduler."""
+        scheduler = self.scheduler
+        scheduler.add_job("instruments", self.instruments.ttl * 1000, lambda _: self.instruments.load(),
+                          on_instruments_loaded)
+        scheduler.add_job("balance", 30000, lambda _: self.get_balance(), show_balance)
+        scheduler.add_job("watchlist", 3000, self.fetch_watchlist, watchlist.update)
+        scheduler.add_job("warm_orders", 20000, lambda _: self.order_executor.warm(), None)
+        self.prepare_orders(symbol)
+        scheduler.start()
+        self.startup.mark("services")
+
+    def get_balance(self):
+        try:
+            resp = self.session.get_wallet_balance(accountType="UNIFIED", coin="USDT")
+            return float(resp['result']['list'][0]['coin'][0]['walletBalance'])
+        except Exception as e:
+            print(f"Error fetching balance: {e}")
+            return 0.0
+
+    def fetch_watchlist(self, _):
+        """All linear tickers from a single bulk request."""
+        return parse_tickers(fetch_tickers(self.session))
+
+    def max_leverage(self, symbol):
+        """Maximum leverage for the symbol, or None until instruments have loaded."""
+        info = self.instruments.peek(symbol)
+        return info.max_leverage if info else None
+
+    def fit_leverage_slider(self, slider, symbol):
+        """Limit a leverage Scale to the symbol's maximum, once it is known."""
+        try:
+            max_leverage = self.max_leverage(symbol)
+            if max_leverage is None:
+                return  # Called again when the instruments load
+            slider.config(from_=1, to=max_leverage)
+            slider.set(min(slider.get(), max_leverage))
+        except Exception as e:
+            print(f"Error updating leverage slider: {e}")
+
+    def follow_ticker(self, symbol):
+        """Stream the symbol's mark price to the order executor."""
+        old = self.ticker_sub
+        self.ticker_sub = self.hub.ticker(symbol, self.order_executor.on_ticker)
+        if old is not None:
+            old.close()
+
+    def prepare_orders(self, symbol):
+        self.network.submit(self.order_executor.prepare, symbol)
+
+    def on_chart_drawn(self, pane):
+        if not self.startup.reported:
+            self.startup.mark("first chart")
+            self.startup.report()
+
+    def close(self):
+        if self.scheduler is not None:
+            self.scheduler.stop()
+        if self.hub is not None:
+            self.hub.stop()
+        self.market_stream.stop()
+        self.network.stop()
+        if self.order_executor is not None:
+            self.order_executor.stop()
+        if self.console is not None:
+            self.console.close()
+        self.root.destroy()
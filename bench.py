@@ -0,0 +1,390 @@
+"""Benchmarks for the fetch -> parse -> render pipeline against a local REST stand-in.
+
+Runs headless and offline: kline, order book and tickers responses are
+served from a local HTTP server, either synthesized or recorded earlier:
+
+    python bench.py record responses/          # needs network, once
+    python bench.py run --responses responses/ --json before.json
+    python bench.py run --compare before.json  # exit status 1 on regressions
+    python bench.py serve --port 8766          # BYBIT_REST=http://127.0.0.1:8766 python charts.py
+
+Each stage is timed on its own for every size (candle count or book depth)
+and reported as the median of `--repeat` runs in milliseconds. Tk stages
+are only run when a display is available.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+import numpy as np
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+from lod import CandlePyramid
+from netloop import make_session
+from orderbook import OrderBook
+from parsing import array_to_frame, loads, records_to_array
+from renderer import CandleRenderer
+from watchlist import parse_tickers
+
+ENDPOINTS = {"kline": "/v5/market/kline", "orderbook": "/v5/market/orderbook", "tickers": "/v5/market/tickers"}
+CANDLE_SIZES = (50, 200, 1000)
+BOOK_DEPTHS = (50, 200, 500)
+HISTORY_SIZES = (10_000, 1_000_000)
+VIEW_BUCKETS = 250  # About a 1000 px wide chart
+TICKER_COUNT = 500
+
+
+def envelope(result):
+    return {"retCode": 0, "retMsg": "OK", "result": result, "time": int(time.time() * 1000)}
+
+
+def make_klines(n, seed=0, start=1_700_000_000_000, step=60_000):
+    """A kline page of n rows (newest first) in Bybit's string format."""
+    rng = np.random.default_rng(seed)
+    close = 60_000 + np.cumsum(rng.normal(0, 20, n))
+    open_ = np.r_[close[0], close[:-1]]
+    high = np.maximum(open_, close) + rng.random(n) * 15
+    low = np.minimum(open_, close) - rng.random(n) * 15
+    volume = rng.random(n) * 50
+    rows = [
+        [str(start + i * step), f"{o:.1f}", f"{h:.1f}", f"{l:.1f}", f"{c:.1f}", f"{v:.3f}", f"{v * c:.4f}"]
+        for i, (o, h, l, c, v) in enumerate(zip(open_, high, low, close, volume))
+    ]
+    return envelope({"category": "linear", "symbol": "BTCUSDT", "list": rows[::-1]})
+
+
+def make_orderbook(depth, seed=0, mid=60_000.0, tick=0.1):
+    rng = np.random.default_rng(seed)
+    levels = np.arange(1, depth + 1) * tick
+    asks = [[f"{mid + d:.1f}", f"{s:.3f}"] for d, s in zip(levels, rng.random(depth) * 5)]
+    bids = [[f"{mid - d:.1f}", f"{s:.3f}"] for d, s in zip(levels, rng.random(depth) * 5)]
+    return envelope({"s": "BTCUSDT", "a": asks, "b": bids, "ts": int(time.time() * 1000), "u": 1, "seq": 1})
+
+
+def make_tickers(n, seed=0):
+    rng = np.random.default_rng(seed)
+    items = [
+        {
+            "symbol": f"SYM{i}USDT",
+            "lastPrice": f"{p:.4f}",
+            "price24hPcnt": f"{c:.4f}",
+            "turnover24h": f"{t:.2f}",
+            "fundingRate": f"{f:.6f}",
+            "markPrice": f"{p:.4f}",
+        }
+        for i, (p, c, t, f) in enumerate(zip(
+            rng.random(n) * 100, rng.normal(0, 0.05, n), rng.random(n) * 1e8, rng.normal(0, 1e-4, n)
+        ))
+    ]
+    return envelope({"category": "linear", "list": items})
+
+
+def load_responses(path):
+    """Recorded responses by endpoint name, or synthesized ones when path is None."""
+    if path is None:
+        return {
+            "kline": make_klines(max(CANDLE_SIZES)),
+            "orderbook": make_orderbook(max(BOOK_DEPTHS)),
+            "tickers": make_tickers(TICKER_COUNT),
+        }
+    responses = {}
+    for name in ENDPOINTS:
+        with open(os.path.join(path, f"{name}.json")) as f:
+            responses[name] = json.load(f)
+    return responses
+
+
+def record(path, symbol="BTCUSDT"):
+    """Save one large live response per endpoint for later offline runs."""
+    os.makedirs(path, exist_ok=True)
+    session = make_session()
+    params = {
+        "kline": {"category": "linear", "symbol": symbol, "interval": "1", "limit": max(CANDLE_SIZES)},
+        "orderbook": {"category": "linear", "symbol": symbol, "limit": max(BOOK_DEPTHS)},
+        "tickers": {"category": "linear"},
+    }
+    for name, endpoint in ENDPOINTS.items():
+        response = session.get(f"https://api.bybit.com{endpoint}", params=params[name], timeout=10)
+        response.raise_for_status()
+        with open(os.path.join(path, f"{name}.json"), "w") as f:
+            f.write(response.text)
+        print(f"Recorded {name} ({len(response.content)} bytes)")
+
+
+def _limit(response, name, limit):
+    """The response cut to `limit` rows/levels, as a request with that limit would return."""
+    result = dict(response["result"])
+    if name == "kline":
+        result["list"] = result["list"][:limit]
+    elif name == "orderbook":
+        result["a"], result["b"] = result["a"][:limit], result["b"][:limit]
+    return {**response, "result": result}
+
+
+class StandInServer:
+    """Keep-alive HTTP server answering the Bybit market endpoints from memory.
+
+    Bodies are encoded once per (endpoint, limit) so serving costs as little
+    as possible and the network stage measures the client side.
+    """
+
+    def __init__(self, responses, host="127.0.0.1", port=0):
+        self.responses = responses
+        self._bodies = {}
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True  # headers and body go out as separate writes
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                body = stand_in.body(url.path, parse_qs(url.query))
+                self.send_response(200 if body is not None else 404)
+                body = body if body is not None else b'{"retCode": 10001, "retMsg": "unknown endpoint"}'
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self.url = f"http://{host}:{self.server.server_address[1]}"
+
+    def body(self, path, query):
+        names = {endpoint: name for name, endpoint in ENDPOINTS.items()}
+        name = names.get(path)
+        if name is None:
+            return None
+        limit = int(query["limit"][0]) if "limit" in query else None
+        key = (name, limit)
+        if key not in self._bodies:
+            response = self.responses[name]
+            self._bodies[key] = json.dumps(_limit(response, name, limit) if limit else response).encode()
+        return self._bodies[key]
+
+    def start(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self.url
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def timed(fn, repeat):
+    """Median milliseconds of `repeat` calls, plus the last result."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        times.append((time.perf_counter() - start) * 1000)
+    return statistics.median(times), result
+
+
+def make_tk():
+    try:
+        import tkinter as tk
+        root = tk.Tk()
+        root.withdraw()
+        return root
+    except Exception:
+        return None
+
+
+def bench_klines(url, session, repeat, results):
+    for n in CANDLE_SIZES:
+        params = {"category": "linear", "symbol": "BTCUSDT", "interval": "1", "limit": n}
+        results[f"kline.network/{n}"], content = timed(
+            lambda: session.get(url + ENDPOINTS["kline"], params=params, timeout=10).content, repeat
+        )
+        results[f"kline.parse/{n}"], arr = timed(lambda: records_to_array(loads(content)["result"]["list"]), repeat)
+        results[f"kline.frame/{n}"], df = timed(lambda: array_to_frame(arr), repeat)
+
+        fig, (ax_price, ax_volume) = plt.subplots(2, 1, figsize=(10, 8), gridspec_kw={'height_ratios': [3, 1]})
+        renderer = CandleRenderer(ax_price, ax_volume, fig.canvas, window=n)
+
+        def full():
+            renderer._times = None  # force the new-candle path
+            renderer.update(df, title="BTCUSDT")
+            fig.canvas.draw()
+
+        results[f"render.full/{n}"], _ = timed(full, repeat)
+        closes = df["close"].to_numpy().copy()
+        col = df.columns.get_loc("close")
+
+        def last():
+            df.iloc[-1, col] = closes[-1] + np.random.random() * 0.5 - 0.25
+            renderer.update(df)
+
+        results[f"render.last/{n}"], _ = timed(last, repeat)
+        plt.close(fig)
+
+
+def bench_lod(repeat, results):
+    """Level-of-detail stages: the cost of a whole-history view should not grow with n."""
+    rng = np.random.default_rng(0)
+    for n in HISTORY_SIZES:
+        rows = np.empty((n, 6))
+        rows[:, 0] = 1_700_000_000_000 + np.arange(n) * 60_000
+        close = 60_000 + np.cumsum(rng.normal(0, 20, n))
+        rows[:, 1], rows[:, 4] = np.r_[close[0], close[:-1]], close
+        rows[:, 2] = np.maximum(rows[:, 1], close) + 5
+        rows[:, 3] = np.minimum(rows[:, 1], close) - 5
+        rows[:, 5] = rng.random(n) * 50
+        results[f"lod.build/{n}"], pyramid = timed(lambda: CandlePyramid(rows), max(3, repeat // 5))
+        results[f"lod.view/{n}"], _ = timed(lambda: pyramid.buckets(0, n, VIEW_BUCKETS), repeat)
+        last = rows[-1:].copy()
+
+        def tick():
+            last[0, 4] += np.random.random() - 0.5
+            pyramid.update(last)
+
+        results[f"lod.tick/{n}"], _ = timed(tick, repeat)
+
+
+def bench_orderbook(url, session, repeat, results, root):
+    ladder = None
+    for depth in BOOK_DEPTHS:
+        params = {"category": "linear", "symbol": "BTCUSDT", "limit": depth}
+        results[f"book.network/{depth}"], content = timed(
+            lambda: session.get(url + ENDPOINTS["orderbook"], params=params, timeout=10).content, repeat
+        )
+        results[f"book.parse/{depth}"], data = timed(lambda: loads(content)["result"], repeat)
+        book = OrderBook()
+
+        def build():
+            book.load_snapshot(data["a"], data["b"], data.get("u"))
+            return book.asks.top(depth), book.bids.top(depth)
+
+        results[f"book.build/{depth}"], (asks, bids) = timed(build, repeat)
+        if root is not None:
+            from ladder import LadderView
+            ladder = LadderView(root, depth=depth)
+            shifted = (asks[0], asks[1][::-1].copy(), np.cumsum(asks[1][::-1]))
+
+            def render():
+                ladder.render(asks, bids, 1, 3, "Mid Price")
+                ladder.render(shifted, bids, 1, 3, "Mid Price")  # every size changes
+                root.update_idletasks()
+
+            results[f"tk.ladder/{depth}"], _ = timed(render, repeat)
+            ladder.canvas.destroy()
+
+
+def bench_tickers(url, session, repeat, results, root):
+    results["tickers.network/all"], content = timed(
+        lambda: session.get(url + ENDPOINTS["tickers"], params={"category": "linear"}, timeout=10).content, repeat
+    )
+    results["tickers.parse/all"], data = timed(lambda: parse_tickers(loads(content)["result"]["list"]), repeat)
+    if root is not None:
+        from watchlist import WatchlistView
+        watchlist = WatchlistView(root, rows=20)
+
+        def render():
+            watchlist.update(data)
+            watchlist.sort_by("change")
+            root.update_idletasks()
+
+        results["tk.watchlist/all"], _ = timed(render, repeat)
+        watchlist.canvas.destroy()
+
+
+def run(responses, repeat=20):
+    server = StandInServer(responses)
+    url = server.start()
+    session = make_session()
+    root = make_tk()
+    results = {}
+    try:
+        bench_klines(url, session, repeat, results)
+        bench_lod(repeat, results)
+        bench_orderbook(url, session, repeat, results, root)
+        bench_tickers(url, session, repeat, results, root)
+    finally:
+        server.stop()
+        if root is not None:
+            root.destroy()
+    meta = {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "matplotlib": matplotlib.__version__,
+        "machine": platform.machine(),
+        "repeat": repeat,
+        "tk": root is not None,
+    }
+    return {"meta": meta, "results": results}
+
+
+def report(results, baseline=None, tolerance=0.25):
+    """Print a table; with a baseline, return the stages slower than allowed."""
+    regressions = []
+    for stage, ms in results.items():
+        line = f"{stage:<24} {ms:>10.3f} ms"
+        if baseline and stage in baseline:
+            before = baseline[stage]
+            change = (ms - before) / before if before else 0.0
+            line += f"   was {before:>9.3f} ms  {change:+7.1%}"
+            # Differences under 0.1 ms are mostly scheduler noise
+            if change > tolerance and ms - before > 0.1:
+                line += "  REGRESSION"
+                regressions.append(stage)
+        print(line)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    run_parser = commands.add_parser("run", help="run the benchmarks")
+    run_parser.add_argument("--responses", help="directory written by `record` (default: synthesized data)")
+    run_parser.add_argument("--repeat", type=int, default=20)
+    run_parser.add_argument("--json", help="write results to this file")
+    run_parser.add_argument("--compare", help="results file from an earlier run")
+    run_parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown before failing")
+    record_parser = commands.add_parser("record", help="save live responses for offline runs")
+    record_parser.add_argument("path")
+    record_parser.add_argument("--symbol", default="BTCUSDT")
+    serve_parser = commands.add_parser("serve", help="serve the responses for the apps (BYBIT_REST)")
+    serve_parser.add_argument("--responses")
+    serve_parser.add_argument("--port", type=int, default=8766)
+    args = parser.parse_args()
+
+    if args.command == "record":
+        record(args.path, args.symbol)
+        return
+    if args.command == "serve":
+        server = StandInServer(load_responses(args.responses), port=args.port)
+        print(f"Serving market endpoints on {server.url}")
+        try:
+            server.server.serve_forever()
+        except KeyboardInterrupt:
+            server.server.server_close()
+        return
+
+    output = run(load_responses(args.responses), args.repeat)
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["results"]
+    regressions = report(output["results"], baseline, args.tolerance)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(output, f, indent=2)
+    if regressions:
+        print(f"{len(regressions)} stage(s) slower than {args.tolerance:.0%}: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
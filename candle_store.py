@@ -0,0 +1,167 @@
+import os
+import threading
+import numpy as np
+from candles import PAGE_LIMIT, fetch_klines
+from parsing import CANDLE_DTYPE, array_to_frame, records_to_array
+
+STORE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "candle_data")
+
+
+class CandleStore:
+    """Columnar candle files, one memory-mapped file per (symbol, interval).
+
+    Candles are stored as fixed-size records sorted by timestamp, so reads are
+    a binary search plus a slice of the mapping and never copy the file.
+    """
+
+    def __init__(self, root=STORE_DIR):
+        self.root = root
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+
+    def path(self, symbol, interval):
+        return os.path.join(self.root, f"{symbol}_{interval}.bin")
+
+    def _lock(self, symbol, interval):
+        with self._locks_guard:
+            return self._locks.setdefault((symbol, str(interval)), threading.Lock())
+
+    def _map(self, symbol, interval, mode="r"):
+        """Map the file's whole records.
+
+        A record cut short (by a crash mid-append) is left out of the
+        mapping, and a writer ("r+", which holds the market's lock) trims it
+        from the file so the next append starts on a record boundary.
+        """
+        path = self.path(symbol, interval)
+        size = os.path.getsize(path) if os.path.exists(path) else 0
+        count = size // CANDLE_DTYPE.itemsize
+        if mode != "r" and count * CANDLE_DTYPE.itemsize != size:
+            print(f"Warning: trimming a partial candle record from {path}")
+            self._rewrite(symbol, interval, np.fromfile(path, dtype=CANDLE_DTYPE, count=count))
+        if not count:
+            return np.empty(0, dtype=CANDLE_DTYPE)
+        return np.memmap(path, dtype=CANDLE_DTYPE, mode=mode, shape=(count,))
+
+    def read(self, symbol, interval, start=None, end=None, tail=None):
+        """Return a zero-copy view of stored candles between start and end (ms)."""
+        arr = self._map(symbol, interval)
+        ts = arr["timestamp"]
+        lo = 0 if start is None else np.searchsorted(ts, start, side="left")
+        hi = len(arr) if end is None else np.searchsorted(ts, end, side="right")
+        if tail is not None:
+            lo = max(lo, hi - tail)
+        return arr[lo:hi]
+
+    def frame(self, symbol, interval, start=None, end=None, tail=None):
+        return array_to_frame(self.read(symbol, interval, start, end, tail))
+
+    def first_timestamp(self, symbol, interval):
+        arr = self._map(symbol, interval)
+        return int(arr["timestamp"][0]) if len(arr) else None
+
+    def last_timestamp(self, symbol, interval):
+        arr = self._map(symbol, interval)
+        return int(arr["timestamp"][-1]) if len(arr) else None
+
+    def write(self, symbol, interval, arr):
+        """Merge an ascending candle array into the store; new values win."""
+        if not len(arr):
+            return
+        with self._lock(symbol, interval):
+            existing = self._map(symbol, interval, mode="r+")
+            if not len(existing):
+                self._rewrite(symbol, interval, arr)
+                return
+            ts = existing["timestamp"]
+            first, last = ts[0], ts[-1]
+            newer = arr[arr["timestamp"] > last]
+            within = arr[arr["timestamp"] <= last]
+            if len(within):
+                idx = np.searchsorted(ts, within["timestamp"])
+                found = (idx < len(ts)) & (ts[np.minimum(idx, len(ts) - 1)] == within["timestamp"])
+                if within["timestamp"][0] < first or not found.all():
+                    # Older history or holes inside the file: rebuild it once.
+                    combined = np.concatenate([np.asarray(existing), arr])
+                    del existing, ts
+                    self._rewrite(symbol, interval, _dedupe(combined))
+                    return
+                existing[idx] = within
+                existing.flush()
+            del existing, ts
+            if len(newer):
+                with open(self.path(symbol, interval), "ab") as f:
+                    f.write(np.ascontiguousarray(newer).tobytes())
+
+    def write_records(self, symbol, interval, records):
+        self.write(symbol, interval, records_to_array(records))
+
+    def _rewrite(self, symbol, interval, arr):
+        path = self.path(symbol, interval)
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(np.ascontiguousarray(arr).tobytes())
+        os.replace(tmp, path)
+
+    def sync(self, symbol, interval, fetch=fetch_klines, limit=50, max_pages=20):
+        """Fetch the candles missing since the last stored one.
+
+        Pages backwards from now until the page reaches what is already on
+        disk. An empty store just gets the latest `limit` candles. If
+        `max_pages` pages still do not reach it, the stored history is
+        replaced by the fetched candles rather than kept with a gap.
+        """
+        last = self.last_timestamp(symbol, interval)
+        if last is None:
+            self.write_records(symbol, interval, fetch(symbol, interval, limit=limit))
+            return
+        pages = []
+        end = None
+        for _ in range(max_pages):
+            records = fetch(symbol, interval, limit=PAGE_LIMIT, start=last, end=end)
+            if not records:
+                break
+            pages.append(records_to_array(records))
+            oldest = int(records[-1][0])
+            if oldest <= last:
+                break
+            end = oldest - 1
+        else:
+            print(f"Warning: more than {max_pages} pages of {symbol} {interval} candles missing since the last "
+                  f"stored one, replacing the stored history")
+            with self._lock(symbol, interval):
+                self._rewrite(symbol, interval, _dedupe(np.concatenate(pages)))
+            return
+        if pages:
+            self.write(symbol, interval, _dedupe(np.concatenate(pages)))
+
+    def backfill(self, symbol, interval, fetch=fetch_klines, pages=5):
+        """Extend stored history backwards in time, `pages` requests at most."""
+        first = self.first_timestamp(symbol, interval)
+        if first is None:
+            return 0
+        chunks = []
+        end = first - 1
+        for _ in range(pages):
+            records = fetch(symbol, interval, limit=PAGE_LIMIT, end=end)
+            if not records:
+                break
+            chunks.append(records_to_array(records))
+            end = int(records[-1][0]) - 1
+            if len(records) < PAGE_LIMIT:
+                break
+        if not chunks:
+            return 0
+        arr = _dedupe(np.concatenate(chunks))
+        self.write(symbol, interval, arr)
+        return len(arr)
+
+
+def _dedupe(arr):
+    """Sort by timestamp and keep the last occurrence of each candle."""
+    arr = arr[np.argsort(arr["timestamp"], kind="stable")]
+    ts = arr["timestamp"]
+    keep = np.ones(len(arr), dtype=bool)
+    keep[:-1] = ts[1:] != ts[:-1]
+    return arr[keep]
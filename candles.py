@@ -0,0 +1,246 @@
+import threading
+import pandas as pd
+from netloop import REST_URL, http
+from parsing import array_to_frame, loads, records_to_array
+from resample import BASE_INTERVAL, INTERVAL_MINUTES, ResampledSeries, can_resample, resample
+
+KLINE_URL = f"{REST_URL}/v5/market/kline"
+PAGE_LIMIT = 1000  # Bybit's maximum klines per request
+
+
+def fetch_klines(symbol, interval, limit=50, start=None, end=None):
+    """Fetch raw kline rows (newest first) from the Bybit REST API."""
+    params = {
+        "category": "linear",
+        "symbol": symbol,
+        "interval": interval,
+        "limit": limit
+    }
+    if start is not None:
+        params["start"] = start
+    if end is not None:
+        params["end"] = end
+    response = http.get(KLINE_URL, params=params, timeout=10)
+    response.raise_for_status()
+    data = loads(response.content)
+    if data["retCode"] != 0:
+        raise ValueError(f"API: {data['retMsg']}")
+    return data["result"]["list"]
+
+
+def klines_to_frame(records):
+    """Convert raw kline rows into a time-indexed OHLCV and turnover DataFrame."""
+    return array_to_frame(records_to_array(records))
+
+
+def volume_threshold(volumes):
+    """Volume level marked on the charts: 10% above the mean of the window."""
+    return volumes.mean() * 1.1
+
+
+def to_ms(ts):
+    """Milliseconds since the epoch for a pandas Timestamp."""
+    return ts.value // 1_000_000
+
+
+class CandleCache:
+    """Keeps candle history per (symbol, interval) and only fetches what changed.
+
+    The first request for a market pulls `history` candles. Later requests ask
+    only for candles starting at the last stored timestamp, update the
+    still-open candle in place and append anything newer.
+
+    With a `store` (see candle_store.CandleStore) the first request instead
+    reads from disk, fetches just the gap since the last run and optionally
+    backfills older history; every later fetch is written through to disk.
+    A store also enables local resampling: a 1-minute base series of
+    `base_candles` is kept per symbol and every timeframe it can cover is
+    aggregated from it instead of being fetched (see resample.py).
+    """
+
+    def __init__(self, history=50, max_candles=1000, fetch=fetch_klines, store=None, backfill_pages=0,
+                 resample=True, base_candles=15000):
+        self.history = history
+        self.max_candles = max_candles
+        self.fetch = fetch
+        self.store = store
+        self.backfill_pages = backfill_pages
+        self.resample = resample and store is not None
+        self.base_candles = base_candles
+        self._frames = {}
+        self._resampled = {}
+        self._lock = threading.Lock()
+
+    def source_interval(self, interval):
+        """The interval actually fetched to serve `interval`."""
+        interval = str(interval)
+        if (self.resample and can_resample(interval)
+                and INTERVAL_MINUTES[interval] * self.history <= self.base_candles):
+            return BASE_INTERVAL
+        return interval
+
+    def _limit(self, interval):
+        if self.resample and interval == BASE_INTERVAL:
+            return self.base_candles
+        return self.max_candles
+
+    def load_stored(self, symbol, interval):
+        """Seed the cache from the on-disk store without touching the network."""
+        if self.store is None:
+            return pd.DataFrame()
+        source = self.source_interval(interval)
+        df = self.store.frame(symbol, source, tail=self._limit(source))
+        if not df.empty:
+            with self._lock:
+                self._frames.setdefault((symbol, source), df)
+        return self.local(symbol, interval)
+
+    def get(self, symbol, interval):
+        """Return a snapshot of the cached candles, refreshed from the API."""
+        interval = str(interval)
+        source = self.source_interval(interval)
+        df = self._refresh(symbol, source)
+        if source != interval:
+            return self._resample(symbol, interval, df)
+        return df.copy()
+
+    def local(self, symbol, interval):
+        """Candles already in memory (resampled if needed); never fetches."""
+        interval = str(interval)
+        source = self.source_interval(interval)
+        with self._lock:
+            df = self._frames.get((symbol, source))
+        if df is None or df.empty:
+            return pd.DataFrame()
+        if source != interval:
+            return self._resample(symbol, interval, df)
+        return df.copy()
+
+    def _resample(self, symbol, interval, base):
+        with self._lock:
+            series = self._resampled.setdefault(
+                (symbol, interval), ResampledSeries(interval, self.max_candles)
+            )
+            return series.update(base).copy()
+
+    def _refresh(self, symbol, interval):
+        key = (symbol, interval)
+        with self._lock:
+            df = self._frames.get(key)
+        if df is None or df.empty:
+            df = self._initial_load(symbol, interval)
+        else:
+            records = self.fetch(symbol, interval, limit=self.history, start=to_ms(df.index[-1]))
+            df = self._merge(df, records, symbol, interval)
+        limit = self._limit(interval)
+        if len(df) > limit:
+            df = df.iloc[-limit:]
+        with self._lock:
+            self._frames[key] = df
+        return df
+
+    def _initial_load(self, symbol, interval):
+        if interval == BASE_INTERVAL:
+            # Candles may change anywhere in the base, so rebuild what was resampled
+            with self._lock:
+                for key in [k for k in self._resampled if k[0] == symbol]:
+                    del self._resampled[key]
+        if self.store is None:
+            return klines_to_frame(self.fetch(symbol, interval, limit=self.history))
+        self.store.sync(symbol, interval, fetch=self.fetch, limit=self.history)
+        pages = self.backfill_pages
+        limit = self._limit(interval)
+        if limit > self.max_candles:
+            # The 1m base has to cover `history` bars of every resampled timeframe
+            missing = limit - len(self.store.read(symbol, interval))
+            pages = max(pages, -(-missing // PAGE_LIMIT))
+        if pages:
+            self.store.backfill(symbol, interval, fetch=self.fetch, pages=pages)
+        return self.store.frame(symbol, interval, tail=limit)
+
+    def _merge(self, df, records, symbol, interval):
+        if not records:
+            return df
+        # Records come newest first; if the oldest one is past our last candle
+        # there is a gap we cannot fill from this page, so start over.
+        if int(records[-1][0]) > to_ms(df.index[-1]):
+            return self._initial_load(symbol, interval)
+        return self._apply(df, records, symbol, interval)
+
+    def _apply(self, df, records, symbol, interval):
+        """A new frame with the records merged in; `df` may still be read elsewhere, so it is left as is."""
+        if self.store is not None:
+            self.store.write_records(symbol, interval, records)
+        fresh = klines_to_frame(records)
+        start = df.index.searchsorted(fresh.index[0])
+        rest = df.iloc[start:]
+        rest = rest[~rest.index.isin(fresh.index)]  # Candles the records skip over; normally none
+        merged = pd.concat([df.iloc[:start], fresh, rest])
+        return merged.sort_index() if len(rest) else merged
+
+    def apply_stream(self, symbol, interval, records):
+        """Merge streamed kline rows (newest first) into an already loaded market.
+
+        Returns False if the market has not been loaded yet; the next get()
+        fills in its history. Use local() to read the result.
+        """
+        key = (symbol, str(interval))
+        with self._lock:
+            df = self._frames.get(key)
+        if df is None or df.empty or not records:
+            return False
+        df = self._apply(df, records, symbol, interval)
+        limit = self._limit(str(interval))
+        if len(df) > limit:
+            df = df.iloc[-limit:]
+        with self._lock:
+            self._frames[key] = df
+        return True
+
+    def stored_history(self, symbol, interval, before=None):
+        """Every stored candle for the market (resampled if needed), not just the cached tail.
+
+        With `before` (ms), only the candles up to the one starting then are
+        read; that one is included because older minutes can complete it.
+        Without a store, or before the first load, this is what local() returns.
+        """
+        interval = str(interval)
+        source = self.source_interval(interval)
+        df = pd.DataFrame()
+        if self.store is not None:
+            end = before
+            if before is not None and source != interval:
+                end = before + INTERVAL_MINUTES[interval] * 60_000 - 1  # Every minute of that candle
+            df = self.store.frame(symbol, source, end=end)
+        if df.empty:
+            df = self.local(symbol, interval)
+            if before is not None and not df.empty:
+                df = df.loc[:pd.Timestamp(before, unit="ms", tz="UTC")]
+            return df
+        return resample(df, interval) if source != interval else df
+
+    def backfill(self, symbol, interval, pages=1):
+        """Store up to `pages` pages of candles older than the stored history.
+
+        Returns the number of candles fetched; 0 means the exchange has no
+        older data (or there is no store to keep it in).
+        """
+        if self.store is None:
+            return 0
+        return self.store.backfill(symbol, self.source_interval(interval), fetch=self.fetch, pages=pages)
+
+    def has(self, symbol, interval):
+        with self._lock:
+            df = self._frames.get((symbol, self.source_interval(interval)))
+        return df is not None and not df.empty
+
+    def invalidate(self, symbol=None, interval=None):
+        """Drop cached candles for one market, or everything when called bare.
+
+        A resampled interval drops the base series it is built from.
+        """
+        with self._lock:
+            if symbol is None:
+                self._frames.clear()
+            else:
+                self._frames.pop((symbol, self.source_interval(interval)), None)
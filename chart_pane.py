@@ -0,0 +1,227 @@
+import tkinter as tk
+import numpy as np
+import pandas as pd
+from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+from matplotlib.figure import Figure
+from indicators import IndicatorEngine
+from lod import COLUMNS, CandlePyramid, frame_rows
+from renderer import CandleRenderer
+
+MIN_SPAN = 10  # Fewest candles a pane zooms in to
+BUCKET_PX = 4  # Narrowest bar drawn; zooming out past this merges candles
+ZOOM_STEP = 1.25
+HISTORY_PAGES = 2  # Pages of older candles fetched per pan past the start
+# Indicator lines the apps draw over their candles: (column, panel, color); see indicators.py
+CHART_OVERLAYS = [
+    ("ema20", "price", "#1f77b4"),
+    ("bb20_upper", "price", "#8c8c8c"),
+    ("bb20_lower", "price", "#8c8c8c"),
+    ("vwap", "price", "#9467bd"),
+    ("rsi14", "lower", "#ff7f0e"),
+]
+
+
+class ChartPane:
+    """Candle chart for one (symbol, interval), fed by a MarketHub subscription.
+
+    Owns its figure, renderer and one indicator engine per market it has
+    shown. Any number of panes can sit in one window; panes on the same
+    market share the hub's feed, and panes given the same `engines` dict
+    share indicator engines too. `title` is a format string taking {symbol}
+    and {interval}, and on_draw(pane) is called after every redraw.
+
+    The pane shows `window` candles at first. The mouse wheel zooms around
+    the cursor, dragging pans and a double click returns to the latest
+    `window` candles. Candles are kept in a lod.CandlePyramid holding the
+    market's whole stored history, and each redraw merges them into buckets
+    at least BUCKET_PX wide, so a redraw costs the same at any zoom level.
+    Panning near the start of the history fetches older pages in the
+    background and adds just those in front of the pyramid. While the right edge is on the last candle the view follows
+    new candles.
+    """
+
+    def __init__(self, parent, hub, symbol, interval, overlays=(), window=50, title=None,
+                 figsize=(10, 8), on_draw=None, engines=None):
+        self.hub = hub
+        self.title = title
+        self.window = window
+        self.on_draw = on_draw
+        self.frame = tk.Frame(parent)
+        fig = Figure(figsize=figsize)
+        ax_price, ax_volume = fig.subplots(2, 1, gridspec_kw={'height_ratios': [3, 1]})
+        self.canvas = FigureCanvasTkAgg(fig, master=self.frame)
+        self.canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+        self.renderer = CandleRenderer(ax_price, ax_volume, self.canvas, overlays=overlays)
+        self.engines = {} if engines is None else engines
+        self.sub = None
+        self._drag = None
+        self.canvas.mpl_connect('scroll_event', self._on_scroll)
+        self.canvas.mpl_connect('button_press_event', self._on_press)
+        self.canvas.mpl_connect('motion_notify_event', self._on_motion)
+        self.canvas.mpl_connect('button_release_event', self._on_release)
+        self.set_market(symbol, interval)
+
+    def pack(self, **kwargs):
+        self.frame.pack(**kwargs)
+
+    def grid(self, **kwargs):
+        self.frame.grid(**kwargs)
+
+    def set_market(self, symbol, interval):
+        old = self.sub
+        self.symbol, self.interval = symbol, str(interval)
+        self.pyramid = CandlePyramid()
+        self.span, self.right = self.window, None  # right=None follows the last candle
+        self.history = "none"  # none -> loading -> loaded -> exhausted, or failed
+        self.engine = self.engines.setdefault((symbol, self.interval), IndicatorEngine())
+        self._latest = None
+        self.sub = self.hub.candles(symbol, interval, self.draw)
+        if old is not None:
+            old.close()  # After subscribing, so a feed both markets share stays open
+
+    def refresh(self):
+        self.sub.refresh()
+
+    def draw(self, ohlc_data):
+        """Hub callback: merge the latest candles and redraw the current view."""
+        self.engine.update(ohlc_data)  # Only steps the changed candles
+        self._latest = ohlc_data
+        rows = frame_rows(ohlc_data)
+        if (not len(self.pyramid) or rows[0, 0] < self.pyramid.first_timestamp()
+                or rows[-1, 0] < self.pyramid.last_timestamp() or not self.pyramid.update(rows)):
+            # First candles, a gap, or the market went back in time (a replay seek):
+            # history reload brings the rest back
+            self.pyramid.build(rows)
+            if self.history == "loaded":
+                self.history = "none"
+        if self.history == "none":
+            self._load_history(0)
+        self.redraw()
+
+    def redraw(self):
+        n = len(self.pyramid)
+        if not n:
+            return
+        width = self.renderer.ax_price.bbox.width
+        max_buckets = max(MIN_SPAN, int(width / BUCKET_PX))
+        span = int(min(max(self.span, MIN_SPAN), n))
+        right = n if self.right is None else int(min(max(self.right, span), n))
+        k, rows, ends = self.pyramid.buckets(right - span, right, max_buckets)
+        index = pd.DatetimeIndex(pd.to_datetime(rows[:, 0].astype(np.int64), unit="ms", utc=True), name="timestamp")
+        data = pd.DataFrame({name: rows[:, i] for i, name in enumerate(COLUMNS, start=1)}, index=index)
+        self.renderer.window = len(data)
+        title = self.title.format(symbol=self.symbol, interval=self.interval) if self.title else None
+        if title and k:
+            title = f"{title} ({1 << k} candles per bar)"
+        self.renderer.update(data, title=title, indicators=self._indicators(ends, k))
+        if right - span < span and self.history == "loaded":
+            self._load_history(HISTORY_PAGES)  # Within a screen of the start: fetch older candles
+        if self.on_draw is not None:
+            self.on_draw(self)
+
+    def _indicators(self, ends, k):
+        """Indicator values at each bucket's last candle; NaN where the engine has none."""
+        if self._latest is None or self._latest.empty:
+            return {}
+        ts = self._latest.index.as_unit('ms').asi8
+        ends = ends.astype(np.int64)
+        pos = np.searchsorted(ts, ends)
+        hit = pos < len(ts)
+        hit[hit] = ts[pos[hit]] == ends[hit]
+        out = {}
+        for column, values in self.engine.tail(len(ts)).items():
+            if k and column == "volume_threshold":
+                continue  # Per candle, not per bucket; the renderer uses the buckets' own mean
+            idx = pos - (len(ts) - len(values))  # Values cover the frame's last rows only
+            known = hit & (idx >= 0)
+            out[column] = np.full(len(ends), np.nan)
+            out[column][known] = values[idx[known]]
+        return out
+
+    def _load_history(self, pages):
+        self.history = "loading"
+        market = (self.symbol, self.interval)
+        if not pages:
+            self.hub.history(self.symbol, self.interval, lambda _, pyramid: self._on_history(market, pyramid),
+                             prepare=lambda frame: CandlePyramid(frame_rows(frame)))
+            return
+        # Older pages: read back only the candles up to the first one shown and put them in front
+        before = int(self.pyramid.first_timestamp())
+        self.hub.history(self.symbol, self.interval, lambda fetched, rows: self._on_older(market, before, fetched, rows),
+                         pages=pages, prepare=frame_rows, before=before)
+
+    def _on_older(self, market, before, fetched, rows):
+        if market != (self.symbol, self.interval):
+            return  # Switched markets while it loaded
+        if rows is None:
+            self.history = "failed"  # Not retried until the market changes
+            return
+        if self.pyramid.first_timestamp() != before:
+            self._load_history(0)  # Rebuilt meanwhile (a gap or a replay seek): read it all again
+            return
+        self.history = "loaded" if fetched else "exhausted"
+        n = len(self.pyramid)
+        self.pyramid.prepend(rows)
+        if self.right is not None:
+            self.right += len(self.pyramid) - n  # Older candles shift every index; keep the same candles on screen
+        self.redraw()
+
+    def _on_history(self, market, pyramid):
+        if market != (self.symbol, self.interval):
+            return  # Switched markets while it loaded
+        if pyramid is None:
+            self.history = "failed"  # Not retried until the market changes
+            return
+        self.history = "loaded"
+        if not len(pyramid):
+            return
+        if self._latest is not None and not self._latest.empty and not pyramid.update(frame_rows(self._latest)):
+            self.history = "failed"  # Stored history ends before the live candles; keep what is shown
+            return
+        if self.right is not None and len(self.pyramid):
+            # Older candles shift every index; keep the same candles on screen
+            self.right += int(np.searchsorted(pyramid.timestamps, self.pyramid.first_timestamp()))
+        self.pyramid = pyramid
+        self.redraw()
+
+    def _on_scroll(self, event):
+        if event.inaxes is None or not len(self.pyramid):
+            return
+        n = len(self.pyramid)
+        span = min(max(self.span, MIN_SPAN), n)
+        right = n if self.right is None else min(max(self.right, span), n)
+        bbox = event.inaxes.bbox
+        at = (event.x - bbox.x0) / bbox.width  # Cursor position across the axes, 0..1
+        anchor = right - span + at * span
+        new_span = min(max(span * ZOOM_STEP ** -event.step, MIN_SPAN), n)
+        new_right = anchor + (1 - at) * new_span
+        self.span = new_span
+        self.right = None if new_right >= n else max(new_right, new_span)
+        self.redraw()
+
+    def _on_press(self, event):
+        if event.inaxes is None or event.button != 1:
+            return
+        if event.dblclick:
+            self.span, self.right = self.window, None
+            self.redraw()
+            return
+        n = len(self.pyramid)
+        self._drag = (event.x, n if self.right is None else self.right, event.inaxes.bbox.width)
+
+    def _on_motion(self, event):
+        if self._drag is None or event.x is None:
+            return
+        x0, right, width = self._drag
+        n = len(self.pyramid)
+        span = min(max(self.span, MIN_SPAN), n)
+        right -= (event.x - x0) / width * span
+        self.right = None if right >= n else max(right, span)
+        self.redraw()
+
+    def _on_release(self, event):
+        self._drag = None
+
+    def close(self):
+        self.sub.close()
+        self.frame.destroy()
@@ -1,17 +1,12 @@
+import time
+STARTED = time.perf_counter()  # Startup is reported relative to this
 import tkinter as tk
 from tkinter import messagebox, ttk
-from time import sleep
-import pandas as pd
-from pybit.unified_trading import HTTP
-from keys import api, secret
-import sys
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-import requests
-import mplfinance as mpf
-import threading
-
-session = HTTP(api_key=api, api_secret=secret)
+from app import TradingApp
+from watchlist import WatchlistView
+from console import LogConsole
+
+app = TradingApp(STARTED)  # The chart's candles and the order ticker come from app.hub
 
 global timeframe
 
@@ -19,97 +14,9 @@ timeframe = 1
 leverage = 10
 qty = 50
 
-class TextRedirector:
-    def __init__(self, text_widget):
-        self.text_widget = text_widget
-
-    def write(self, message):
-        self.text_widget.insert(tk.END, message)
-        self.text_widget.yview(tk.END)  # Auto-scroll to the bottom
-
-    def flush(self):
-        pass  # No need to implement for our purposes
-
-def get_balance():
-    try:
-        resp = session.get_wallet_balance(accountType="UNIFIED", coin="USDT")
-        balance = float(resp['result']['list'][0]['coin'][0]['walletBalance'])
-        return balance
-    except Exception as err:
-        print(err)
-        return 0.0
-
-def get_symbols():
-    try:
-        instruments = session.get_instruments_info(category='linear')['result']['list']
-        return [item['symbol'] for item in instruments]
-    except Exception as err:
-        print(f" retrieving symbols: {err}")
-        return []
-
-def get_precisions(symbol):
-    try:
-        resp = session.get_instruments_info(category='linear', symbol=symbol)['result']['list'][0]
-        price_filter = resp['priceFilter']['tickSize']
-        price_precision = len(price_filter.split('.')[1]) if '.' in price_filter else 0
-        qty_filter = resp['lotSizeFilter']['qtyStep']
-        qty_precision = len(qty_filter.split('.')[1]) if '.' in qty_filter else 0
-        return price_precision, qty_precision
-    except Exception as err:
-        print(err)
-        return 0, 0
-
-def get_ohlc(symbol, interval, limit=50):
-    url = "https://api.bybit.com/v5/market/kline"
-    params = {
-        "category": "linear",
-        "symbol": symbol,
-        "interval": interval,
-        "limit": limit
-    }
-    response = requests.get(url, params=params)
-    response.raise_for_status()
-    data = response.json()
-    if data["retCode"] != 0:
-        raise ValueError(f"API: {data['retMsg']}")
-    records = data["result"]["list"]
-    df = pd.DataFrame(records, columns=["timestamp", "open", "high", "low", "close", "volume", "turnover"])
-    df['timestamp'] = pd.to_numeric(df['timestamp'])
-    df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms', utc=True)
-    df.set_index('timestamp', inplace=True)
-    numeric_cols = ["open", "high", "low", "close", "volume"]
-    df[numeric_cols] = df[numeric_cols].apply(pd.to_numeric, errors='coerce')
-    df.drop(columns=["turnover"], inplace=True)
-    df.sort_index(inplace=True)
-    return df
-
 def place_order_market(symbol, side):
-    try:
-        price_precision, qty_precision = get_precisions(symbol)
-        mark_price = float(session.get_tickers(category='linear', symbol=symbol)['result']['list'][0]['markPrice'])
-        print(f'Placing {side.capitalize()} order for {symbol}. Mark price: {mark_price}')
-        order_qty = round(qty / mark_price, qty_precision)
-        sleep(2)
-        if side == 'buy':
-            side_order = 'Buy'
-        elif side == 'sell':
-            side_order = 'Sell'
-        else:
-            raise ValueError("Invalid side: must be 'buy' or 'sell'")
-
-        resp = session.place_order(
-            category='linear',
-            symbol=symbol,
-            side=side_order,
-            orderType='Market',
-            qty=order_qty,
-            tpTriggerBy='MarkPrice',
-            slTriggerBy='MarkPrice',
-            leverage=leverage
-        )
-        print(resp)
-    except Exception as err:
-        print(err)
+    """Queue a market order on the order worker; see orders.OrderExecutor."""
+    return app.order_executor.submit_market(symbol, side, qty, leverage)
 
 def open_long_trade():
     symbol = symbol_var.get()
@@ -123,69 +30,19 @@ def change_timeframe(new_timeframe):
     global timeframe
     timeframe = new_timeframe
     print(f"Timeframe changed to: {timeframe}")
-    update_chart()
-
-def fetch_ohlc_data(symbol, interval):
-    try:
-        return get_ohlc(symbol, interval)
-    except Exception as e:
-        print(f"Error fetching OHLC data: {e}")
-        return pd.DataFrame()
+    # Resampled timeframes share the 1m feed, so this redraws from memory
+    chart_pane.set_market(symbol_var.get(), timeframe)
 
 def update_chart():
-    def fetch_and_update():
-        symbol = symbol_var.get()
-        ohlc_data = fetch_ohlc_data(symbol, timeframe)
-
-        if ohlc_data.empty:
-            print("No data fetched, skipping chart update.")
-            return
-
-        # Update the chart safely on the main thread
-        root.after(0, lambda: draw_chart(ohlc_data))
-
-    threading.Thread(target=fetch_and_update).start()
-
-    # Schedule the next update
-    root.after(5000, update_chart)  # Update every 5 seconds
-    
-def draw_chart(ohlc_data):
-    """Updates the chart visuals safely on the main thread."""
-    ax1.clear()
-    ax2.clear()
-
-    # Plot the data
-    mpf.plot(
-        ohlc_data.tail(50),  # Limit to last 50 candles
-        type='candle',
-        ax=ax1,
-        style='charles',
-        volume=ax2
-    )
-
-    # Update titles and thresholds
-    ax1.set_title(f'{symbol_var.get()} Price')
-    ax2.axhline(
-        y=ohlc_data['volume'].mean() * 1.1,
-        color='r', linestyle='--', linewidth=1, label='Volume Threshold'
-    )
-    ax2.legend()
+    """Ask the hub for a chart refresh; skipped while the stream is live."""
+    chart_pane.refresh()
 
-    canvas.draw()
+def show_balance(balance):
+    balance_label.config(text=f"Balance: {balance} USDT")
 
 def on_focus_in(event):
     update_chart()  # Update chart when window gains focus
 
-def get_max_leverage(symbol):
-    """Get the maximum leverage for the given symbol."""
-    try:
-        instrument_info = session.get_instruments_info(category='linear', symbol=symbol)['result']['list'][0]
-        max_leverage = float(instrument_info['leverageFilter']['maxLeverage'])  # Convert to float
-        return int(max_leverage)  # Cast to int
-    except Exception as err:
-        print(f"Error fetching max leverage for {symbol}: {err}")
-        return 50  # Default leverage if API fails
-
 def update_leverage(new_leverage):
     """Update the global leverage variable."""
     global leverage
@@ -194,23 +51,31 @@ def update_leverage(new_leverage):
 
 def update_leverage_slider():
     """Update the leverage slider range based on the selected symbol."""
-    try:
-        selected_symbol = symbol_var.get()
-        max_leverage = get_max_leverage(selected_symbol)
-        leverage_slider.config(from_=1, to=max_leverage)
-        leverage_slider.set(min(leverage_slider.get(), max_leverage))  # Adjust current value if needed
-        print(f"Leverage slider updated for {selected_symbol}: 1x to {max_leverage}x")
-    except Exception as err:
-        print(f"Error updating leverage slider: {err}")
+    app.fit_leverage_slider(leverage_slider, symbol_var.get())
 
 def on_symbol_change(event):
     """Handle symbol change event."""
-    print(f"Selected symbol: {symbol_var.get()}")
+    symbol = symbol_var.get()
+    print(f"Selected symbol: {symbol}")
+    update_leverage_slider()
+    chart_pane.set_market(symbol, timeframe)
+    app.follow_ticker(symbol)
+    app.prepare_orders(symbol)
+
+def on_instruments_loaded(loaded):
+    """Fill the symbol list and leverage limits once instruments arrive."""
+    symbol_dropdown.config(values=list(loaded))
     update_leverage_slider()
 
+def select_symbol(symbol):
+    """Switch the chart to a symbol clicked in the watchlist."""
+    symbol_var.set(symbol)
+    on_symbol_change(None)
+
 def main():
     try:
-        global root, ax1, ax2, canvas, symbol_var, leverage_slider
+        global root, symbol_var, leverage_slider, symbol_dropdown, center_frame
+        global balance_label, watchlist, startup_widgets
         root = tk.Tk()
         root.title("Trading Bot")
         root.geometry("1200x800")
@@ -245,6 +110,7 @@ def main():
         timeframe_label.pack(pady=5)
 
         # Timeframe buttons
+        startup_widgets = []  # Enabled by load_services()
         timeframes = [
             ("1m", "1"), 
             ("3m", "3"),
@@ -261,64 +127,91 @@ def main():
                 timeframe_frame,
                 text=tf_label,
                 command=lambda x=tf_value: change_timeframe(x),
-                font=("Arial", 10)
+                font=("Arial", 10),
+                state=tk.DISABLED
             )
             tf_button.pack(side=tk.LEFT, padx=2)
+            startup_widgets.append(tf_button)
 
-        balance_label = tk.Label(right_frame, text=f"Balance: {get_balance()} USDT", font=("Arial", 14))
+        balance_label = tk.Label(right_frame, text="Balance: ... USDT", font=("Arial", 14))
         balance_label.pack(pady=10)
 
-        symbols = get_symbols()
+        symbols = app.known_symbols()
         symbol_var = tk.StringVar(value=symbols[0])
         symbol_dropdown = ttk.Combobox(
             right_frame,
             textvariable=symbol_var,
             values=symbols,
-            font=("Arial", 12)
+            font=("Arial", 12),
+            state=tk.DISABLED
         )
         symbol_dropdown.pack(pady=5)
         symbol_dropdown.bind("<<ComboboxSelected>>", on_symbol_change)
+        startup_widgets.append(symbol_dropdown)
 
         long_button = tk.Button(
             right_frame,
             text="Open Long Position",
             command=open_long_trade,
-            font=("Arial", 12)
+            font=("Arial", 12),
+            state=tk.DISABLED
         )
         long_button.pack(pady=5)
+        startup_widgets.append(long_button)
 
         short_button = tk.Button(
             right_frame,
             text="Open Short Position",
             command=open_short_trade,
-            font=("Arial", 12)
+            font=("Arial", 12),
+            state=tk.DISABLED
         )
         short_button.pack(pady=5)
+        startup_widgets.append(short_button)
+
+        # Watchlist of all symbols
+        watchlist_label = tk.Label(right_frame, text="Watchlist:", font=("Arial", 12))
+        watchlist_label.pack(pady=5)
+        watchlist = WatchlistView(right_frame, rows=20, on_select=select_symbol)
+        watchlist.pack()
 
         # Center frame for chart
         center_frame = tk.Frame(root)
         center_frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=10, pady=10)
 
-        fig, (ax1, ax2) = plt.subplots(
-            2, 1, figsize=(10, 8),
-            gridspec_kw={'height_ratios': [3, 1]}
-        )
-        canvas = FigureCanvasTkAgg(fig, master=center_frame)
-        canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
-
         # Terminal output
-        terminal = tk.Text(center_frame, height=10, wrap=tk.WORD, font=("Courier", 10))
-        terminal.pack(fill=tk.BOTH, expand=True, pady=10)
-        sys.stdout = TextRedirector(terminal)
-
-        # Initial setup
-        update_leverage_slider()  # Set leverage slider for the default symbol
-        update_chart()  # Initial chart update
+        app.console = LogConsole(center_frame, max_lines=2000, mirror_path="app.log")
+        app.console.pack(side=tk.BOTTOM, fill=tk.BOTH, expand=True, pady=10)
+        app.console.redirect()
+        app.console.start()
 
-        root.bind("<FocusIn>", on_focus_in)
+        app.load(root, load_services)
         root.mainloop()
     except Exception as e:
         messagebox.show("", str(e))
 
+def load_services(_):
+    """Second half of startup, on the Tk thread once the heavy imports are done."""
+    global chart_pane
+    from chart_pane import CHART_OVERLAYS, ChartPane
+
+    app.start_live()
+    app.start_hub()
+
+    # Initial setup; stored candles are drawn as soon as the pane subscribes
+    chart_pane = ChartPane(
+        center_frame, app.hub, symbol_var.get(), timeframe,
+        overlays=CHART_OVERLAYS, title="{symbol} Price", on_draw=app.on_chart_drawn
+    )
+    chart_pane.pack(side=tk.TOP, fill=tk.BOTH, expand=True)
+    app.follow_ticker(symbol_var.get())
+    for widget in startup_widgets:
+        widget.config(state=tk.NORMAL)
+    update_leverage_slider()  # Set leverage slider for the default symbol, if cached
+
+    # Symbols, balance and leverage limits all arrive from the scheduler instead of blocking startup
+    app.start_jobs(symbol_var.get(), on_instruments_loaded, show_balance, watchlist)
+    root.bind("<FocusIn>", on_focus_in)
+
 if __name__ == "__main__":
     main()
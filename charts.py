@@ -1,127 +1,23 @@
+import time
+STARTED = time.perf_counter()  # Startup is reported relative to this
+import argparse
 import tkinter as tk
 from tkinter import ttk
-import pandas as pd
-from pybit.unified_trading import HTTP
-from keys import api, secret
-import sys
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-import mplfinance as mpf
-import threading
-import requests
-
-session = HTTP(api_key=api, api_secret=secret)
+from app import TradingApp
+from ladder import LadderPane
+from watchlist import WatchlistView
+from console import LogConsole
+
+app = TradingApp(STARTED)  # Every chart and ladder gets its market data from app.hub
+replay_path = None  # A recorded session to replay offline instead of the live market; see replay.py
+replay_speed = 1
+ladder_depth = 50  # Levels kept per side (scroll the ladder); up to 200 streams the deeper book
 timeframe = 1
 leverage = 10
 qty = 50
 
-class TextRedirector:
-    def __init__(self, text_widget):
-        self.text_widget = text_widget
-
-    def write(self, message):
-        self.text_widget.insert(tk.END, message)
-        self.text_widget.yview(tk.END)
-
-    def flush(self):
-        pass
-
-def get_price_precision(symbol):
-    try:
-        resp = session.get_instruments_info(category='linear', symbol=symbol)['result']['list'][0]
-        tick_size = resp['priceFilter']['tickSize']
-        price_precision = len(tick_size.split('.')[1].rstrip('0')) if '.' in tick_size else 0
-        return price_precision
-    except Exception as err:
-        print(f"Error fetching price precision: {err}")
-        return 0
-
-def get_balance():
-    try:
-        resp = session.get_wallet_balance(accountType="UNIFIED", coin="USDT")
-        balance = float(resp['result']['list'][0]['coin'][0]['walletBalance'])
-        return balance
-    except Exception as e:
-        print(f"Error fetching balance: {e}")
-        return 0
-
-def get_symbols():
-    try:
-        resp = session.get_instruments_info(category='linear')['result']['list']
-        return [item['symbol'] for item in resp]
-    except Exception as e:
-        print(f"Error fetching symbols: {e}")
-        return []
-
-def fetch_ohlc_data(symbol, interval, limit=50):
-    url = "https://api.bybit.com/v5/market/kline"
-    params = {"category": "linear", "symbol": symbol, "interval": interval, "limit": limit}
-    try:
-        response = requests.get(url, params=params)
-        response.raise_for_status()
-        data = response.json()['result']['list']
-        df = pd.DataFrame(data, columns=["timestamp", "open", "high", "low", "close", "volume", "turnover"])
-        df['timestamp'] = pd.to_datetime(pd.to_numeric(df['timestamp']), unit='ms', utc=True)
-        df.set_index('timestamp', inplace=True)
-        df[["open", "high", "low", "close", "volume"]] = df[["open", "high", "low", "close", "volume"]].apply(pd.to_numeric)
-        df.drop(columns=["turnover"], inplace=True)
-        return df.sort_index()
-    except Exception as e:
-        print(f"Error fetching OHLC data: {e}")
-        return pd.DataFrame()
-
-def fetch_order_book():
-    global ask_labels, bid_labels
-    try:
-        symbol = symbol_var.get()
-        base_currency = symbol.replace('USDT', '')
-        url = "https://api.bybit.com/v5/market/orderbook"
-        params = {"category": "linear", "symbol": symbol}
-        response = requests.get(url, params=params).json()['result']
-        N = 10
-        price_precision = get_price_precision(symbol)
-        quantity_precision = 4
-        asks = [(float(p), float(q)) for p, q in response['a'][:N]]
-        bids = [(float(p), float(q)) for p, q in response['b'][:N]]
-
-        cumulative_ask_qty = 0
-        for i, label in enumerate(ask_labels):
-            if i < len(asks):
-                price, qty = asks[i]
-                cumulative_ask_qty += qty
-                label.config(text=f"{price:.{price_precision}f}    {qty:.{quantity_precision}f}    {cumulative_ask_qty:.{quantity_precision}f}")
-            else:
-                label.config(text="")
-
-        cumulative_bid_qty = 0
-        for i, label in enumerate(bid_labels):
-            if i < len(bids):
-                price, qty = bids[i]
-                cumulative_bid_qty += qty
-                label.config(text=f"{price:.{price_precision}f}    {qty:.{quantity_precision}f}    {cumulative_bid_qty:.{quantity_precision}f}")
-            else:
-                label.config(text="")
-
-        if bids and asks:
-            mid_price = (bids[0][0] + asks[0][0]) / 2
-            price_label.config(text=f"Mid Price: {mid_price:.{price_precision}f}")
-        else:
-            price_label.config(text="Mid Price: N/A")
-
-    except Exception as e:
-        print(f"Error fetching order book: {e}")
-    root.after(510, fetch_order_book)
-
 def place_order_market(symbol, side_order):
-    try:
-        if side_order not in ['buy', 'sell']:
-            raise ValueError("Invalid order side")
-        mark_price = float(session.get_tickers(category='linear', symbol=symbol)['result']['list'][0]['markPrice'])
-        print(f'Placing {side_order.capitalize()} order for {symbol}. Mark price: {mark_price}')
-        resp = session.place_order(category='linear', symbol=symbol, side=side_order, orderType='Market', qty=qty)
-        print(f"Order placed: {resp}")
-    except Exception as e:
-        print(f"Error placing order: {e}")
+    return app.order_executor.submit_market(symbol, side_order, qty, leverage)
 
 def open_long_trade():
     place_order_market(symbol_var.get(), 'buy')
@@ -129,66 +25,75 @@ def open_long_trade():
 def open_short_trade():
     place_order_market(symbol_var.get(), 'sell')
 
+def read_number(var, name, kind=float):
+    try:
+        value = kind(var.get())
+    except ValueError:
+        value = 0
+    if value <= 0:
+        print(f"Invalid {name}: {var.get()!r}")
+        return None
+    return value
+
+def open_bracket(side_order):
+    tp_pct = read_number(take_profit_var, "take profit %")
+    sl_pct = read_number(stop_loss_var, "stop loss %")
+    if tp_pct and sl_pct:
+        app.order_executor.submit_bracket(symbol_var.get(), side_order, qty, leverage, tp_pct, sl_pct)
+
+def scale_in(side_order):
+    levels = read_number(scale_levels_var, "scale-in levels", int)
+    step_pct = read_number(scale_step_var, "scale-in step %")
+    if levels and step_pct:
+        app.order_executor.submit_scale_in(symbol_var.get(), side_order, qty, leverage, levels, step_pct)
+
+def close_all_positions():
+    app.order_executor.submit_close_all()
+
 def change_timeframe(new_timeframe):
     global timeframe
     timeframe = new_timeframe
     print(f"Timeframe changed to: {timeframe}")
-    update_chart()
-
-def update_chart():
-    def fetch_and_update():
-        symbol = symbol_var.get()
-        ohlc_data = fetch_ohlc_data(symbol, timeframe)
-        if not ohlc_data.empty:
-            root.after(0, lambda: draw_chart(ohlc_data))
-        else:
-            print("No data fetched, skipping chart update.")
-    threading.Thread(target=fetch_and_update).start()
-    root.after(5000, update_chart)
-
-def draw_chart(ohlc_data):
-    ax1.clear()
-    ax2.clear()
-    mpf.plot(ohlc_data.tail(50), type='candle', ax=ax1, style='charles', volume=ax2)
-    canvas.draw()
+    chart_pane.set_market(symbol_var.get(), timeframe)
+
+def show_balance(balance):
+    balance_label.config(text=f"Balance: {balance} USDT")
 
 def on_symbol_change(event):
+    symbol = symbol_var.get()
     update_leverage_slider()
-    base_currency = symbol_var.get().replace('USDT', '')
-    asks_header.config(text=f"Price (USDT)    Qty ({base_currency})    Total ({base_currency})")
-    bids_header.config(text=f"Price (USDT)    Qty ({base_currency})    Total ({base_currency})")
+    chart_pane.set_market(symbol, timeframe)
+    ladder.set_symbol(symbol)
+    app.follow_ticker(symbol)
+    app.prepare_orders(symbol)
+
+def select_symbol(symbol):
+    symbol_var.set(symbol)
+    on_symbol_change(None)
 
 def update_leverage(new_leverage):
     global leverage
     leverage = int(new_leverage)
 
 def update_leverage_slider():
-    try:
-        max_leverage = get_max_leverage(symbol_var.get())
-        leverage_slider.config(from_=1, to=max_leverage)
-        leverage_slider.set(min(leverage_slider.get(), max_leverage))
-    except Exception as e:
-        print(f"Error updating leverage slider: {e}")
+    app.fit_leverage_slider(leverage_slider, symbol_var.get())
 
-def get_max_leverage(symbol):
-    try:
-        info = session.get_instruments_info(category='linear', symbol=symbol)['result']['list'][0]
-        return float(info['leverageFilter']['maxLeverage'])
-    except Exception as e:
-        print(f"Error fetching max leverage: {e}")
-        return 1
+def on_instruments_loaded(loaded):
+    symbol_dropdown.config(values=list(loaded))
+    update_leverage_slider()
 
 def main():
     try:
-        global root, ax1, ax2, canvas, symbol_var, leverage_slider, price_label
-        global ask_labels, bid_labels, asks_header, bids_header
+        global root, symbol_var, leverage_slider, symbol_dropdown, center_frame
+        global balance_label, startup_widgets, batch_widgets
+        global take_profit_var, stop_loss_var, scale_levels_var, scale_step_var
+        global ladder, watchlist
         root = tk.Tk()
         root.title("Bybit Application")
         root.state('zoomed')
 
-        symbols = get_symbols()
+        symbols = app.known_symbols()
         symbol_var = tk.StringVar(value=symbols[0])
-        base_currency = symbol_var.get().replace('USDT', '')
 
         center_frame = tk.Frame(root)
         center_frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=10, pady=10)
@@ -199,33 +104,8 @@ def main():
         price_frame = tk.Frame(root)
         price_frame.pack(side=tk.RIGHT, fill=tk.Y, padx=10, pady=10)
 
-        order_book_frame = tk.Frame(price_frame)
-        order_book_frame.pack(pady=10)
-
-        N = 10
-        ask_labels = []
-        bid_labels = []
-
-        asks_frame = tk.Frame(order_book_frame)
-        asks_frame.pack(side=tk.TOP)
-        asks_header = tk.Label(asks_frame, text=f"Price (USDT)    Qty ({base_currency})    Total ({base_currency})", font=("Arial", 10, "bold"))
-        asks_header.pack(side=tk.TOP)
-        for _ in range(N):
-            label = tk.Label(asks_frame, text="", fg='red', font=("Arial", 10))
-            label.pack(side=tk.BOTTOM, anchor='w')
-            ask_labels.append(label)
-
-        price_label = tk.Label(order_book_frame, text="", font=("Arial", 14))
-        price_label.pack()
-
-        bids_frame = tk.Frame(order_book_frame)
-        bids_frame.pack(side=tk.TOP)
-        bids_header = tk.Label(bids_frame, text=f"Price (USDT)    Qty ({base_currency})    Total ({base_currency})", font=("Arial", 10, "bold"))
-        bids_header.pack(side=tk.TOP)
-        for _ in range(N):
-            label = tk.Label(bids_frame, text="", fg='green', font=("Arial", 10))
-            label.pack(side=tk.TOP, anchor='w')
-            bid_labels.append(label)
+        ladder = LadderPane(price_frame, app.instruments, symbol_var.get(), levels=ladder_depth, visible_levels=10)
+        ladder.pack(pady=10)
 
         leverage_frame = tk.Frame(right_frame)
         leverage_frame.pack(pady=10)
@@ -238,34 +118,120 @@ def main():
         timeframe_frame.pack(pady=10)
         tk.Label(timeframe_frame, text="Timeframe:", font=("Arial", 12)).pack(pady=5)
         timeframes = [("1m", "1"), ("3m", "3"), ("5m", "5"), ("15m", "15"), ("30m", "30"), ("1h", "60"), ("4h", "240"), ("1d", "D")]
+        startup_widgets = []  # Enabled by load_services()
         for tf_label, tf_value in timeframes:
-            tk.Button(timeframe_frame, text=tf_label, command=lambda x=tf_value: change_timeframe(x), font=("Arial", 10)).pack(side=tk.LEFT, padx=2)
+            tf_button = tk.Button(timeframe_frame, text=tf_label, command=lambda x=tf_value: change_timeframe(x), font=("Arial", 10), state=tk.DISABLED)
+            tf_button.pack(side=tk.LEFT, padx=2)
+            startup_widgets.append(tf_button)
 
-        tk.Label(right_frame, text=f"Balance: {get_balance()} USDT", font=("Arial", 14)).pack(pady=10)
+        balance_label = tk.Label(right_frame, text="Balance: ... USDT", font=("Arial", 14))
+        balance_label.pack(pady=10)
 
-        symbol_dropdown = ttk.Combobox(right_frame, textvariable=symbol_var, values=symbols, font=("Arial", 12))
+        symbol_dropdown = ttk.Combobox(right_frame, textvariable=symbol_var, values=symbols, font=("Arial", 12), state=tk.DISABLED)
         symbol_dropdown.pack(pady=5)
         symbol_dropdown.bind("<<ComboboxSelected>>", on_symbol_change)
 
-        tk.Button(right_frame, text="Open Long Position", command=open_long_trade, font=("Arial", 12)).pack(pady=5)
-        tk.Button(right_frame, text="Open Short Position", command=open_short_trade, font=("Arial", 12)).pack(pady=5)
-
-        fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(10, 8), gridspec_kw={'height_ratios': [3, 1]})
-        canvas = FigureCanvasTkAgg(fig, master=center_frame)
-        canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
-
-        terminal = tk.Text(center_frame, height=10, wrap=tk.WORD, font=("Courier", 10))
-        terminal.pack(fill=tk.BOTH, expand=True, pady=10)
-        sys.stdout = TextRedirector(terminal)
-
-        update_leverage_slider()
-        update_chart()
-        fetch_order_book()
-
-        root.protocol("WM_DELETE_WINDOW", root.destroy)
+        long_button = tk.Button(right_frame, text="Open Long Position", command=open_long_trade, font=("Arial", 12), state=tk.DISABLED)
+        long_button.pack(pady=5)
+        short_button = tk.Button(right_frame, text="Open Short Position", command=open_short_trade, font=("Arial", 12), state=tk.DISABLED)
+        short_button.pack(pady=5)
+        startup_widgets += [symbol_dropdown, long_button, short_button]
+
+        # Order groups: a bracket is one entry with TP/SL attached, a scale-in a ladder of limit orders
+        group_frame = tk.Frame(right_frame)
+        group_frame.pack(pady=5)
+        take_profit_var, stop_loss_var = tk.StringVar(value="1.0"), tk.StringVar(value="0.5")
+        scale_levels_var, scale_step_var = tk.StringVar(value="5"), tk.StringVar(value="0.2")
+        fields = [("TP %", take_profit_var), ("SL %", stop_loss_var), ("Levels", scale_levels_var), ("Step %", scale_step_var)]
+        for column, (field_label, var) in enumerate(fields):
+            tk.Label(group_frame, text=field_label, font=("Arial", 10)).grid(row=0, column=column)
+            tk.Entry(group_frame, textvariable=var, width=6).grid(row=1, column=column, padx=2)
+        batch_widgets = [
+            tk.Button(group_frame, text="Bracket Long", command=lambda: open_bracket('buy'), font=("Arial", 10)),
+            tk.Button(group_frame, text="Bracket Short", command=lambda: open_bracket('sell'), font=("Arial", 10)),
+            tk.Button(group_frame, text="Scale In Long", command=lambda: scale_in('buy'), font=("Arial", 10)),
+            tk.Button(group_frame, text="Scale In Short", command=lambda: scale_in('sell'), font=("Arial", 10)),
+        ]
+        for i, button in enumerate(batch_widgets):
+            button.config(state=tk.DISABLED)
+            button.grid(row=2 + i // 2, column=(i % 2) * 2, columnspan=2, sticky="ew", pady=2)
+        close_all_button = tk.Button(right_frame, text="Close All Positions", command=close_all_positions,
+                                     font=("Arial", 12), state=tk.DISABLED)
+        close_all_button.pack(pady=5)
+        batch_widgets.append(close_all_button)
+
+        tk.Label(right_frame, text="Watchlist:", font=("Arial", 12)).pack(pady=5)
+        watchlist = WatchlistView(right_frame, rows=20, on_select=select_symbol)
+        watchlist.pack()
+
+        app.console = LogConsole(center_frame, max_lines=2000, mirror_path="app.log")
+        app.console.pack(side=tk.BOTTOM, fill=tk.BOTH, expand=True, pady=10)
+        app.console.redirect()
+        app.console.start()
+
+        app.load(root, load_services, prepare=load_replay_index if replay_path else None)
         root.mainloop()
     except Exception as e:
         print(f"Error in main application: {e}")
 
+def load_replay_index():
+    """Read (or build) the replay's seek index in the background with the imports."""
+    from replay import load_index
+    return load_index(replay_path)
+
+def start_replay(index):
+    """Swap the live market and order executor for the recorded session."""
+    from candle_store import CandleStore
+    from replay import ReplayBar, ReplayStream, SimulatedExecutor
+
+    stream = ReplayStream(replay_path, index=index, store=CandleStore(), speed=replay_speed,
+                          on_seek=lambda: root.after(0, app.hub.refresh))
+    app.market_stream = stream
+    app.candle_cache = stream.candle_cache
+    app.order_executor = SimulatedExecutor(app.instruments, lambda symbol: app.hub.current_book(symbol),
+                                           stream.last_price)
+    app.streaming = True  # A replay only has its stream
+    symbols = stream.symbols
+    if symbols and symbol_var.get() not in symbols:
+        symbol_var.set(symbols[0])
+        ladder.set_symbol(symbols[0])
+    symbol_dropdown.config(values=symbols)
+    balance_label.config(text="Balance: replay")
+    root.title(f"Bybit Application - replaying {replay_path}")
+    ReplayBar(center_frame, stream).pack(side=tk.TOP, fill=tk.X)
+
+def load_services(index):
+    """Second half of startup, on the Tk thread once the heavy imports are done."""
+    global chart_pane
+    from chart_pane import CHART_OVERLAYS, ChartPane
+
+    if replay_path:
+        start_replay(index)
+    else:
+        app.start_live()
+    app.start_hub()
+
+    # Stored candles are drawn as soon as the pane subscribes; the hub fetches the rest
+    chart_pane = ChartPane(center_frame, app.hub, symbol_var.get(), timeframe,
+                           overlays=CHART_OVERLAYS, on_draw=app.on_chart_drawn)
+    chart_pane.pack(side=tk.TOP, fill=tk.BOTH, expand=True)
+    ladder.subscribe(app.hub)
+    app.follow_ticker(symbol_var.get())
+    for widget in startup_widgets + ([] if replay_path else batch_widgets):
+        widget.config(state=tk.NORMAL)  # The replay's simulated executor only takes market orders
+    update_leverage_slider()
+
+    # Symbols, balance and leverage limits arrive through the scheduler instead of blocking startup
+    if replay_path:
+        app.scheduler.start()  # Offline: nothing to poll but the hub's feeds
+        app.startup.mark("services")
+        return
+    app.start_jobs(symbol_var.get(), on_instruments_loaded, show_balance, watchlist)
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bybit chart, order book and order entry")
+    parser.add_argument("--replay", metavar="SESSION", help="replay a session recorded with MarketStream(record_to=...) offline")
+    parser.add_argument("--speed", type=float, default=1, help="replay speed: 1 to 1000, or 0 for as fast as possible")
+    args = parser.parse_args()
+    replay_path, replay_speed = args.replay, args.speed
     main()
@@ -0,0 +1,245 @@
+"""Headless market-data collector: klines and order-book metrics without a GUI.
+
+Runs the same candle cache, kline/order-book streams and order-book model as
+the charts, but never imports tkinter, matplotlib or pybit, so it can run on
+a server with one process covering many symbols:
+
+    python collector.py BTCUSDT ETHUSDT SOLUSDT --interval 5 --format ndjson
+    python collector.py BTCUSDT --format csv --output btc.csv --book-every 5
+
+Closed candles are written as "kline" rows together with every indicator of
+indicators.default_indicators (the volume threshold over the last `--window`
+candles); every `--book-every` seconds each symbol with a synced book gets a
+"book" row. Use --no-book for klines only.
+"""
+import argparse
+import csv
+import json
+import math
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from candles import CandleCache, to_ms
+from candle_store import CandleStore
+from indicators import IndicatorEngine, VolumeThreshold, default_indicators
+from orderbook import OrderBook
+from resample import INTERVAL_MINUTES
+from streams import PUBLIC_URL, MarketStream, kline_topic, orderbook_topic, kline_rows_to_records
+
+FIELDS = [
+    "kind", "symbol", "interval", "timestamp", "open", "high", "low", "close", "volume",
+    "mid", "spread", "imbalance", "bid_depth", "ask_depth"
+]
+FORMATS = ("text", "csv", "ndjson")
+
+
+class RowWriter:
+    """Thread-safe writer of collector rows as text, CSV or newline-delimited JSON."""
+
+    def __init__(self, out, fmt="text", fields=FIELDS):
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown format: {fmt}")
+        self.out = out
+        self.fmt = fmt
+        self._lock = threading.Lock()
+        self._csv = None
+        if fmt == "csv":
+            self._csv = csv.DictWriter(out, fieldnames=fields, extrasaction="ignore")
+            self._csv.writeheader()
+
+    def write(self, row):
+        with self._lock:
+            if self._csv is not None:
+                self._csv.writerow(row)
+            elif self.fmt == "ndjson":
+                self.out.write(json.dumps(row) + "\n")
+            else:
+                self.out.write(" ".join(f"{k}={v}" for k, v in row.items()) + "\n")
+            self.out.flush()
+
+
+def collector_indicators(window=50):
+    """The chart's indicators, with the volume threshold over `window` candles."""
+    indicators = [ind for ind in default_indicators() if not isinstance(ind, VolumeThreshold)]
+    return indicators + [VolumeThreshold(window)]
+
+
+class Collector:
+    """Streams klines and order books for many symbols into a RowWriter.
+
+    Each symbol's history is loaded once through the CandleCache; after that
+    the kline stream keeps it current and a candle is emitted when the
+    exchange marks it confirmed (or on every push with `emit_updates`). An
+    interval resampled from the 1m stream is emitted when the confirmed 1m
+    candle is the last of its bucket.
+    Books are sampled from the locally maintained OrderBook, so collecting
+    book metrics costs no REST calls. History that failed to load is
+    reloaded on a worker thread, never on the stream's.
+    """
+
+    def __init__(self, symbols, interval, writer, candle_cache, stream, book_depth=50, book_every=1.0,
+                 window=50, emit_updates=False):
+        self.symbols = list(symbols)
+        self.interval = str(interval)
+        self.writer = writer
+        self.candle_cache = candle_cache
+        self.stream = stream
+        self.book_depth = book_depth
+        self.book_every = book_every
+        self.window = window
+        self.emit_updates = emit_updates
+        self.books = {}
+        self.engines = {symbol: IndicatorEngine(collector_indicators(window)) for symbol in self.symbols}
+        self.loader = ThreadPoolExecutor(max_workers=1, thread_name_prefix="history")
+        self._reloading = set()
+        self._lock = threading.Lock()
+        self._running = False
+
+    def start(self):
+        self._running = True
+        self.stream.start()
+        source = self.candle_cache.source_interval(self.interval)
+        for symbol in self.symbols:
+            self.load_history(symbol)
+            self.stream.subscribe(kline_topic(symbol, source), self.on_kline_message)
+            if self.book_every:
+                self.books[symbol] = OrderBook()
+                self.stream.subscribe(orderbook_topic(symbol, self.book_depth), self.on_orderbook_message)
+
+    def run(self):
+        """Block, sampling books until stop() or Ctrl+C."""
+        try:
+            while self._running:
+                time.sleep(self.book_every or 1.0)
+                if self.book_every:
+                    for symbol in self.symbols:
+                        self.emit_book(symbol)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop()
+
+    def stop(self):
+        self._running = False
+        self.stream.stop()
+        self.loader.shutdown(wait=False)
+
+    def load_history(self, symbol):
+        try:
+            self.candle_cache.get(symbol, self.interval)
+        except Exception as e:
+            print(f"Error loading {symbol} history: {e}", file=sys.stderr)
+        finally:
+            with self._lock:
+                self._reloading.discard(symbol)
+
+    def reload_history(self, symbol):
+        """Queue load_history(symbol) on the loader thread, once while one is pending."""
+        with self._lock:
+            if symbol in self._reloading:
+                return
+            self._reloading.add(symbol)
+        self.loader.submit(self.load_history, symbol)
+
+    def on_kline_message(self, message):
+        _, interval, symbol = message['topic'].split('.', 2)
+        rows = message['data']
+        if not self.candle_cache.apply_stream(symbol, interval, kline_rows_to_records(rows)):
+            # History failed to load earlier; a REST fetch here would stall the stream thread
+            self.reload_history(symbol)
+            return
+        if self.emit_updates or any(self.closes_candle(interval, r) for r in rows):
+            self.emit_kline(symbol)
+
+    def closes_candle(self, interval, row):
+        """Whether a pushed `interval` kline row closes a candle of the collected interval."""
+        if not row.get('confirm'):
+            return False
+        if interval == self.interval:
+            return True
+        end = int(row['start']) + INTERVAL_MINUTES[interval] * 60_000
+        return end % (INTERVAL_MINUTES[self.interval] * 60_000) == 0
+
+    def emit_kline(self, symbol):
+        df = self.candle_cache.local(symbol, self.interval)
+        if df.empty:
+            return
+        last = df.iloc[-1]
+        engine = self.engines[symbol].update(df)  # Steps only the candles that changed
+        self.writer.write({
+            "kind": "kline",
+            "symbol": symbol,
+            "interval": self.interval,
+            "timestamp": int(to_ms(df.index[-1])),
+            **{col: float(last[col]) for col in ("open", "high", "low", "close", "volume")},
+            # Indicators still warming up are left empty (null in JSON)
+            **{col: None if math.isnan(value) else round(value, 8) for col, value in engine.latest().items()},
+        })
+
+    def on_orderbook_message(self, message):
+        topic = message['topic']
+        symbol = topic.split('.', 2)[2]
+        book = self.books.get(symbol)
+        if book is None:
+            return
+        synced = book.synced
+        if not book.apply(message) and synced:  # Resubscribe once per gap, not once per dropped delta
+            print(f"{symbol} order book out of sync at update {message['data'].get('u')}, resubscribing",
+                  file=sys.stderr)
+            self.stream.unsubscribe(topic, self.on_orderbook_message)
+            self.stream.subscribe(topic, self.on_orderbook_message)
+
+    def emit_book(self, symbol):
+        book = self.books[symbol]
+        with book.lock:
+            if not book.synced or book.mid() is None:
+                return
+            mid, spread, imbalance = book.mid(), book.spread(), book.imbalance(self.book_depth)
+            bid_depth, ask_depth = book.depth_within_bps(10)
+        self.writer.write({
+            "kind": "book",
+            "symbol": symbol,
+            "timestamp": int(time.time() * 1000),
+            "mid": mid,
+            "spread": spread,
+            "imbalance": round(imbalance, 4),
+            "bid_depth": bid_depth,
+            "ask_depth": ask_depth,
+        })
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("symbols", nargs="+", help="linear symbols, e.g. BTCUSDT ETHUSDT")
+    parser.add_argument("--interval", default="1", help="kline interval (Bybit notation: 1, 5, 60, D...)")
+    parser.add_argument("--format", choices=FORMATS, default="text")
+    parser.add_argument("--output", help="file to append to instead of stdout")
+    parser.add_argument("--history", type=int, default=200, help="candles loaded per symbol on start")
+    parser.add_argument("--window", type=int, default=50, help="candles in the volume threshold")
+    parser.add_argument("--book-depth", type=int, default=50, choices=(1, 50, 200, 500))
+    parser.add_argument("--book-every", type=float, default=1.0, help="seconds between book rows")
+    parser.add_argument("--no-book", action="store_true", help="collect klines only")
+    parser.add_argument("--emit-updates", action="store_true", help="write every kline push, not just closes")
+    parser.add_argument("--store", action="store_true", help="persist candles to candle_data/ between runs")
+    parser.add_argument("--url", default=PUBLIC_URL, help="public WebSocket URL (e.g. a ws_replay.py server)")
+    args = parser.parse_args()
+
+    out = open(args.output, "a", newline="") if args.output else sys.stdout
+    # Without a store there is no 1m base to resample from, so every interval is fetched natively
+    candle_cache = CandleCache(history=args.history, max_candles=max(args.history, args.window),
+                               store=CandleStore() if args.store else None)
+    collector = Collector(
+        args.symbols, args.interval, RowWriter(out, args.format, FIELDS + IndicatorEngine(collector_indicators()).columns),
+        candle_cache, MarketStream(args.url),
+        book_depth=args.book_depth, book_every=0 if args.no_book else args.book_every,
+        window=args.window, emit_updates=args.emit_updates
+    )
+    collector.start()
+    collector.run()
+    if out is not sys.stdout:
+        out.close()
+
+
+if __name__ == "__main__":
+    main()
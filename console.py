@@ -0,0 +1,178 @@
+import logging
+import queue
+import sys
+import threading
+import tkinter as tk
+from collections import deque
+from logging.handlers import RotatingFileHandler
+
+LEVELS = {"DEBUG": logging.DEBUG, "INFO": logging.INFO, "WARNING": logging.WARNING, "ERROR": logging.ERROR}
+
+
+def classify(line, default=logging.INFO):
+    """Level of a printed line from its prefix.
+
+    The app starts what it prints about failures with "Error" and about
+    problems it works around with "Warning"; words further into a line
+    ("0 errors") do not count.
+    """
+    if line.startswith(("Error", "Traceback")):
+        return logging.ERROR
+    if line.startswith("Warning"):
+        return logging.WARNING
+    return default
+
+
+class ConsoleStream:
+    """File-like object for sys.stdout/sys.stderr that queues whole lines.
+
+    print() writes the text and the newline separately, so fragments are
+    held per thread until the line is complete; nothing here touches Tk.
+    """
+
+    def __init__(self, console, level=logging.INFO):
+        self.console = console
+        self.level = level
+        self._partial = threading.local()
+
+    def write(self, message):
+        text = getattr(self._partial, "text", "") + message
+        *lines, rest = text.split("\n")
+        self._partial.text = rest
+        for line in lines:
+            self.console.put(classify(line, self.level), line)
+        return len(message)
+
+    def flush(self):
+        pass
+
+
+class ConsoleHandler(logging.Handler):
+    """logging handler feeding a LogConsole, for code that uses `logging`."""
+
+    def __init__(self, console, level=logging.NOTSET):
+        super().__init__(level)
+        self.console = console
+
+    def emit(self, record):
+        try:
+            for line in self.format(record).split("\n"):
+                self.console.put(record.levelno, line)
+        except Exception:
+            self.handleError(record)
+
+
+class LogConsole:
+    """Bounded log view fed from any thread and drawn in batches on the Tk thread.
+
+    Lines go into a queue; every `flush_ms` the Tk thread moves what arrived
+    into a ring of the last `max_lines` lines and inserts the visible ones in
+    a single Text update, trimming the oldest. The level menu filters what is
+    shown (the ring keeps everything, so lowering it brings lines back), and
+    `mirror_path` also appends every line to a rotating log file.
+    """
+
+    def __init__(self, parent, max_lines=1000, flush_ms=100, level=logging.INFO, mirror_path=None,
+                 mirror_bytes=1_000_000, mirror_backups=3, height=10, font=("Courier", 10)):
+        self.max_lines = max_lines
+        self.flush_ms = flush_ms
+        self.level = level
+        self.lines = deque(maxlen=max_lines)
+        self.pending = queue.SimpleQueue()
+        self.shown = 0
+        self.running = False
+        self._saved_streams = None
+
+        self.mirror = None
+        if mirror_path:
+            self.mirror = RotatingFileHandler(mirror_path, maxBytes=mirror_bytes, backupCount=mirror_backups)
+            self.mirror.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(message)s"))
+
+        self.frame = tk.Frame(parent)
+        self.level_var = tk.StringVar(value=logging.getLevelName(level))
+        header = tk.Frame(self.frame)
+        header.pack(fill=tk.X)
+        tk.Label(header, text="Log level:", font=("Arial", 9)).pack(side=tk.LEFT)
+        tk.OptionMenu(header, self.level_var, *LEVELS, command=lambda name: self.set_level(LEVELS[name])).pack(
+            side=tk.LEFT
+        )
+        self.text = tk.Text(self.frame, height=height, wrap=tk.WORD, font=font, state=tk.DISABLED)
+        self.text.pack(fill=tk.BOTH, expand=True)
+        self.text.tag_configure(logging.getLevelName(logging.WARNING), foreground="#b36b00")
+        self.text.tag_configure(logging.getLevelName(logging.ERROR), foreground="red")
+
+    def pack(self, **kwargs):
+        self.frame.pack(**kwargs)
+
+    def put(self, level, line):
+        """Queue one line; safe from any thread."""
+        self.pending.put((level, line))
+
+    def redirect(self):
+        """Send print() output and stderr to the console until close()."""
+        self._saved_streams = (sys.stdout, sys.stderr)
+        sys.stdout = ConsoleStream(self, logging.INFO)
+        sys.stderr = ConsoleStream(self, logging.ERROR)
+
+    def start(self):
+        self.running = True
+        self._flush()
+
+    def close(self):
+        self.running = False
+        if self._saved_streams is not None:
+            sys.stdout, sys.stderr = self._saved_streams
+            self._saved_streams = None
+        if self.mirror is not None:
+            self.mirror.close()
+
+    def set_level(self, level):
+        self.level = level
+        self.text.configure(state=tk.NORMAL)
+        self.text.delete("1.0", tk.END)
+        self.shown = 0
+        self._insert([entry for entry in self.lines if entry[0] >= level])
+        self.text.configure(state=tk.DISABLED)
+
+    def _flush(self):
+        if not self.running:
+            return
+        batch = []
+        while True:
+            try:
+                batch.append(self.pending.get_nowait())
+            except queue.Empty:
+                break
+        if batch:
+            if len(batch) > self.max_lines:
+                batch = batch[-self.max_lines:]
+            self.lines.extend(batch)
+            if self.mirror is not None:
+                for level, line in batch:
+                    self.mirror.handle(logging.makeLogRecord({"levelno": level, "levelname": logging.getLevelName(level),
+                                                              "msg": line}))
+            visible = [entry for entry in batch if entry[0] >= self.level]
+            if visible:
+                # Only follow new lines if the user has not scrolled up
+                at_bottom = self.text.yview()[1] >= 1.0
+                self.text.configure(state=tk.NORMAL)
+                self._insert(visible)
+                self.text.configure(state=tk.DISABLED)
+                if at_bottom:
+                    self.text.see(tk.END)
+        self.text.after(self.flush_ms, self._flush)
+
+    def _insert(self, entries):
+        # One insert per run of lines sharing a level keeps Text updates few
+        start = 0
+        for i in range(1, len(entries) + 1):
+            if i == len(entries) or entries[i][0] != entries[start][0]:
+                level = entries[start][0]
+                tag = logging.getLevelName(level) if level >= logging.WARNING else ()
+                self.text.insert(tk.END, "".join(line + "\n" for _, line in entries[start:i]), tag)
+                start = i
+        self.shown += len(entries)
+        if self.shown > self.max_lines:
+            excess = self.shown - self.max_lines
+            self.text.delete("1.0", f"{excess + 1}.0")
+            self.shown = self.max_lines
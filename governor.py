@@ -0,0 +1,242 @@
+import random
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Future
+import requests
+
+# Bybit allows 600 requests per 5 s per IP; a 100/s bucket holding at most 100
+# tokens can never exceed that in any 5 s window. Private endpoints are
+# limited per account at 10/s or more, so their groups sit at 10/s.
+IP_LIMIT = (100, 100)
+GROUP_LIMITS = {
+    "market": (100, 100),
+    "order": (10, 10),
+    "position": (10, 10),
+    "account": (10, 10),
+}
+PYBIT_GROUPS = {
+    "place_order": "order",
+    "amend_order": "order",
+    "cancel_order": "order",
+    "cancel_all_orders": "order",
+    "place_batch_order": "order",
+    "amend_batch_order": "order",
+    "cancel_batch_order": "order",
+    "get_open_orders": "order",
+    "get_positions": "position",
+    "set_leverage": "position",
+    "set_trading_stop": "position",
+    "get_wallet_balance": "account",
+}
+# Calls that change state are never merged with each other
+MUTATING_PREFIXES = ("place_", "amend_", "cancel_", "set_")
+RATE_LIMIT_CODES = {403, 429, 10006, 10018}
+ORDER, MARKET = 0, 1  # priorities, lower first
+
+
+class RateLimited(Exception):
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """Refills `rate` tokens per second up to `burst`; take() blocks until one is free.
+
+    Callers waiting with a lower priority number are served first, so order
+    traffic is never starved by market-data polling.
+    """
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.waiting = Counter()
+        self.cond = threading.Condition()
+
+    def _refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def take(self, priority=MARKET):
+        """Take one token; returns the seconds spent waiting for it."""
+        start = time.monotonic()
+        with self.cond:
+            self.waiting[priority] += 1
+            try:
+                while True:
+                    now = time.monotonic()
+                    self._refill(now)
+                    ahead = any(self.waiting[p] for p in self.waiting if p < priority)
+                    if now >= self.blocked_until and self.tokens >= 1 and not ahead:
+                        self.tokens -= 1
+                        return now - start
+                    wait = max(self.blocked_until - now, (1 - self.tokens) / self.rate, 0.001)
+                    self.cond.wait(wait)
+            finally:
+                self.waiting[priority] -= 1
+                self.cond.notify_all()
+
+    def block(self, seconds):
+        """Hand out nothing for `seconds` after the exchange said we went too fast."""
+        with self.cond:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+            self.tokens = 0.0
+
+
+def backoff_delay(attempt, base=0.25, cap=8.0):
+    """Full-jitter exponential backoff."""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+def is_rate_limit(err):
+    if isinstance(err, RateLimited):
+        return True
+    # pybit errors carry the HTTP status or the API retCode as status_code
+    return getattr(err, "status_code", None) in RATE_LIMIT_CODES
+
+
+def is_transient(err):
+    return isinstance(err, (requests.ConnectionError, requests.Timeout))
+
+
+def _hashable(key):
+    """`key` if it can identify an in-flight call, else None (no merging)."""
+    try:
+        hash(key)
+    except TypeError:
+        return None
+    return key
+
+
+class RequestGovernor:
+    """Single gate for every REST call the apps make.
+
+    Each call takes a token from its endpoint group's bucket and from the
+    shared per-IP bucket, identical read calls already in flight are merged
+    into one, and rate-limit or connection failures are retried with jittered
+    exponential backoff. A rate-limit answer also pauses the group for
+    everyone, not just the caller that hit it. Orders get priority on the
+    shared bucket and are retried only when the exchange rejected them
+    outright, never after a timeout, so an order is never sent twice.
+    """
+
+    def __init__(self, groups=GROUP_LIMITS, ip_limit=IP_LIMIT, max_retries=4):
+        self.buckets = {name: TokenBucket(*limit) for name, limit in groups.items()}
+        self.ip = TokenBucket(*ip_limit)
+        self.max_retries = max_retries
+        self.stats = Counter()
+        self._in_flight = {}
+        self._lock = threading.Lock()
+
+    def call(self, group, fn, *args, key=None, priority=MARKET, **kwargs):
+        """Run fn(*args, **kwargs) under the group's limits; `key` enables merging."""
+        if key is not None:
+            with self._lock:
+                shared = self._in_flight.get(key)
+                if shared is None:
+                    shared = self._in_flight[key] = Future()
+                    owner = True
+                else:
+                    owner = False
+            if not owner:
+                self.stats["merged"] += 1
+                return shared.result()
+            try:
+                result = self._call(group, fn, args, kwargs, priority)
+            except BaseException as e:
+                shared.set_exception(e)
+                raise
+            else:
+                shared.set_result(result)
+                return result
+            finally:
+                with self._lock:
+                    self._in_flight.pop(key, None)
+        return self._call(group, fn, args, kwargs, priority)
+
+    def _call(self, group, fn, args, kwargs, priority):
+        bucket = self.buckets[group]
+        for attempt in range(self.max_retries + 1):
+            waited = bucket.take(priority) + self.ip.take(priority)
+            self.stats["calls"] += 1
+            if waited > 0.01:
+                self.stats["throttled"] += 1
+            try:
+                return fn(*args, **kwargs)
+            except Exception as e:
+                limited = is_rate_limit(e)
+                retry = limited or (is_transient(e) and group != "order")
+                if not retry or attempt == self.max_retries:
+                    raise
+                delay = backoff_delay(attempt)
+                if limited:
+                    delay = max(delay, getattr(e, "retry_after", None) or 0)
+                    bucket.block(delay)
+                    self.stats["rate_limited"] += 1
+                self.stats["retries"] += 1
+                print(f"Warning: {group} request failed ({e}), retry {attempt + 1} in {delay:.2f}s")
+                time.sleep(delay)
+
+
+class GovernedHTTP:
+    """requests.Session stand-in whose get() goes through the governor.
+
+    Market GETs with the same URL and params share one request. Bybit's
+    limit headers are checked on every response so the bucket pauses before
+    the exchange starts rejecting.
+    """
+
+    def __init__(self, session, governor, group="market"):
+        self.session = session
+        self.governor = governor
+        self.group = group
+
+    def get(self, url, params=None, **kwargs):
+        key = _hashable(("GET", url, tuple(sorted((params or {}).items()))))
+        return self.governor.call(self.group, self._get, url, params, key=key, **kwargs)
+
+    def _get(self, url, params, **kwargs):
+        response = self.session.get(url, params=params, **kwargs)
+        if response.status_code in RATE_LIMIT_CODES:
+            raise RateLimited(f"HTTP {response.status_code} from {url}", self._reset_in(response))
+        if response.headers.get("X-Bapi-Limit-Status") == "0":
+            self.governor.buckets[self.group].block(self._reset_in(response) or 1.0)
+        return response
+
+    @staticmethod
+    def _reset_in(response):
+        reset = response.headers.get("X-Bapi-Limit-Reset-Timestamp")
+        return max(0.0, int(reset) / 1000 - time.time()) if reset else None
+
+    def __getattr__(self, name):
+        return getattr(self.session, name)
+
+
+class GovernedSession:
+    """Wraps a pybit HTTP session so every method call goes through the governor."""
+
+    def __init__(self, session, governor):
+        self.session = session
+        self.governor = governor
+
+    def __getattr__(self, name):
+        method = getattr(self.session, name)
+        if not callable(method):
+            return method
+        group = PYBIT_GROUPS.get(name, "market")
+        priority = ORDER if group == "order" else MARKET
+        mutating = name.startswith(MUTATING_PREFIXES)
+
+        def governed(*args, **kwargs):
+            key = None if mutating else _hashable((name, args, tuple(sorted(kwargs.items()))))
+            return self.governor.call(group, method, *args, key=key, priority=priority, **kwargs)
+
+        return governed
+
+
+# One governor per process, shared by every session wrapped with it
+governor = RequestGovernor()
@@ -0,0 +1,409 @@
+import math
+from abc import ABC, abstractmethod
+from collections import deque
+import numpy as np
+import pandas as pd
+
+DAY_MS = 86_400_000
+
+
+class Indicator(ABC):
+    """Base for indicators that keep O(1) rolling state.
+
+    The state always covers the closed candles only. step(row) returns the
+    values for the still-open last candle without changing that state, so
+    the same candle can be updated any number of times; commit(row) folds a
+    closed candle into the state. batch(cols) computes a whole history at
+    once with vectorized code and leaves the state as if every candle but
+    the last had been committed.
+    """
+
+    panel = "price"  # "price" (ax1), "volume" (ax2) or "lower" (second scale on ax2)
+    columns = ()
+
+    @abstractmethod
+    def step(self, row):
+        ...
+
+    @abstractmethod
+    def commit(self, row):
+        ...
+
+    @abstractmethod
+    def batch(self, cols):
+        ...
+
+
+class SMA(Indicator):
+    def __init__(self, n=20, source="close", min_periods=None):
+        self.n = n
+        self.source = source
+        self.min_periods = n if min_periods is None else min_periods
+        self.columns = (f"sma{n}",) if source == "close" else (f"{source}_sma{n}",)
+        self._reset([])
+
+    def _reset(self, closed):
+        self.buf = deque(closed, maxlen=self.n - 1)
+        self.total = float(sum(self.buf))
+        self.commits = 0
+
+    def _mean(self, x):
+        count = len(self.buf) + 1
+        return (self.total + x) / count if count >= self.min_periods else math.nan
+
+    def step(self, row):
+        return (self._mean(row[self.source]),)
+
+    def commit(self, row):
+        x = row[self.source]
+        if self.n == 1:
+            return
+        if len(self.buf) == self.buf.maxlen:
+            self.total -= self.buf[0]
+        self.buf.append(x)
+        self.total += x
+        self.commits += 1
+        if self.commits >= self.n:
+            # Resum now and then so floating-point drift cannot build up
+            self.total = float(sum(self.buf))
+            self.commits = 0
+
+    def batch(self, cols):
+        x = cols[self.source]
+        values = pd.Series(x).rolling(self.n, min_periods=self.min_periods).mean().to_numpy()
+        self._reset(x[-self.n:-1] if self.n > 1 else [])
+        return (values,)
+
+
+class VolumeThreshold(SMA):
+    """The chart's volume threshold: `factor` times the mean volume of the last `window` candles."""
+
+    panel = "volume"
+
+    def __init__(self, window=50, factor=1.1):
+        super().__init__(window, source="volume", min_periods=1)
+        self.factor = factor
+        self.columns = ("volume_threshold",)
+
+    def step(self, row):
+        return (self._mean(row["volume"]) * self.factor,)
+
+    def batch(self, cols):
+        return (super().batch(cols)[0] * self.factor,)
+
+
+class EMA(Indicator):
+    def __init__(self, n=20, source="close"):
+        self.n = n
+        self.source = source
+        self.alpha = 2 / (n + 1)
+        self.columns = (f"ema{n}",)
+        self.value = None
+
+    def next(self, x):
+        return x if self.value is None else self.value + self.alpha * (x - self.value)
+
+    def step(self, row):
+        return (self.next(row[self.source]),)
+
+    def commit(self, row):
+        self.value = self.next(row[self.source])
+
+    def series(self, x):
+        values = pd.Series(x).ewm(alpha=self.alpha, adjust=False).mean().to_numpy()
+        self.value = _closed(values)
+        return values
+
+    def batch(self, cols):
+        return (self.series(cols[self.source]),)
+
+
+class RSI(Indicator):
+    """Wilder's RSI."""
+
+    panel = "lower"
+
+    def __init__(self, n=14):
+        self.n = n
+        self.columns = (f"rsi{n}",)
+        self.prev = None
+        self.gain = None
+        self.loss = None
+
+    def _next(self, close):
+        if self.prev is None:
+            return None, None
+        change = close - self.prev
+        gain, loss = max(change, 0.0), max(-change, 0.0)
+        if self.gain is None:
+            return gain, loss
+        return self.gain + (gain - self.gain) / self.n, self.loss + (loss - self.loss) / self.n
+
+    def step(self, row):
+        gain, loss = self._next(row["close"])
+        if gain is None:
+            return (math.nan,)
+        return (_rsi(gain, loss),)
+
+    def commit(self, row):
+        self.gain, self.loss = self._next(row["close"])
+        self.prev = row["close"]
+
+    def batch(self, cols):
+        close = cols["close"]
+        change = pd.Series(close).diff()
+        gain = change.clip(lower=0).ewm(alpha=1 / self.n, adjust=False).mean().to_numpy()
+        loss = (-change).clip(lower=0).ewm(alpha=1 / self.n, adjust=False).mean().to_numpy()
+        with np.errstate(divide="ignore", invalid="ignore"):
+            values = np.where(loss == 0, np.where(gain == 0, 50.0, 100.0), 100 - 100 / (1 + gain / loss))
+        values[np.isnan(gain)] = np.nan
+        self.prev = _closed(close)
+        self.gain, self.loss = _closed(gain), _closed(loss)
+        return (values,)
+
+
+class MACD(Indicator):
+    panel = "lower"
+
+    def __init__(self, fast=12, slow=26, signal=9):
+        self.fast, self.slow, self.signal = EMA(fast), EMA(slow), EMA(signal)
+        self.columns = ("macd", "macd_signal", "macd_hist")
+
+    def step(self, row):
+        line = self.fast.next(row["close"]) - self.slow.next(row["close"])
+        signal = self.signal.next(line)
+        return line, signal, line - signal
+
+    def commit(self, row):
+        line = self.fast.next(row["close"]) - self.slow.next(row["close"])
+        self.signal.value = self.signal.next(line)
+        self.fast.commit(row)
+        self.slow.commit(row)
+
+    def batch(self, cols):
+        close = cols["close"]
+        line = self.fast.series(close) - self.slow.series(close)
+        signal = self.signal.series(line)
+        return line, signal, line - signal
+
+
+class Bollinger(Indicator):
+    def __init__(self, n=20, k=2.0):
+        self.n = n
+        self.k = k
+        self.columns = (f"bb{n}_mid", f"bb{n}_upper", f"bb{n}_lower")
+        self._reset([])
+
+    def _reset(self, closed):
+        self.buf = deque(closed, maxlen=self.n - 1)
+        self.total = float(sum(self.buf))
+        self.squares = float(sum(x * x for x in self.buf))
+        self.commits = 0
+
+    def step(self, row):
+        x = row["close"]
+        if len(self.buf) < self.n - 1:
+            return math.nan, math.nan, math.nan
+        mean = (self.total + x) / self.n
+        std = math.sqrt(max((self.squares + x * x) / self.n - mean * mean, 0.0))
+        return mean, mean + self.k * std, mean - self.k * std
+
+    def commit(self, row):
+        x = row["close"]
+        if len(self.buf) == self.buf.maxlen:
+            old = self.buf[0]
+            self.total -= old
+            self.squares -= old * old
+        self.buf.append(x)
+        self.total += x
+        self.squares += x * x
+        self.commits += 1
+        if self.commits >= self.n:
+            self._reset(self.buf)
+
+    def batch(self, cols):
+        close = pd.Series(cols["close"])
+        rolling = close.rolling(self.n)
+        mean = rolling.mean().to_numpy()
+        std = rolling.std(ddof=0).to_numpy()
+        self._reset(cols["close"][-self.n:-1])
+        return mean, mean + self.k * std, mean - self.k * std
+
+
+class VWAP(Indicator):
+    """Volume-weighted average of the typical price, restarting every UTC day."""
+
+    columns = ("vwap",)
+
+    def __init__(self):
+        self.day = None
+        self.pv = 0.0
+        self.volume = 0.0
+
+    def _next(self, row):
+        typical = (row["high"] + row["low"] + row["close"]) / 3
+        day = row["timestamp"] // DAY_MS
+        if day != self.day:
+            return day, typical * row["volume"], row["volume"], typical
+        return day, self.pv + typical * row["volume"], self.volume + row["volume"], typical
+
+    def step(self, row):
+        _, pv, volume, typical = self._next(row)
+        return (pv / volume if volume else typical,)
+
+    def commit(self, row):
+        self.day, self.pv, self.volume, _ = self._next(row)
+
+    def batch(self, cols):
+        typical = (cols["high"] + cols["low"] + cols["close"]) / 3
+        day = cols["timestamp"] // DAY_MS
+        pv = pd.Series(typical * cols["volume"]).groupby(day).cumsum().to_numpy()
+        volume = pd.Series(cols["volume"]).groupby(day).cumsum().to_numpy()
+        with np.errstate(divide="ignore", invalid="ignore"):
+            values = np.where(volume > 0, pv / volume, typical)
+        if len(day) > 1:
+            self.day, self.pv, self.volume = int(day[-2]), float(pv[-2]), float(volume[-2])
+        else:
+            self.day, self.pv, self.volume = None, 0.0, 0.0
+        return (values,)
+
+
+class ATR(Indicator):
+    """Wilder's average true range."""
+
+    panel = "lower"
+
+    def __init__(self, n=14):
+        self.n = n
+        self.columns = (f"atr{n}",)
+        self.prev = None
+        self.value = None
+
+    def _next(self, row):
+        high, low = row["high"], row["low"]
+        tr = high - low if self.prev is None else max(high - low, abs(high - self.prev), abs(low - self.prev))
+        return tr if self.value is None else self.value + (tr - self.value) / self.n
+
+    def step(self, row):
+        return (self._next(row),)
+
+    def commit(self, row):
+        self.value = self._next(row)
+        self.prev = row["close"]
+
+    def batch(self, cols):
+        high, low, close = cols["high"], cols["low"], cols["close"]
+        prev = np.r_[np.nan, close[:-1]]
+        tr = np.fmax(high - low, np.fmax(np.abs(high - prev), np.abs(low - prev)))
+        values = pd.Series(tr).ewm(alpha=1 / self.n, adjust=False).mean().to_numpy()
+        self.prev = _closed(close)
+        self.value = _closed(values)
+        return (values,)
+
+
+def _closed(values):
+    """Value at the last closed candle (second to last), or None."""
+    if len(values) < 2 or np.isnan(values[-2]):
+        return None
+    return float(values[-2])
+
+
+def _rsi(gain, loss):
+    if loss == 0:
+        return 50.0 if gain == 0 else 100.0
+    return 100 - 100 / (1 + gain / loss)
+
+
+def default_indicators():
+    return [
+        EMA(20), SMA(50), Bollinger(20, 2.0), VWAP(),
+        RSI(14), MACD(), ATR(14), VolumeThreshold(50),
+    ]
+
+
+class IndicatorEngine:
+    """Indicator values for one candle series, kept in step with it incrementally.
+
+    update(df) compares the frame with the last one it saw: a changed last
+    candle costs one step() per indicator, a few new candles one commit() and
+    step() each, and anything else (first call, older history loaded, a gap)
+    one vectorized batch() over the whole frame.
+    """
+
+    def __init__(self, indicators=None, max_length=2000, max_steps=5):
+        self.indicators = default_indicators() if indicators is None else indicators
+        self.columns = [col for ind in self.indicators for col in ind.columns]
+        self.panels = {col: ind.panel for ind in self.indicators for col in ind.columns}
+        self.max_length = max_length
+        self.max_steps = max_steps
+        self.values = {col: [] for col in self.columns}
+        self.first = None
+        self.last = None
+
+    def update(self, df):
+        if df.empty:
+            return self
+        index = df.index
+        first, last = index[0], index[-1]
+        pos = int(index.searchsorted(self.last)) if self.last is not None else len(index)
+        if (pos >= len(index) or index[pos] != self.last or first < self.first
+                or len(index) - 1 - pos > self.max_steps):
+            self._batch(df)
+        else:
+            # Only the rows from the previously open candle on are converted
+            self._advance(df.iloc[pos:])
+        self.first, self.last = first, last
+        return self
+
+    def tail(self, n):
+        """Each column's last n values as arrays, aligned with the frame's last n rows."""
+        return {col: np.array(values[-n:], dtype=float) for col, values in self.values.items()}
+
+    def latest(self):
+        return {col: values[-1] if values else math.nan for col, values in self.values.items()}
+
+    def _batch(self, df):
+        cols = _columns(df)
+        for ind in self.indicators:
+            for col, values in zip(ind.columns, ind.batch(cols)):
+                self.values[col] = values[-self.max_length:].tolist()
+
+    def _advance(self, new):
+        names = list(new.columns)
+        values = new.to_numpy(dtype=float)
+        rows = [_row(names, row, timestamp) for row, timestamp in zip(values, _timestamps(new.index))]
+        # The previously open candle may have changed before closing
+        self._set_last(rows[0])
+        for closed, row in zip(rows, rows[1:]):
+            for ind in self.indicators:
+                ind.commit(closed)
+            self._append(row)
+        if len(self.values[self.columns[0]]) > 2 * self.max_length:
+            for col in self.columns:
+                del self.values[col][:-self.max_length]
+
+    def _set_last(self, row):
+        for ind in self.indicators:
+            for col, value in zip(ind.columns, ind.step(row)):
+                self.values[col][-1] = value
+
+    def _append(self, row):
+        for ind in self.indicators:
+            for col, value in zip(ind.columns, ind.step(row)):
+                self.values[col].append(value)
+
+
+def _timestamps(index):
+    return (index if index.unit == "ms" else index.as_unit("ms")).asi8
+
+
+def _columns(df):
+    cols = {name: df[name].to_numpy(dtype=float) for name in ("open", "high", "low", "close", "volume")}
+    cols["timestamp"] = _timestamps(df.index)
+    return cols
+
+
+def _row(names, values, timestamp):
+    row = dict(zip(names, values.tolist()))
+    row["timestamp"] = int(timestamp)
+    return row
@@ -0,0 +1,143 @@
+import json
+import os
+import threading
+import time
+from collections import namedtuple
+
+CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "candle_data", "instruments.json")
+
+Instrument = namedtuple("Instrument", [
+    "symbol", "tick_size", "qty_step", "price_precision", "qty_precision",
+    "max_leverage", "min_order_qty"
+])
+
+
+def decimals(step):
+    """Number of significant decimals in a step string such as '0.010'."""
+    return len(step.split('.')[1].rstrip('0')) if '.' in step else 0
+
+
+def parse_instrument(item):
+    tick_size = item['priceFilter']['tickSize']
+    qty_step = item['lotSizeFilter']['qtyStep']
+    return Instrument(
+        symbol=item['symbol'],
+        tick_size=float(tick_size),
+        qty_step=float(qty_step),
+        price_precision=decimals(tick_size),
+        qty_precision=decimals(qty_step),
+        max_leverage=int(float(item['leverageFilter']['maxLeverage'])),
+        min_order_qty=float(item['lotSizeFilter']['minOrderQty'])
+    )
+
+
+class InstrumentRegistry:
+    """All linear instruments, loaded in bulk and refreshed every `ttl` seconds.
+
+    Lookups never wait on the network once the first load has succeeded: a
+    stale registry keeps serving its data while a background thread reloads.
+    Every load is saved to `cache_path`, and load_cached() serves the last
+    run's instruments (as stale) so the apps can start without a request.
+    `session` may be None until the apps have created one; meanwhile
+    lookups are served from the cache only.
+    """
+
+    def __init__(self, session, ttl=600, category='linear', cache_path=CACHE_PATH):
+        self.session = session
+        self.ttl = ttl
+        self.category = category
+        self.cache_path = cache_path
+        self._instruments = {}
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+        self._refreshing = False
+
+    def load(self):
+        """Fetch every instrument in the category, following pagination."""
+        instruments = {}
+        cursor = None
+        while True:
+            params = {'category': self.category, 'limit': 1000}
+            if cursor:
+                params['cursor'] = cursor
+            result = self.session.get_instruments_info(**params)['result']
+            for item in result['list']:
+                instruments[item['symbol']] = parse_instrument(item)
+            cursor = result.get('nextPageCursor')
+            if not cursor:
+                break
+        with self._lock:
+            self._instruments = instruments
+            self._loaded_at = time.monotonic()
+        self._save(instruments)
+        return instruments
+
+    def load_cached(self):
+        """Serve the instruments saved by the last load; returns False if there are none."""
+        if not self.cache_path or not os.path.exists(self.cache_path):
+            return False
+        try:
+            with open(self.cache_path) as f:
+                cached = {item[0]: Instrument(*item) for item in json.load(f)}
+        except (OSError, ValueError, TypeError) as err:
+            print(f"Error reading instrument cache: {err}")
+            return False
+        with self._lock:
+            if not self._instruments:
+                self._instruments = cached  # _loaded_at stays 0, so the first lookup refreshes
+        return bool(cached)
+
+    def _save(self, instruments):
+        if not self.cache_path:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+            tmp = self.cache_path + ".tmp"
+            with open(tmp, "w") as f:
+                json.dump(list(instruments.values()), f)
+            os.replace(tmp, self.cache_path)
+        except OSError as err:
+            print(f"Error saving instrument cache: {err}")
+
+    def _refresh_in_background(self):
+        def run():
+            try:
+                self.load()
+            except Exception as err:
+                print(f"Error refreshing instruments: {err}")
+            finally:
+                self._refreshing = False
+
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+        threading.Thread(target=run, daemon=True).start()
+
+    def _current(self):
+        if self.session is None:
+            if not self._instruments:
+                raise RuntimeError("Instruments are not loaded yet and there is no session to load them")
+            return self._instruments  # Refreshed once the session is set
+        if not self._instruments:
+            return self.load()
+        if time.monotonic() - self._loaded_at > self.ttl:
+            self._refresh_in_background()
+        return self._instruments
+
+    def get(self, symbol):
+        instruments = self._current()
+        if symbol not in instruments:
+            raise KeyError(f"Unknown symbol: {symbol}")
+        return instruments[symbol]
+
+    def peek(self, symbol):
+        """The instrument if it is already known, else None; never touches the network."""
+        return self._instruments.get(symbol)
+
+    def known_symbols(self):
+        """Symbols already loaded or cached; never touches the network."""
+        return list(self._instruments)
+
+    def symbols(self):
+        return list(self._current())
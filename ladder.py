@@ -0,0 +1,153 @@
+import tkinter as tk
+import numpy as np
+
+ASK_COLOR = 'red'
+BID_COLOR = 'green'
+ASK_BAR_COLOR = '#f8d7d7'
+BID_BAR_COLOR = '#d5efd9'
+
+
+class LadderView:
+    """Order book ladder drawn on a single canvas.
+
+    Every level owns a depth bar and three text items (price, qty, total).
+    render() compares the new levels with what is on screen and only touches
+    the items whose value changed, so deep books can refresh many times a
+    second. Asks sit above the mid/spread band, bids below it.
+    """
+
+    def __init__(self, parent, depth=10, visible_levels=20, width=330, row_height=16, font=("Arial", 10)):
+        self.depth = depth
+        self.row_height = row_height
+        self.width = width
+        self.font = font
+        self.mid_height = 2 * row_height
+        total_height = 2 * depth * row_height + self.mid_height
+        visible_height = min(total_height, 2 * visible_levels * row_height + self.mid_height)
+        self.canvas = tk.Canvas(parent, width=width, height=visible_height, highlightthickness=0,
+                                scrollregion=(0, 0, width, total_height))
+        self.canvas.bind("<MouseWheel>", lambda e: self.canvas.yview_scroll(-1 if e.delta > 0 else 1, "units"))
+        self.canvas.bind("<Button-4>", lambda e: self.canvas.yview_scroll(-1, "units"))
+        self.canvas.bind("<Button-5>", lambda e: self.canvas.yview_scroll(1, "units"))
+
+        self._rows = {}
+        self._shown = {}
+        for side, color, bar_color in (('ask', ASK_COLOR, ASK_BAR_COLOR), ('bid', BID_COLOR, BID_BAR_COLOR)):
+            rows = []
+            for i in range(depth):
+                y = self._row_y(side, i)
+                bar = self.canvas.create_rectangle(width, y, width, y + row_height, fill=bar_color, width=0)
+                texts = [
+                    self.canvas.create_text(x, y + row_height / 2, anchor='e', text="", fill=color, font=font)
+                    for x in (width * 0.32, width * 0.64, width * 0.97)
+                ]
+                rows.append((bar, texts))
+            self._rows[side] = rows
+            empty = np.full(depth, np.nan)
+            self._shown[side] = [empty.copy(), empty.copy(), empty.copy(), np.zeros(depth)]
+        self._summary = self.canvas.create_text(
+            width / 2, depth * row_height + self.mid_height / 2, text="", font=(font[0], 12)
+        )
+        self._summary_text = ""
+        # Start scrolled so the touch is in the middle of the view
+        self.canvas.yview_moveto(max(0, (total_height - visible_height) / 2) / total_height)
+
+    def pack(self, **kwargs):
+        self.canvas.pack(**kwargs)
+
+    def _row_y(self, side, i):
+        if side == 'ask':
+            return (self.depth - 1 - i) * self.row_height
+        return self.depth * self.row_height + self.mid_height + i * self.row_height
+
+    def render(self, asks, bids, price_precision, qty_precision=4, summary=""):
+        """Draw (prices, sizes, totals) arrays for each side, best level first."""
+        max_total = max(asks[2][-1] if len(asks[2]) else 0, bids[2][-1] if len(bids[2]) else 0)
+        scale = self.width / max_total if max_total else 0
+        formats = (f"{{:.{price_precision}f}}", f"{{:.{qty_precision}f}}", f"{{:.{qty_precision}f}}")
+        self._render_side('ask', asks, scale, formats)
+        self._render_side('bid', bids, scale, formats)
+        if summary != self._summary_text:
+            self.canvas.itemconfigure(self._summary, text=summary)
+            self._summary_text = summary
+
+    def _render_side(self, side, levels, scale, formats):
+        rows = self._rows[side]
+        shown = self._shown[side]
+        for col in range(3):
+            new = np.full(self.depth, np.nan)
+            values = levels[col][:self.depth]
+            new[:len(values)] = values
+            old = shown[col]
+            changed = np.flatnonzero((new != old) & ~(np.isnan(new) & np.isnan(old)))
+            for i in changed:
+                text = "" if np.isnan(new[i]) else formats[col].format(new[i])
+                self.canvas.itemconfigure(rows[i][1][col], text=text)
+            shown[col] = new
+        widths = np.nan_to_num(shown[2] * scale).round()
+        for i in np.flatnonzero(widths != shown[3]):
+            y = self._row_y(side, i)
+            self.canvas.coords(rows[i][0], self.width - widths[i], y, self.width, y + self.row_height)
+        shown[3] = widths
+
+
+class LadderPane:
+    """Header plus LadderView for one symbol, fed by a MarketHub book subscription.
+
+    The pane can be built before the hub exists; nothing is drawn until
+    subscribe(hub) is called.
+    """
+
+    def __init__(self, parent, instruments, symbol, levels=50, visible_levels=10, qty_precision=4):
+        self.instruments = instruments
+        self.levels = levels
+        self.qty_precision = qty_precision
+        self.hub = None
+        self.sub = None
+        self.frame = tk.Frame(parent)
+        self.header = tk.Label(self.frame, font=("Arial", 10, "bold"))
+        self.header.pack(side=tk.TOP)
+        self.ladder = LadderView(self.frame, depth=levels, visible_levels=visible_levels)
+        self.ladder.pack(side=tk.TOP)
+        self.set_symbol(symbol)
+
+    def pack(self, **kwargs):
+        self.frame.pack(**kwargs)
+
+    def grid(self, **kwargs):
+        self.frame.grid(**kwargs)
+
+    def subscribe(self, hub):
+        self.hub = hub
+        self.set_symbol(self.symbol)
+
+    def set_symbol(self, symbol):
+        self.symbol = symbol
+        base_currency = symbol.replace('USDT', '')
+        self.header.config(text=f"Price (USDT)    Qty ({base_currency})    Total ({base_currency})")
+        if self.hub is None:
+            return
+        old = self.sub
+        self.sub = self.hub.book(symbol, self.levels, self.render)
+        if old is not None:
+            old.close()
+        self.sub.refresh()
+
+    def render(self, book):
+        info = self.instruments.peek(self.symbol)
+        price_precision = info.price_precision if info else 0
+        with book.lock:
+            asks = book.asks.top(self.levels)
+            bids = book.bids.top(self.levels)
+            mid_price, spread, imbalance = book.mid(), book.spread(), book.imbalance(self.levels)
+
+        if mid_price is not None:
+            summary = f"Mid Price: {mid_price:.{price_precision}f}\nSpread: {spread:.{price_precision}f}    Imbalance: {imbalance:+.2f}"
+        else:
+            summary = "Mid Price: N/A"
+        self.ladder.render(asks, bids, price_precision, self.qty_precision, summary)
+
+    def close(self):
+        if self.sub is not None:
+            self.sub.close()
+        self.frame.destroy()
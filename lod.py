@@ -0,0 +1,200 @@
+"""Level-of-detail summaries for drawing long candle histories.
+
+A CandlePyramid keeps the candles (level 0) plus a stack of coarser levels,
+each merging pairs of rows from the level below into one OHLCV bucket. A
+view over any range reads from the coarsest level that still has at least
+one bucket per few pixels, so drawing costs O(screen width) whatever the
+number of candles in the range.
+"""
+import numpy as np
+
+T, O, H, L, C, V = range(6)
+COLUMNS = ("open", "high", "low", "close", "volume")
+
+
+def frame_rows(df):
+    """(n, 6) float rows of timestamp (ms), open, high, low, close, volume."""
+    rows = np.empty((len(df), 6))
+    if len(df):
+        rows[:, T] = df.index.as_unit('ms').asi8
+        for i, column in enumerate(COLUMNS, start=1):
+            rows[:, i] = df[column].to_numpy(dtype=float)
+    return rows
+
+
+def merge_pairs(rows, odd=False):
+    """One level up: rows 2j and 2j+1 merged into bucket j.
+
+    With `odd`, the first row is the second of its pair and is a bucket on its own.
+    """
+    pairs = np.arange(-1 if odd else 0, len(rows), 2)
+    starts = np.maximum(pairs, 0)
+    ends = np.minimum(pairs + 1, len(rows) - 1)
+    out = np.empty((len(starts), 6))
+    out[:, T] = rows[starts, T]
+    out[:, O] = rows[starts, O]
+    out[:, H] = np.maximum(rows[starts, H], rows[ends, H])
+    out[:, L] = np.minimum(rows[starts, L], rows[ends, L])
+    out[:, C] = rows[ends, C]
+    out[:, V] = np.add.reduceat(rows[:, V], starts)
+    return out
+
+
+class Level:
+    """Rows of one resolution in a buffer that grows by doubling at either end."""
+
+    def __init__(self, rows):
+        self.buffer = rows
+        self.start = 0
+        self.n = len(rows)
+
+    @property
+    def rows(self):
+        return self.buffer[self.start:self.start + self.n]
+
+    def set(self, i, row):
+        if self.start + i >= len(self.buffer):
+            grown = np.empty((self.start + max(16, 2 * self.n), 6))
+            grown[self.start:self.start + self.n] = self.rows
+            self.buffer = grown
+        self.buffer[self.start + i] = row
+        self.n = max(self.n, i + 1)
+
+    def prepend(self, rows):
+        m = len(rows)
+        if m > self.start:
+            room = max(16, m, self.n)
+            grown = np.empty((room + len(self.buffer) - self.start, 6))
+            grown[room:room + self.n] = self.rows
+            self.buffer, self.start = grown, room
+        self.start -= m
+        self.buffer[self.start:self.start + m] = rows
+        self.n += m
+
+
+class CandlePyramid:
+    """Multi-resolution OHLCV summaries over a candle history.
+
+    Level k holds buckets of 2**k candles. Buckets are aligned to a position
+    `origin` candles before the first one (0 after build()), so older
+    candles can be added in front without moving any pair boundary.
+    build() is O(n); updating the last candle or appending one touches one
+    row per level, O(log n); prepending m older candles is O(m + log n).
+    """
+
+    def __init__(self, rows=None):
+        self.levels = []
+        self.build(np.empty((0, 6)) if rows is None else rows)
+
+    def __len__(self):
+        return self.levels[0].n
+
+    def build(self, rows):
+        self.origin = 0
+        self.levels = [Level(np.array(rows, dtype=float).reshape(-1, 6))]
+        self._grow_top()
+
+    def _grow_top(self):
+        """Add levels until the top one is a single bucket."""
+        while self.levels[-1].n > 1:
+            k = len(self.levels)
+            odd = bool((self.origin >> (k - 1)) & 1)
+            self.levels.append(Level(merge_pairs(self.levels[-1].rows, odd)))
+
+    @property
+    def timestamps(self):
+        return self.levels[0].rows[:, T]
+
+    def first_timestamp(self):
+        return self.levels[0].rows[0, T] if len(self) else None
+
+    def last_timestamp(self):
+        return self.levels[0].rows[-1, T] if len(self) else None
+
+    def update(self, rows):
+        """Merge rows at or after the last candle; False if they leave a gap or start earlier."""
+        if not len(rows):
+            return True
+        if not len(self):
+            self.build(rows)
+            return True
+        last = self.last_timestamp()
+        rows = rows[rows[:, T] >= last]
+        if not len(rows) or rows[0, T] != last:
+            return not len(rows)  # Newer rows that do not overlap: a gap
+        for row in rows:
+            i = len(self) - 1 if row[T] == self.last_timestamp() else len(self)
+            self._set(i, row)
+        return True
+
+    def prepend(self, rows):
+        """Add older candles in front of the first one.
+
+        A row at the first candle's timestamp replaces it (older minutes can
+        complete a resampled candle); rows after it are ignored.
+        """
+        rows = np.asarray(rows, dtype=float).reshape(-1, 6)
+        if not len(self):
+            self.build(rows)
+            return
+        first = self.first_timestamp()
+        if len(rows) and rows[-1, T] >= first:
+            at = np.searchsorted(rows[:, T], first)
+            if at < len(rows) and rows[at, T] == first:
+                self._set(0, rows[at])
+            rows = rows[:at]
+        m = len(rows)
+        if not m:
+            return
+        old = self.origin
+        if m > old:
+            # Move the origin by a multiple of every level's bucket size: no pair changes
+            size = 1 << len(self.levels)
+            old = self.origin = old + -(-(m - old) // size) * size
+        self.origin = old - m
+        self.levels[0].prepend(rows)
+        for k in range(1, len(self.levels)):
+            below, level = self.levels[k - 1], self.levels[k]
+            # The new buckets and the old first one, which may now have both rows of its pair
+            end = min(2 * ((old >> k) + 1) - (self.origin >> (k - 1)), below.n)
+            front = merge_pairs(below.rows[:end], bool((self.origin >> (k - 1)) & 1))
+            level.prepend(front[:-1])
+            level.set(len(front) - 1, front[-1])
+        self._grow_top()
+
+    def _set(self, i, row):
+        self.levels[0].set(i, row)
+        b = self.origin + i
+        for k in range(1, len(self.levels)):
+            below = self.levels[k - 1]
+            b >>= 1
+            j = 2 * b - (self.origin >> (k - 1))  # Rows j and j + 1 below make bucket b
+            first = below.rows[max(j, 0)]
+            if 0 <= j and j + 1 < below.n:
+                second = below.rows[j + 1]
+                row = (first[T], first[O], max(first[H], second[H]), min(first[L], second[L]),
+                       second[C], first[V] + second[V])
+            else:
+                row = first
+            self.levels[k].set(b - (self.origin >> k), row)
+        self._grow_top()
+
+    def level_for(self, span, max_buckets):
+        """Finest level showing `span` candles in at most `max_buckets` buckets."""
+        k = 0
+        while k + 1 < len(self.levels) and -(-span // (1 << k)) > max_buckets:
+            k += 1
+        return k
+
+    def buckets(self, start, stop, max_buckets):
+        """Buckets covering candles [start, stop) and the level they came from.
+
+        Returns (k, rows, end_timestamps): rows are (m, 6) like frame_rows()
+        with m <= max_buckets + 1, and end_timestamps holds the timestamp of
+        the last candle in each bucket.
+        """
+        k = self.level_for(stop - start, max_buckets)
+        lo, hi = (self.origin + start) >> k, ((self.origin + stop - 1) >> k) + 1
+        rows = self.levels[k].rows[lo - (self.origin >> k):hi - (self.origin >> k)]
+        ends = np.minimum((np.arange(lo, hi) + 1) << k, self.origin + len(self)) - 1 - self.origin
+        return k, rows, self.timestamps[ends]
@@ -0,0 +1,279 @@
+import queue
+import threading
+from netloop import REST_URL, http
+from orderbook import OrderBook
+from parsing import loads
+from streams import kline_rows_to_records, kline_topic, orderbook_topic, ticker_topic
+
+
+def book_depth(levels):
+    """Smallest Bybit orderbook stream depth that covers `levels` per side."""
+    return 50 if levels <= 50 else 200
+
+
+def fetch_book_snapshot(symbol, limit):
+    """REST order book snapshot as a fresh OrderBook."""
+    url = f"{REST_URL}/v5/market/orderbook"
+    params = {"category": "linear", "symbol": symbol, "limit": limit}
+    response = loads(http.get(url, params=params, timeout=10).content)['result']
+    book = OrderBook()
+    book.load_snapshot(response['a'], response['b'], response.get('u'))
+    return book
+
+
+class Feed:
+    """One upstream source (a stream topic plus its REST fallback) and its consumers."""
+
+    def __init__(self, topic, kind, symbol, arg):
+        self.topic = topic
+        self.kind = kind
+        self.symbol = symbol
+        self.arg = arg  # Source interval for candles, stream depth for books
+        self.subscriptions = []
+        self.book = OrderBook() if kind == "book" else None
+        self.snapshot = None  # Last REST book, drawn while the stream is down
+
+    @property
+    def job(self):
+        return f"feed:{self.topic}"
+
+
+class Subscription:
+    """A consumer's handle on a feed; close() releases it."""
+
+    def __init__(self, hub, feed, callback, interval=None, direct=False):
+        self.hub = hub
+        self.feed = feed
+        self.callback = callback
+        self.interval = interval
+        self.direct = direct
+        self.closed = False
+
+    def refresh(self):
+        self.hub.refresh(self.feed)
+
+    def close(self):
+        if not self.closed:
+            self.closed = True
+            self.hub._release(self)
+
+
+class MarketHub:
+    """Single owner of the apps' market data, fanned out to every pane.
+
+    Consumers subscribe to candles (symbol, interval), a book (symbol, levels)
+    or tickers (symbol). Each distinct upstream source is one feed: one stream
+    topic and one REST poll job on the scheduler, reference counted and
+    dropped with its last subscriber. Timeframes resampled from 1m candles
+    share the 1m feed, and books share a feed per stream depth, so N panes on
+    the same market cost one feed, not N.
+
+    Stream messages update the shared candle cache or book on the stream
+    thread and mark the feed dirty; every `flush_ms` the Tk thread hands the
+    latest state to each subscriber, so a burst of messages is one redraw.
+    Candle frames are built once per interval and shared by its subscribers,
+    which must treat them as read-only. While the stream is not live for a
+    feed, its poll job fetches from REST instead. Ticker subscriptions are
+    called directly on the stream thread with the raw message.
+
+    history() serves the full stored history of a market, beyond what the
+    candle subscriptions carry, for panes that zoom out or pan back.
+    """
+
+    def __init__(self, root, stream, scheduler, candle_cache, streaming=True,
+                 flush_ms=50, candle_poll_ms=5000, book_poll_ms=510):
+        self.root = root
+        self.stream = stream
+        self.scheduler = scheduler
+        self.candle_cache = candle_cache
+        self.streaming = streaming
+        self.flush_ms = flush_ms
+        self.candle_poll_ms = candle_poll_ms
+        self.book_poll_ms = book_poll_ms
+        self.feeds = {}
+        self._dirty = set()
+        self._done = queue.Queue()
+        self._lock = threading.Lock()
+        self._running = True
+        root.after(flush_ms, self._flush)
+
+    def candles(self, symbol, interval, callback):
+        """callback(frame) on the Tk thread with the candles for (symbol, interval)."""
+        interval = str(interval)
+        source = self.candle_cache.source_interval(interval)
+        if not self.candle_cache.has(symbol, interval):
+            self.candle_cache.load_stored(symbol, interval)  # Draw last session's candles first
+        feed = self._feed(kline_topic(symbol, source), "kline", symbol, source)
+        sub = self._add(Subscription(self, feed, callback, interval=interval))
+        frame = self.candle_cache.local(symbol, interval)
+        if not frame.empty:
+            self.root.after(0, self._deliver, sub, frame)
+        self.refresh(feed)
+        return sub
+
+    def book(self, symbol, levels, callback):
+        """callback(book) on the Tk thread; read the OrderBook under its lock."""
+        depth = book_depth(levels)
+        feed = self._feed(orderbook_topic(symbol, depth), "book", symbol, depth)
+        return self._add(Subscription(self, feed, callback))
+
+    def ticker(self, symbol, callback):
+        """callback(message) on the stream thread for every tickers.<symbol> push."""
+        feed = self._feed(ticker_topic(symbol), "ticker", symbol, None)
+        return self._add(Subscription(self, feed, callback, direct=True))
+
+    def history(self, symbol, interval, callback, pages=0, prepare=None, before=None):
+        """callback(fetched, result) on the Tk thread with the market's stored history.
+
+        Runs on the network loop: first `pages` pages of older candles are
+        fetched into the store (`fetched` is how many, None when pages is 0),
+        then the history is read and passed through prepare(frame), if
+        given, so heavy preparation stays off the Tk thread too. With
+        `before` (ms) only the candles up to that one are read (see
+        CandleCache.stored_history), so paging back costs the new pages, not
+        the whole history. A failed load is reported and calls
+        callback(None, None).
+        """
+        def load():
+            fetched = self.candle_cache.backfill(symbol, interval, pages) if pages else None
+            frame = self.candle_cache.stored_history(symbol, interval, before=before)
+            return fetched, prepare(frame) if prepare is not None else frame
+
+        self.scheduler.network.submit(
+            load, callback=lambda result, error: self._done.put((callback, result, error))
+        )
+
+    def current_book(self, symbol):
+        """The deepest book held for `symbol`, or None; read it under its lock."""
+        feeds = [f for f in self.feeds.values() if f.kind == "book" and f.symbol == symbol]
+        return max(feeds, key=lambda f: f.arg).book if feeds else None
+
+    def is_live(self, feed):
+        return self.streaming and self.stream.is_live(feed.topic)
+
+    def refresh(self, feed=None):
+        """Poll one feed now (or every feed); live feeds skip the request."""
+        for f in [feed] if feed is not None else list(self.feeds.values()):
+            self.scheduler.request(f.job)
+
+    def stop(self):
+        self._running = False
+
+    def _feed(self, topic, kind, symbol, arg):
+        feed = self.feeds.get(topic)
+        if feed is not None:
+            return feed
+        feed = self.feeds[topic] = Feed(topic, kind, symbol, arg)
+        if self.streaming:
+            self.stream.subscribe(topic, self._on_message)
+        if kind == "kline":
+            self.scheduler.add_job(feed.job, self.candle_poll_ms, lambda _: self._poll_candles(feed),
+                                   lambda _: self._publish(feed))
+        elif kind == "book":
+            self.scheduler.add_job(feed.job, self.book_poll_ms, lambda _: self._poll_book(feed),
+                                   lambda snapshot: self._publish(feed, snapshot))
+        return feed
+
+    def _add(self, sub):
+        sub.feed.subscriptions.append(sub)
+        return sub
+
+    def _release(self, sub):
+        feed = sub.feed
+        if sub in feed.subscriptions:
+            feed.subscriptions.remove(sub)
+        if feed.subscriptions or self.feeds.get(feed.topic) is not feed:
+            return
+        del self.feeds[feed.topic]
+        self.scheduler.remove_job(feed.job)
+        if self.streaming:
+            self.stream.unsubscribe(feed.topic, self._on_message)
+        with self._lock:
+            self._dirty.discard(feed.topic)
+
+    def _poll_candles(self, feed):
+        """Scheduler job: fetch candles unless the stream keeps them current."""
+        if self.is_live(feed) and self.candle_cache.has(feed.symbol, feed.arg):
+            return None
+        self.candle_cache.get(feed.symbol, feed.arg)
+        return True
+
+    def _poll_book(self, feed):
+        """Scheduler job: a REST snapshot while the book stream is down."""
+        if self.is_live(feed):
+            return None
+        return fetch_book_snapshot(feed.symbol, feed.arg)
+
+    def _on_message(self, message):
+        """Stream callback shared by every feed."""
+        topic = message['topic']
+        feed = self.feeds.get(topic)
+        if feed is None:
+            return
+        if feed.kind == "kline":
+            _, interval, symbol = topic.split('.', 2)
+            if not self.candle_cache.apply_stream(symbol, interval, kline_rows_to_records(message['data'])):
+                return  # Not loaded yet; the poll job fills in the history
+        elif feed.kind == "book":
+            synced = feed.book.synced
+            if not feed.book.apply(message):
+                if not synced:
+                    return  # Already resubscribed; deltas are dropped until the snapshot
+                # Missed a delta: resubscribe so Bybit sends a fresh snapshot
+                print(f"Warning: order book out of sync at update {message['data'].get('u')}, resubscribing")
+                self.stream.unsubscribe(topic, self._on_message)
+                self.stream.subscribe(topic, self._on_message)
+                return
+        else:
+            for sub in list(feed.subscriptions):
+                sub.callback(message)
+            return
+        with self._lock:
+            self._dirty.add(topic)
+
+    def _flush(self):
+        if not self._running:
+            return
+        with self._lock:
+            dirty, self._dirty = self._dirty, set()
+        for topic in dirty:
+            feed = self.feeds.get(topic)
+            if feed is not None:
+                self._publish(feed)
+        while True:
+            try:
+                callback, result, error = self._done.get_nowait()
+            except queue.Empty:
+                break
+            if error is not None:
+                print(f"Error loading history: {error}")
+                result = (None, None)
+            try:
+                callback(*result)
+            except Exception as e:
+                print(f"Error applying history: {e}")
+        self.root.after(self.flush_ms, self._flush)
+
+    def _publish(self, feed, snapshot=None):
+        """Hand the feed's current state to each subscriber (Tk thread)."""
+        if feed.kind == "book":
+            if snapshot is not None:
+                feed.snapshot = snapshot
+            payload = feed.book if self.is_live(feed) or feed.snapshot is None else feed.snapshot
+            for sub in list(feed.subscriptions):
+                self._deliver(sub, payload)
+            return
+        frames = {}
+        for sub in list(feed.subscriptions):
+            if sub.interval not in frames:
+                frames[sub.interval] = self.candle_cache.local(feed.symbol, sub.interval)
+            if not frames[sub.interval].empty:
+                self._deliver(sub, frames[sub.interval])
+
+    def _deliver(self, sub, payload):
+        if sub.closed:
+            return
+        try:
+            sub.callback(payload)
+        except Exception as e:
+            print(f"Error updating {sub.feed.topic} subscriber: {e}")
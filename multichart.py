@@ -0,0 +1,94 @@
+"""Several charts and order book ladders in one window, fed by one market-data hub.
+
+Markets are given as SYMBOL:INTERVAL (Bybit notation, interval 1 if left
+out); panes on the same symbol share one stream feed, however many
+timeframes they show:
+
+    python multichart.py BTCUSDT:1 BTCUSDT:15 ETHUSDT:5 SOLUSDT:60 --ladder BTCUSDT
+    python multichart.py BTCUSDT:5 BTCUSDT:240 --columns 1 --ladder BTCUSDT --ladder ETHUSDT
+
+Read-only: no API keys are needed and no orders can be placed.
+"""
+import argparse
+import tkinter as tk
+from pybit.unified_trading import HTTP
+from candles import CandleCache
+from candle_store import CandleStore
+from chart_pane import CHART_OVERLAYS, ChartPane
+from governor import GovernedSession, governor
+from instruments import InstrumentRegistry
+from ladder import LadderPane
+from market_hub import MarketHub
+from netloop import NetworkLoop
+from scheduler import RefreshScheduler
+from streams import PUBLIC_URL, MarketStream
+
+
+def parse_market(text):
+    symbol, _, interval = text.partition(":")
+    return symbol.upper(), interval or "1"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("markets", nargs="+", type=parse_market, help="SYMBOL:INTERVAL, e.g. BTCUSDT:5")
+    parser.add_argument("--ladder", action="append", default=[], help="symbol to show an order book for (repeatable)")
+    parser.add_argument("--levels", type=int, default=50, help="book levels per side in each ladder")
+    parser.add_argument("--columns", type=int, default=2, help="charts per row")
+    parser.add_argument("--window", type=int, default=50, help="candles shown per chart")
+    parser.add_argument("--no-stream", action="store_true", help="poll the REST API only")
+    parser.add_argument("--url", default=PUBLIC_URL, help="public WebSocket URL (e.g. a ws_replay.py server)")
+    args = parser.parse_args()
+
+    root = tk.Tk()
+    root.title("Bybit Charts")
+    network = NetworkLoop()
+    stream = MarketStream(args.url)
+    scheduler = RefreshScheduler(root, network)
+    instruments = InstrumentRegistry(GovernedSession(HTTP(), governor))
+    instruments.load_cached()
+    candle_cache = CandleCache(store=CandleStore(), backfill_pages=5)
+    hub = MarketHub(root, stream, scheduler, candle_cache, streaming=not args.no_stream)
+
+    charts_frame = tk.Frame(root)
+    charts_frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=5, pady=5)
+    engines = {}  # Panes showing the same market share indicator state
+    rows = -(-len(args.markets) // args.columns)
+    figsize = (10 / min(args.columns, len(args.markets)), 8 / rows)
+    for i, (symbol, interval) in enumerate(args.markets):
+        pane = ChartPane(charts_frame, hub, symbol, interval, overlays=CHART_OVERLAYS, window=args.window,
+                         title="{symbol} {interval}", figsize=figsize, engines=engines)
+        pane.grid(row=i // args.columns, column=i % args.columns, sticky="nsew")
+    for r in range(rows):
+        charts_frame.rowconfigure(r, weight=1)
+    for c in range(min(args.columns, len(args.markets))):
+        charts_frame.columnconfigure(c, weight=1)
+
+    if args.ladder:
+        ladders_frame = tk.Frame(root)
+        ladders_frame.pack(side=tk.RIGHT, fill=tk.Y, padx=5, pady=5)
+        for symbol in args.ladder:
+            ladder = LadderPane(ladders_frame, instruments, symbol.upper(), levels=args.levels,
+                                visible_levels=max(5, 20 // len(args.ladder)))
+            ladder.pack(pady=5)
+            ladder.subscribe(hub)
+
+    print(f"{len(args.markets)} charts and {len(args.ladder)} ladders on {len(hub.feeds)} feeds")
+    scheduler.add_job("instruments", instruments.ttl * 1000, lambda _: instruments.load(), None)
+    if not args.no_stream:
+        stream.start()
+    scheduler.start()
+
+    def on_close():
+        scheduler.stop()
+        hub.stop()
+        stream.stop()
+        network.stop()
+        root.destroy()
+
+    root.protocol("WM_DELETE_WINDOW", on_close)
+    root.mainloop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from requests.adapters import HTTPAdapter
+from governor import GovernedHTTP, governor
+
+REST_URL = os.environ.get("BYBIT_REST", "https://api.bybit.com")
+POOL_SIZE = 8
+
+
+def make_session(pool_size=POOL_SIZE):
+    """requests.Session whose keep-alive pool holds `pool_size` connections per host."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+# Shared by every REST call so TLS handshakes happen once per pooled connection,
+# and rate limited, merged and retried by the governor
+http = GovernedHTTP(make_session(), governor)
+
+
+def _outcome(future):
+    try:
+        return future.result(), None
+    except Exception as e:
+        return None, e
+
+
+class NetworkLoop:
+    """Background asyncio event loop that runs the app's network calls.
+
+    The HTTP clients in use (requests and pybit) are blocking, so each call
+    runs on the loop's executor, at most `max_concurrency` at a time. A
+    worker cannot be interrupted, so calls are not timed out here: each
+    request carries its own timeout (timeout= on the requests calls, pybit's
+    default for the signed ones) and frees its worker when that expires.
+    Nothing here touches Tk: completions go to a callback on the loop
+    thread, which in the apps puts them on a queue drained with after().
+    """
+
+    def __init__(self, max_concurrency=POOL_SIZE):
+        self.loop = asyncio.new_event_loop()
+        self.executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="net")
+        self.loop.set_default_executor(self.executor)
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    async def _call(self, fn, args, kwargs):
+        return await self.loop.run_in_executor(None, lambda: fn(*args, **kwargs))
+
+    def submit(self, fn, *args, callback=None, **kwargs):
+        """Run fn(*args, **kwargs) off the Tk thread.
+
+        Returns a concurrent.futures.Future. If given, callback(result, error)
+        is called on the loop thread when the call finishes.
+        """
+        future = asyncio.run_coroutine_threadsafe(self._call(fn, args, kwargs), self.loop)
+        if callback is not None:
+            future.add_done_callback(lambda f: callback(*_outcome(f)))
+        return future
+
+    def stop(self):
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,150 @@
+import threading
+import numpy as np
+from parsing import levels_to_array
+
+
+class BookSide:
+    """One side of the book as parallel price/size arrays, best level first.
+
+    Prices are kept in `keys` sorted ascending (bids are stored negated), so
+    both sides share the same searchsorted-based update path.
+    """
+
+    def __init__(self, descending):
+        self.sign = -1.0 if descending else 1.0
+        self.keys = np.empty(0)
+        self.sizes = np.empty(0)
+
+    def __len__(self):
+        return len(self.keys)
+
+    @property
+    def prices(self):
+        return self.keys * self.sign
+
+    def clear(self):
+        self.keys = np.empty(0)
+        self.sizes = np.empty(0)
+
+    def load(self, levels):
+        keys = levels[:, 0] * self.sign
+        order = np.argsort(keys, kind="stable")
+        keep = levels[order, 1] > 0
+        self.keys = keys[order][keep]
+        self.sizes = levels[order, 1][keep]
+
+    def update(self, levels):
+        """Apply delta levels; a size of zero removes the level."""
+        if not len(levels):
+            return
+        keys = levels[:, 0] * self.sign
+        sizes = levels[:, 1]
+        idx = np.searchsorted(self.keys, keys)
+        found = idx < len(self.keys)
+        found[found] = self.keys[idx[found]] == keys[found]
+        self.sizes[idx[found]] = sizes[found]
+        new = ~found & (sizes > 0)
+        if new.any():
+            self.keys = np.insert(self.keys, idx[new], keys[new])
+            self.sizes = np.insert(self.sizes, idx[new], sizes[new])
+            # Inserting at precomputed positions is only correct for distinct
+            # sorted keys, so restore order if the batch was unsorted.
+            if not np.all(self.keys[1:] > self.keys[:-1]):
+                order = np.argsort(self.keys, kind="stable")
+                self.keys, self.sizes = self.keys[order], self.sizes[order]
+        empty = self.sizes <= 0
+        if empty.any():
+            self.keys = self.keys[~empty]
+            self.sizes = self.sizes[~empty]
+
+    def top(self, n):
+        """Prices, sizes and cumulative sizes of the best n levels."""
+        sizes = self.sizes[:n]
+        return self.prices[:n], sizes, np.cumsum(sizes)
+
+    def volume_within(self, price):
+        """Total size on levels up to and including `price` from the touch."""
+        end = np.searchsorted(self.keys, price * self.sign, side="right")
+        return float(self.sizes[:end].sum())
+
+
+class OrderBook:
+    """Local L2 book maintained from snapshot and delta messages.
+
+    apply() returns False when a delta does not follow the last update id;
+    the book is then marked out of sync and ignores deltas until the next
+    snapshot arrives. Readers on another thread should hold `lock`.
+    """
+
+    def __init__(self):
+        self.asks = BookSide(descending=False)
+        self.bids = BookSide(descending=True)
+        self.update_id = None
+        self.synced = False
+        self.lock = threading.Lock()
+
+    def load_snapshot(self, asks, bids, update_id=None):
+        asks, bids = levels_to_array(asks), levels_to_array(bids)
+        with self.lock:
+            self.asks.load(asks)
+            self.bids.load(bids)
+            self.update_id = update_id
+            self.synced = True
+
+    def apply(self, message):
+        with self.lock:
+            return self._apply(message)
+
+    def _apply(self, message):
+        data = message['data']
+        update_id = data.get('u')
+        # u == 1 means Bybit restarted the service and resent a snapshot
+        if message.get('type') == 'snapshot' or update_id == 1:
+            self.asks.load(levels_to_array(data.get('a', ())))
+            self.bids.load(levels_to_array(data.get('b', ())))
+            self.update_id = update_id
+            self.synced = True
+            return True
+        if not self.synced:
+            return False
+        if self.update_id is not None and update_id is not None:
+            if update_id <= self.update_id:
+                return True  # stale duplicate
+            if update_id != self.update_id + 1:
+                self.synced = False
+                return False
+        self.asks.update(levels_to_array(data.get('a', ())))
+        self.bids.update(levels_to_array(data.get('b', ())))
+        self.update_id = update_id
+        return True
+
+    def best_ask(self):
+        return float(self.asks.prices[0]) if len(self.asks) else None
+
+    def best_bid(self):
+        return float(self.bids.prices[0]) if len(self.bids) else None
+
+    def mid(self):
+        if not len(self.asks) or not len(self.bids):
+            return None
+        return (self.best_ask() + self.best_bid()) / 2
+
+    def spread(self):
+        if not len(self.asks) or not len(self.bids):
+            return None
+        return self.best_ask() - self.best_bid()
+
+    def imbalance(self, levels=10):
+        """(bid size - ask size) / total size over the best `levels` levels."""
+        bid = self.bids.sizes[:levels].sum()
+        ask = self.asks.sizes[:levels].sum()
+        total = bid + ask
+        return float((bid - ask) / total) if total else 0.0
+
+    def depth_within_bps(self, bps):
+        """Bid and ask size resting within `bps` basis points of the mid."""
+        mid = self.mid()
+        if mid is None:
+            return 0.0, 0.0
+        offset = mid * bps / 10_000
+        return self.bids.volume_within(mid - offset), self.asks.volume_within(mid + offset)
@@ -0,0 +1,296 @@
+import math
+import time
+from collections import deque, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+OrderLatency = namedtuple("OrderLatency", ["queued_ms", "prepare_ms", "exchange_ms", "total_ms", "cached_mark"])
+OrderResult = namedtuple("OrderResult", ["symbol", "side", "qty", "ok", "order_id", "message"])
+
+ORDER_SIDES = {'buy': 'Buy', 'sell': 'Sell'}
+CLOSING_SIDES = {'Buy': 'Sell', 'Sell': 'Buy'}
+BATCH_LIMIT = 10  # Orders per place_batch_order request
+LEVERAGE_NOT_MODIFIED = 110043
+BATCH_NOT_PERMITTED = 10005  # API key or account without batch orders
+# retCodes that refuse a batch request as a whole, before any order in it is placed. Not 10001:
+# a parameter error can name one order of the batch while the others are placed.
+BATCH_REFUSED_CODES = {BATCH_NOT_PERMITTED}
+
+
+def format_latency(latency):
+    source = "cached" if latency.cached_mark else "fetched"
+    return (f"click-to-ack {latency.total_ms:.1f} ms (queue {latency.queued_ms:.1f}, "
+            f"prepare {latency.prepare_ms:.1f} with {source} mark price, exchange {latency.exchange_ms:.1f})")
+
+
+def round_price(price, info):
+    """Nearest valid price on the instrument's tick grid."""
+    return round(round(price / info.tick_size) * info.tick_size, info.price_precision)
+
+
+def floor_qty(qty, info):
+    """Largest quantity on the instrument's qty_step grid not above `qty`."""
+    steps = math.floor(qty / info.qty_step + 1e-9)  # 0.3 / 0.1 is 2.9999999999999996
+    return round(steps * info.qty_step, info.qty_precision)
+
+
+def batch_results(orders, resp):
+    """OrderResults from a place_batch_order response, in request order."""
+    placed = resp['result']['list']
+    statuses = resp.get('retExtInfo', {}).get('list', [])
+    results = []
+    for i, order in enumerate(orders):
+        status = statuses[i] if i < len(statuses) else {'code': 0, 'msg': 'OK'}
+        order_id = placed[i].get('orderId') if i < len(placed) else None
+        ok = status.get('code') == 0 and bool(order_id)
+        results.append(OrderResult(order['symbol'], order['side'], order['qty'], ok, order_id if ok else None,
+                                   status.get('msg', '')))
+    return results
+
+
+class OrderExecutor:
+    """Places orders from a dedicated worker using state prepared ahead of time.
+
+    Precisions come from the instrument registry and the mark price from the
+    tickers stream (on_ticker), so a click normally costs one place_order round
+    trip. The worker is separate from market-data fetches so orders never
+    queue behind them, and warm() keeps the HTTP connection open between
+    orders. Every order records a click-to-ack latency breakdown.
+
+    Groups of orders (scaling in, brackets, closing every position) go
+    through submit_batch(): up to BATCH_LIMIT orders share one
+    place_batch_order request, and larger groups send their requests
+    concurrently from `batch_pool`, so a group costs about one round trip.
+    If the exchange refuses a batch request as a whole because batch orders
+    are not permitted (BATCH_REFUSED_CODES), its orders are retried one
+    place_order each, also concurrently, and later groups skip the batch
+    endpoint. Nothing is resent after an HTTP or connection
+    failure, since those orders may already be live.
+    """
+
+    def __init__(self, session, instruments, max_mark_age=5):
+        self.session = session
+        self.instruments = instruments
+        self.max_mark_age = max_mark_age
+        self.mark_prices = {}
+        self.latencies = deque(maxlen=100)
+        self.worker = ThreadPoolExecutor(max_workers=1, thread_name_prefix="orders")
+        self.batch_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="order-batch")
+        self.leverages = {}  # Last leverage set per symbol
+        self.batch_orders = True  # Cleared when batch orders are not permitted
+
+    def on_ticker(self, message):
+        """Stream callback for tickers.<symbol>; deltas may omit markPrice."""
+        data = message['data']
+        if data.get('markPrice'):
+            self.mark_prices[data['symbol']] = (float(data['markPrice']), time.monotonic())
+
+    def mark_price(self, symbol):
+        """Mark price and whether it came from the cache."""
+        cached = self.mark_prices.get(symbol)
+        if cached and time.monotonic() - cached[1] < self.max_mark_age:
+            return cached[0], True
+        price = float(self.session.get_tickers(category='linear', symbol=symbol)['result']['list'][0]['markPrice'])
+        self.mark_prices[symbol] = (price, time.monotonic())
+        return price, False
+
+    def prepare(self, symbol):
+        """Load everything an order on `symbol` needs before the user clicks."""
+        self.instruments.get(symbol)
+        self.mark_price(symbol)
+
+    def warm(self):
+        """Cheap request that keeps the pooled connection to the API alive."""
+        self.session.get_server_time()
+
+    def submit_market(self, symbol, side, notional, leverage):
+        """Queue a market order for `notional` USDT; returns a Future."""
+        clicked = time.perf_counter()
+        return self.worker.submit(self._place_market, symbol, side, notional, leverage, clicked)
+
+    def _place_market(self, symbol, side, notional, leverage, clicked):
+        started = time.perf_counter()
+        try:
+            if side not in ORDER_SIDES:
+                raise ValueError("Invalid side: must be 'buy' or 'sell'")
+            info = self.instruments.get(symbol)
+            mark_price, cached = self.mark_price(symbol)
+            order_qty = floor_qty(notional / mark_price, info)
+            if order_qty < info.min_order_qty:
+                raise ValueError(f"{notional} USDT is below the minimum order of {info.min_order_qty} {symbol}")
+            self._set_leverage(symbol, leverage)  # A request only when the slider moved
+            print(f'Placing {side.capitalize()} order for {symbol}. Mark price: {mark_price}')
+            sent = time.perf_counter()
+            resp = self.session.place_order(
+                category='linear',
+                symbol=symbol,
+                side=ORDER_SIDES[side],
+                orderType='Market',
+                qty=order_qty,
+                tpTriggerBy='MarkPrice',
+                slTriggerBy='MarkPrice'
+            )
+            acked = time.perf_counter()
+            latency = OrderLatency(
+                queued_ms=(started - clicked) * 1000,
+                prepare_ms=(sent - started) * 1000,
+                exchange_ms=(acked - sent) * 1000,
+                total_ms=(acked - clicked) * 1000,
+                cached_mark=cached
+            )
+            self.latencies.append(latency)
+            print(resp)
+            print(f"{symbol} {side} order {format_latency(latency)}")
+            return resp
+        except Exception as err:
+            print(f"Error placing order: {err}")
+            return None
+
+    def submit_batch(self, orders, label="Batch"):
+        """Queue place_order keyword dicts to go out together; the Future gives OrderResults."""
+        return self._submit(label, lambda: orders)
+
+    def submit_scale_in(self, symbol, side, notional, leverage, levels, step_pct):
+        """Split `notional` USDT into `levels` limit orders, each `step_pct` % further from the mark."""
+        return self._submit(f"{symbol} scale-in", self._scale_in_orders, symbol, side, notional, leverage, levels, step_pct)
+
+    def submit_bracket(self, symbol, side, notional, leverage, tp_pct, sl_pct):
+        """Market entry with take profit and stop loss attached, `tp_pct`/`sl_pct` % from the mark."""
+        return self._submit(f"{symbol} bracket", self._bracket_orders, symbol, side, notional, leverage, tp_pct, sl_pct)
+
+    def submit_close_all(self):
+        """Reduce-only market orders closing every open USDT position."""
+        return self._submit("Close all", self._close_all_orders)
+
+    def _submit(self, label, build, *args):
+        clicked = time.perf_counter()
+        return self.worker.submit(self._place_group, label, build, args, clicked)
+
+    def _place_group(self, label, build, args, clicked):
+        try:
+            orders = build(*args)
+        except Exception as err:
+            print(f"Error preparing {label.lower()}: {err}")
+            return None
+        if not orders:
+            print(f"{label}: no orders to place")
+            return []
+        sent = time.perf_counter()
+        size = BATCH_LIMIT if self.batch_orders else 1
+        groups = [orders[i:i + size] for i in range(0, len(orders), size)]
+        results = self._send_all(groups)
+        rejected = [group for group, result in zip(groups, results) if result is None]
+        if rejected:
+            print(f"{label}: batch request refused, placing {sum(map(len, rejected))} orders one by one")
+            retried = iter(self._send_all([[order] for group in rejected for order in group]))
+            results = [result if result is not None else [r for _ in group for r in next(retried)]
+                       for group, result in zip(groups, results)]
+        results = [r for result in results for r in result]
+        requests = len(groups) + sum(map(len, rejected))
+        acked = time.perf_counter()
+        for result in results:
+            if not result.ok:
+                print(f"Error in {label}: {result.side} {result.qty} {result.symbol} failed: {result.message}")
+        placed = sum(result.ok for result in results)
+        print(f"{label}: {placed}/{len(results)} orders placed in {requests} "
+              f"requests, click-to-ack {(acked - clicked) * 1000:.1f} ms (exchange {(acked - sent) * 1000:.1f})")
+        return results
+
+    def _send_all(self, groups):
+        """Send each group as one request, concurrently; None marks a group rejected as a whole."""
+        if len(groups) == 1:
+            return [self._send(groups[0])]
+        return list(self.batch_pool.map(self._send, groups))
+
+    def _send(self, orders):
+        try:
+            if len(orders) == 1:
+                order = orders[0]
+                resp = self.session.place_order(category='linear', **order)
+                return [OrderResult(order['symbol'], order['side'], order['qty'], True, resp['result'].get('orderId'), 'OK')]
+            return batch_results(orders, self.session.place_batch_order(category='linear', request=orders))
+        except Exception as err:
+            # pybit errors carry the HTTP status or the API retCode as status_code
+            code = getattr(err, 'status_code', None)
+            if len(orders) > 1 and code in BATCH_REFUSED_CODES:
+                self.batch_orders = False
+                return None  # Refused before any order was placed: safe to send them singly
+            return [OrderResult(order['symbol'], order['side'], order['qty'], False, None, str(err)) for order in orders]
+
+    def _set_leverage(self, symbol, leverage):
+        """Apply `leverage` to the symbol's position; place_order has no leverage parameter."""
+        if self.leverages.get(symbol) == leverage:
+            return
+        try:
+            self.session.set_leverage(category='linear', symbol=symbol,
+                                      buyLeverage=str(leverage), sellLeverage=str(leverage))
+        except Exception as err:
+            if getattr(err, 'status_code', None) != LEVERAGE_NOT_MODIFIED:
+                raise
+        self.leverages[symbol] = leverage
+
+    def _scale_in_orders(self, symbol, side, notional, leverage, levels, step_pct):
+        if side not in ORDER_SIDES:
+            raise ValueError("Invalid side: must be 'buy' or 'sell'")
+        info = self.instruments.get(symbol)
+        mark_price, _ = self.mark_price(symbol)
+        self._set_leverage(symbol, leverage)
+        away = -1 if side == 'buy' else 1  # Buys rest below the mark, sells above
+        orders = []
+        for i in range(1, levels + 1):
+            price = round_price(mark_price * (1 + away * step_pct * i / 100), info)
+            order_qty = round(notional / levels / price, info.qty_precision)
+            if order_qty < info.min_order_qty:
+                raise ValueError(f"{notional} USDT is too small to split into {levels} orders "
+                                 f"of at least {info.min_order_qty} {symbol}")
+            orders.append({'symbol': symbol, 'side': ORDER_SIDES[side], 'orderType': 'Limit',
+                           'qty': str(order_qty), 'price': str(price), 'timeInForce': 'GTC'})
+        return orders
+
+    def _bracket_orders(self, symbol, side, notional, leverage, tp_pct, sl_pct):
+        if side not in ORDER_SIDES:
+            raise ValueError("Invalid side: must be 'buy' or 'sell'")
+        info = self.instruments.get(symbol)
+        mark_price, _ = self.mark_price(symbol)
+        self._set_leverage(symbol, leverage)
+        sign = 1 if side == 'buy' else -1
+        # TP and SL ride on the entry, so the exchange places all three in one request
+        return [{
+            'symbol': symbol,
+            'side': ORDER_SIDES[side],
+            'orderType': 'Market',
+            'qty': str(round(notional / mark_price, info.qty_precision)),
+            'takeProfit': str(round_price(mark_price * (1 + sign * tp_pct / 100), info)),
+            'stopLoss': str(round_price(mark_price * (1 - sign * sl_pct / 100), info)),
+            'tpslMode': 'Full',
+            'tpTriggerBy': 'MarkPrice',
+            'slTriggerBy': 'MarkPrice',
+        }]
+
+    def open_positions(self):
+        """Every open USDT position, following pagination."""
+        positions = []
+        cursor = None
+        while True:
+            params = {'category': 'linear', 'settleCoin': 'USDT', 'limit': 200}
+            if cursor:
+                params['cursor'] = cursor
+            result = self.session.get_positions(**params)['result']
+            positions += result['list']
+            cursor = result.get('nextPageCursor')
+            if not cursor:
+                return positions
+
+    def _close_all_orders(self):
+        positions = self.open_positions()
+        return [{
+            'symbol': p['symbol'],
+            'side': CLOSING_SIDES[p['side']],
+            'orderType': 'Market',
+            'qty': p['size'],
+            'reduceOnly': True,
+            'positionIdx': p.get('positionIdx', 0),
+        } for p in positions if float(p['size']) and p['side'] in CLOSING_SIDES]
+
+    def stop(self):
+        self.worker.shutdown(wait=False)
+        self.batch_pool.shutdown(wait=False)
@@ -0,0 +1,59 @@
+"""Decoding of Bybit responses straight into typed NumPy arrays.
+
+Bybit sends klines and book levels as lists of string lists. One
+np.array(..., dtype=float64) call parses all of them in C, so nothing goes
+through per-value Python floats or pandas string columns; DataFrames are
+built from the arrays only where the charts need one.
+"""
+import json
+import numpy as np
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+CANDLE_DTYPE = np.dtype([
+    ("timestamp", "<i8"),
+    ("open", "<f8"),
+    ("high", "<f8"),
+    ("low", "<f8"),
+    ("close", "<f8"),
+    ("volume", "<f8"),
+    ("turnover", "<f8"),
+])
+CANDLE_COLUMNS = list(CANDLE_DTYPE.names[1:])
+
+
+def loads(data):
+    """Decode a JSON document (str or bytes), with orjson when it is installed."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def records_to_array(records):
+    """Convert raw kline rows (newest first) into an ascending candle array."""
+    arr = np.empty(len(records), dtype=CANDLE_DTYPE)
+    if not len(records):
+        return arr
+    raw = np.array(records, dtype=np.float64)[::-1]
+    # Millisecond timestamps are well inside float64's exact integer range
+    arr["timestamp"] = raw[:, 0]
+    for i, name in enumerate(CANDLE_COLUMNS, start=1):
+        arr[name] = raw[:, i]
+    return arr
+
+
+def array_to_frame(arr):
+    """Build the time-indexed OHLCV (and turnover) DataFrame used by the charts."""
+    import pandas as pd  # Deferred: stream and book code uses this module without pandas
+    index = pd.DatetimeIndex(pd.to_datetime(arr["timestamp"], unit="ms", utc=True), name="timestamp")
+    return pd.DataFrame({name: arr[name] for name in CANDLE_COLUMNS}, index=index)
+
+
+def levels_to_array(levels):
+    """Convert Bybit [["price", "size"], ...] levels into an (n, 2) float array."""
+    if not levels:
+        return np.empty((0, 2))
+    return np.array(levels, dtype=np.float64).reshape(-1, 2)
@@ -0,0 +1,204 @@
+import numpy as np
+from matplotlib.collections import LineCollection, PolyCollection
+from matplotlib.colors import to_rgba
+from matplotlib.ticker import FuncFormatter, MaxNLocator
+from candles import volume_threshold
+
+UP_COLOR = to_rgba('#006340')  # mplfinance 'charles' style
+DOWN_COLOR = to_rgba('#a02128')
+BODY_WIDTH = 0.6
+
+
+def candle_geometry(x, o, h, l, c, v):
+    """Body, wick and volume-bar vertices for candles at x positions."""
+    half = BODY_WIDTH / 2
+    lo = np.minimum(o, c)
+    hi = np.maximum(o, c)
+    left, right = x - half, x + half
+    bodies = np.stack([
+        np.column_stack([left, lo]), np.column_stack([left, hi]),
+        np.column_stack([right, hi]), np.column_stack([right, lo])
+    ], axis=1)
+    wicks = np.stack([np.column_stack([x, l]), np.column_stack([x, h])], axis=1)
+    zeros = np.zeros_like(v)
+    volumes = np.stack([
+        np.column_stack([left, zeros]), np.column_stack([left, v]),
+        np.column_stack([right, v]), np.column_stack([right, zeros])
+    ], axis=1)
+    return bodies, wicks, volumes
+
+
+class CandleRenderer:
+    """Candlestick + volume chart drawn with persistent, blitted artists.
+
+    A refresh that only changes the last (still open) candle rewrites that
+    candle's vertices and blits the two axes over a cached background. New
+    candles, a new market or a price outside the current y-range trigger one
+    full redraw, which also refreshes the cached background. Appends are
+    not blitted: a new candle moves every candle one slot left and changes
+    the time labels, which are part of the cached background, so only the
+    open candle's ticks between two candles are cheap.
+
+    `overlays` lists indicator lines as (column, panel, color): "price" lines
+    go on the price axes, "volume" lines on the volume axes and "lower" lines
+    on a second scale over the volume axes. update() then takes the indicator
+    values (see indicators.IndicatorEngine.tail) and redraws them with the
+    candles, blitted the same way.
+    """
+
+    def __init__(self, ax_price, ax_volume, canvas, window=50, overlays=()):
+        self.ax_price = ax_price
+        self.ax_volume = ax_volume
+        self.canvas = canvas
+        self.window = window
+        self._times = None
+        self._background = None
+        self.ax_lower = ax_volume.twinx() if any(panel == "lower" for _, panel, _ in overlays) else None
+        axes = {"price": ax_price, "volume": ax_volume, "lower": self.ax_lower}
+        self.overlays = [
+            (column, axes[panel], axes[panel].plot([], [], color=color, linewidth=1, label=column, animated=True)[0])
+            for column, panel, color in overlays
+        ]
+
+        self.bodies = PolyCollection([], animated=True, linewidths=0.5)
+        self.wicks = LineCollection([], animated=True, linewidths=1)
+        self.volumes = PolyCollection([], animated=True, linewidths=0)
+        ax_price.add_collection(self.bodies)
+        ax_price.add_collection(self.wicks)
+        ax_volume.add_collection(self.volumes)
+        self.threshold = ax_volume.axhline(
+            0, color='r', linestyle='--', linewidth=1, label='Volume Threshold', animated=True
+        )
+        ax_volume.legend(loc='upper left')
+        if any(ax is ax_price for _, ax, _ in self.overlays):
+            ax_price.legend(loc='upper left', fontsize=8)
+        if self.ax_lower is not None:
+            self.ax_lower.legend(loc='upper right', fontsize=8)
+        ax_volume.set_ylabel('Volume')
+        ax_price.set_ylabel('Price')
+        ax_price.tick_params(labelbottom=False)
+        for ax in (ax_price, ax_volume):
+            ax.xaxis.set_major_locator(MaxNLocator(8, integer=True))
+            ax.xaxis.set_major_formatter(FuncFormatter(self._format_time))
+        canvas.mpl_connect('draw_event', self._on_draw)
+
+    def _format_time(self, x, pos):
+        i = int(round(x))
+        if self._times is None or not 0 <= i < len(self._times):
+            return ''
+        step = self._times[-1] - self._times[0] if len(self._times) > 1 else None
+        fmt = '%Y-%m-%d' if step is not None and step / len(self._times) >= np.timedelta64(1, 'D') else '%m-%d %H:%M'
+        return self._times[i].strftime(fmt)
+
+    def update(self, ohlc_data, title=None, indicators=None):
+        data = ohlc_data.tail(self.window)
+        times = data.index
+        o, h, l, c, v = (data[col].to_numpy(dtype=float) for col in ('open', 'high', 'low', 'close', 'volume'))
+        indicators = {col: values[-len(data):] for col, values in (indicators or {}).items()}
+        if len(indicators.get('volume_threshold', ())):
+            threshold = indicators['volume_threshold'][-1]
+        else:
+            threshold = volume_threshold(v)
+        self._set_overlays(indicators, len(data))
+        same_candles = (
+            self._times is not None and len(times) == len(self._times)
+            and times[0] == self._times[0] and times[-1] == self._times[-1]
+        )
+        if same_candles and self._background is not None:
+            self._update_last(o[-1], h[-1], l[-1], c[-1], v[-1], threshold)
+            if self._fits(h[-1], l[-1], v[-1], threshold) and self._overlays_fit():
+                self._blit()
+                return
+        else:
+            self._times = times
+            self._set_all(o, h, l, c, v, threshold)
+        self._rescale(h, l, v, threshold)
+        if title is not None:
+            self.ax_price.set_title(title)
+        self.canvas.draw_idle()
+
+    def _set_all(self, o, h, l, c, v, threshold):
+        x = np.arange(len(o), dtype=float)
+        self._bodies, self._wicks, self._volumes = candle_geometry(x, o, h, l, c, v)
+        self._colors = np.where((c >= o)[:, None], UP_COLOR, DOWN_COLOR)
+        self._apply_geometry()
+        self.threshold.set_ydata([threshold, threshold])
+
+    def _update_last(self, o, h, l, c, v, threshold):
+        x = np.array([len(self._bodies) - 1], dtype=float)
+        bodies, wicks, volumes = candle_geometry(x, *(np.array([val]) for val in (o, h, l, c, v)))
+        self._bodies[-1], self._wicks[-1], self._volumes[-1] = bodies[0], wicks[0], volumes[0]
+        self._colors[-1] = UP_COLOR if c >= o else DOWN_COLOR
+        self._apply_geometry()
+        self.threshold.set_ydata([threshold, threshold])
+
+    def _apply_geometry(self):
+        self.bodies.set_verts(self._bodies)
+        self.bodies.set_facecolor(self._colors)
+        self.bodies.set_edgecolor(self._colors)
+        self.wicks.set_segments(self._wicks)
+        self.wicks.set_color(self._colors)
+        self.volumes.set_verts(self._volumes)
+        self.volumes.set_facecolor(self._colors)
+
+    def _set_overlays(self, indicators, length):
+        x = np.arange(length, dtype=float)
+        for column, _, line in self.overlays:
+            values = indicators.get(column)
+            if values is None or len(values) != length:
+                line.set_data([], [])
+            else:
+                line.set_data(x, values)
+
+    def _overlays_fit(self):
+        for _, ax, line in self.overlays:
+            y = line.get_ydata()
+            if len(y) and np.isfinite(y[-1]):
+                y0, y1 = ax.get_ylim()
+                if not y0 <= y[-1] <= y1:
+                    return False
+        return True
+
+    def _fits(self, high, low, volume, threshold):
+        y0, y1 = self.ax_price.get_ylim()
+        return y0 <= low and high <= y1 and max(volume, threshold) <= self.ax_volume.get_ylim()[1]
+
+    def _rescale(self, h, l, v, threshold):
+        top, bottom = h.max(), l.min()
+        lower = []
+        for _, ax, line in self.overlays:
+            y = np.asarray(line.get_ydata(), dtype=float)
+            y = y[np.isfinite(y)]
+            if not len(y):
+                continue
+            if ax is self.ax_price:
+                top, bottom = max(top, y.max()), min(bottom, y.min())
+            elif ax is self.ax_lower:
+                lower.append(y)
+        pad = (top - bottom) * 0.05 or abs(top) * 0.001 or 1
+        self.ax_price.set_ylim(bottom - pad, top + pad)
+        self.ax_volume.set_ylim(0, max(v.max(), threshold) * 1.15 or 1)
+        if lower:
+            lower = np.concatenate(lower)
+            pad = (lower.max() - lower.min()) * 0.1 or 1
+            self.ax_lower.set_ylim(lower.min() - pad, lower.max() + pad)
+        for ax in (self.ax_price, self.ax_volume):
+            ax.set_xlim(-1, len(v))
+
+    def _on_draw(self, event):
+        self._background = self.canvas.copy_from_bbox(self.canvas.figure.bbox)
+        self._draw_artists()
+
+    def _draw_artists(self):
+        for artist in (self.wicks, self.bodies):
+            self.ax_price.draw_artist(artist)
+        for artist in (self.volumes, self.threshold):
+            self.ax_volume.draw_artist(artist)
+        for _, ax, line in self.overlays:
+            ax.draw_artist(line)
+
+    def _blit(self):
+        self.canvas.restore_region(self._background)
+        self._draw_artists()
+        self.canvas.blit(self.ax_price.bbox)
+        self.canvas.blit(self.ax_volume.bbox)
@@ -0,0 +1,554 @@
+"""Offline replay of a recorded session through the normal chart pipeline.
+
+Record a session with MarketStream(record_to="session.jsonl") (the
+orderbook and tickers topics), then replay it in the charts:
+
+    python charts.py --replay session.jsonl --speed 100
+
+ReplayStream stands in for streams.MarketStream, so the market hub, chart
+panes and ladder see the same messages they would live. Order book and
+ticker messages come from the recording. Candles come from the candle
+store (candle_data/): 1m candles are pushed as kline messages when they
+close on the replay clock, aggregated for higher timeframes, and REST
+history requests are answered from the store up to the replay clock.
+
+A seek index (saved next to the recording as <name>.idx.npz) holds every
+message's offset and timestamp plus a snapshot of each order book every
+CHECKPOINT_MS, so seeking reads only the deltas since the last checkpoint.
+ws_replay.py serves the same recordings over a real WebSocket instead.
+"""
+import os
+import threading
+import time
+import tkinter as tk
+from collections import namedtuple
+from concurrent.futures import Future
+from datetime import datetime, timezone
+import numpy as np
+from candles import CandleCache
+from orderbook import OrderBook
+from parsing import array_to_frame, loads
+from resample import INTERVAL_MINUTES, resample
+
+CHECKPOINT_MS = 30_000
+MINUTE_MS = 60_000
+SPEEDS = {"1x": 1, "10x": 10, "100x": 100, "1000x": 1000, "max": 0}
+
+SessionIndex = namedtuple("SessionIndex", [
+    "topics",      # topic names; codes below index into this
+    "ts",          # per line: message timestamp (ms, never decreasing)
+    "offset",      # per line: byte offset in the recording
+    "code",        # per line: topic code, -1 for acks and blank lines
+    "cp_line",     # per checkpoint: line whose book state it holds
+    "cp_code",
+    "cp_update",   # book update id at the checkpoint
+    "cp_bounds",   # per checkpoint: asks are levels[a:b], bids levels[b:c]
+    "cp_levels",   # (n, 2) price/size rows of every checkpoint
+])
+
+
+def index_path(path):
+    return path + ".idx.npz"
+
+
+def build_index(path):
+    """Scan a recording once and return its SessionIndex."""
+    topics, ts, offsets, codes = {}, [], [], []
+    books, last_checkpoint = {}, {}
+    checkpoints, levels, bounds = [], [], []
+    offset, clock, count = 0, 0, 0
+    with open(path, "rb") as f:
+        for line_no, line in enumerate(f):
+            offsets.append(offset)
+            offset += len(line)
+            message = loads(line) if line.strip() else {}
+            topic = message.get("topic")
+            code = topics.setdefault(topic, len(topics)) if topic else -1
+            clock = max(clock, message.get("ts") or clock)
+            ts.append(clock)
+            codes.append(code)
+            if not topic or not topic.startswith("orderbook."):
+                continue
+            book = books.setdefault(topic, OrderBook())
+            book.apply(message)
+            if book.synced and clock - last_checkpoint.get(topic, -CHECKPOINT_MS) >= CHECKPOINT_MS:
+                last_checkpoint[topic] = clock
+                asks = np.column_stack([book.asks.prices, book.asks.sizes])
+                bids = np.column_stack([book.bids.prices, book.bids.sizes])
+                bounds.append((count, count + len(asks), count + len(asks) + len(bids)))
+                count += len(asks) + len(bids)
+                levels += [asks, bids]
+                checkpoints.append((line_no, code, book.update_id or 0))
+    checkpoints = np.array(checkpoints, dtype=np.int64).reshape(-1, 3)
+    return SessionIndex(
+        topics=list(topics),
+        ts=np.array(ts, dtype=np.int64),
+        offset=np.array(offsets, dtype=np.int64),
+        code=np.array(codes, dtype=np.int32),
+        cp_line=checkpoints[:, 0],
+        cp_code=checkpoints[:, 1],
+        cp_update=checkpoints[:, 2],
+        cp_bounds=np.array(bounds, dtype=np.int64).reshape(-1, 3),
+        cp_levels=np.concatenate(levels) if levels else np.empty((0, 2)),
+    )
+
+
+def load_index(path):
+    """The recording's saved index, rebuilt when missing or older than the recording."""
+    saved = index_path(path)
+    if os.path.exists(saved) and os.path.getmtime(saved) >= os.path.getmtime(path):
+        with np.load(saved) as data:
+            fields = {name: data[name] for name in SessionIndex._fields}
+        fields["topics"] = [str(t) for t in fields["topics"]]
+        return SessionIndex(**fields)
+    index = build_index(path)
+    tmp = saved + ".tmp.npz"
+    np.savez(tmp, **{name: np.array(getattr(index, name)) for name in SessionIndex._fields})
+    os.replace(tmp, saved)
+    return index
+
+
+def kline_message(symbol, interval, candles, closed_at):
+    """Bybit-style kline push aggregating 1m `candles` into the `interval` bucket they start."""
+    ms = INTERVAL_MINUTES[interval] * MINUTE_MS
+    start = int(candles["timestamp"][0]) - int(candles["timestamp"][0]) % ms
+    row = {
+        "start": start,
+        "end": start + ms - 1,
+        "interval": interval,
+        "open": float(candles["open"][0]),
+        "high": float(candles["high"].max()),
+        "low": float(candles["low"].min()),
+        "close": float(candles["close"][-1]),
+        "volume": float(candles["volume"].sum()),
+        "turnover": float(candles["turnover"].sum()),
+        "confirm": closed_at % ms == 0,
+        "timestamp": closed_at,
+    }
+    return {"topic": f"kline.{interval}.{symbol}", "ts": closed_at, "type": "snapshot", "data": [row]}
+
+
+class ReplayStream:
+    """streams.MarketStream stand-in that plays a recorded session on a replay clock.
+
+    Messages are dispatched on the replay thread at `speed` times the
+    recorded pace (0 plays as fast as the consumers allow). play(), pause(),
+    set_speed() and seek() may be called from any thread; on_seek() is
+    called on the replay thread after every seek. `candle_cache` is
+    answered from the store up to the replay clock and is reset on seek.
+    Subscriptions (Tk thread) and fetch_klines() (network loop) add
+    symbols to the candle state the replay thread walks, so that state is
+    only touched under `_cond`.
+    """
+
+    def __init__(self, path, index=None, store=None, speed=1.0, history=1000, on_seek=None):
+        self.path = path
+        self.index = index if index is not None else load_index(path)
+        if not len(self.index.ts):
+            raise ValueError(f"{path} holds no messages")
+        self.store = store
+        self.speed = speed
+        self.on_seek = on_seek
+        self.start_ts, self.end_ts = int(self.index.ts[0]), int(self.index.ts[-1])
+        self.clock = self.start_ts
+        self.playing = False
+        self.dispatched = 0
+        self.candle_cache = CandleCache(history=history, fetch=self.fetch_klines)
+        self._callbacks = {}
+        self._lines = np.empty(0, dtype=np.int64)
+        self._pos = 0
+        self._candles = {}
+        self._next_candle = {}
+        self._seek_to = self.start_ts
+        self._restore = set()
+        self._reanchor = True
+        self._running = False
+        self._cond = threading.Condition()
+        self._file = open(path, "rb")
+
+    @property
+    def symbols(self):
+        return sorted({topic.rsplit(".", 1)[-1] for topic in self.index.topics})
+
+    def start(self):
+        if self._running:
+            return
+        self._running = True
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def stop(self):
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+
+    def play(self):
+        self._control(playing=True)
+
+    def pause(self):
+        self._control(playing=False)
+
+    def set_speed(self, speed):
+        self._control(speed=speed)
+
+    def seek(self, ts):
+        self._control(_seek_to=int(min(max(ts, self.start_ts), self.end_ts)))
+
+    def _control(self, **changes):
+        with self._cond:
+            for name, value in changes.items():
+                setattr(self, name, value)
+            self._reanchor = True
+            self._cond.notify_all()
+
+    def subscribe(self, topic, callback):
+        with self._cond:
+            self._callbacks.setdefault(topic, []).append(callback)
+            self._update_topics()
+            if topic.startswith("orderbook."):
+                self._restore.add(topic)  # Like Bybit, open a book subscription with a snapshot
+                self._cond.notify_all()
+
+    def unsubscribe(self, topic, callback=None):
+        with self._cond:
+            callbacks = self._callbacks.get(topic, [])
+            if callback in callbacks:
+                callbacks.remove(callback)
+            if callback is None or not callbacks:
+                self._callbacks.pop(topic, None)
+            self._update_topics()
+
+    def is_live(self, topic, max_age=10):
+        """The replay is the only source, so REST polling never takes over."""
+        return self._running and topic in self._callbacks
+
+    def _update_topics(self):
+        codes = [i for i, topic in enumerate(self.index.topics)
+                 if topic in self._callbacks and not topic.startswith("kline.")]
+        self._lines = np.flatnonzero(np.isin(self.index.code, codes))
+        for topic in self._callbacks:
+            if topic.startswith("kline."):
+                symbol = topic.split(".", 2)[2]
+                if symbol not in self._candles:
+                    self._candles[symbol] = self._stored(symbol)
+                    self._next_candle[symbol] = self._closed_before(symbol, self.clock)
+
+    def _stored(self, symbol):
+        if self.store is None:
+            return np.empty(0, dtype=[("timestamp", "<i8")])
+        return self.store.read(symbol, "1")
+
+    def _closed_before(self, symbol, ts):
+        """Index of the first 1m candle still open at `ts`."""
+        return int(np.searchsorted(self._candles[symbol]["timestamp"], ts - MINUTE_MS, side="right"))
+
+    def fetch_klines(self, symbol, interval, limit=50, start=None, end=None):
+        """candles.fetch_klines stand-in serving stored candles closed by the replay clock."""
+        interval = str(interval)
+        if interval not in INTERVAL_MINUTES:
+            raise ValueError(f"Replay cannot serve interval {interval}")
+        with self._cond:
+            candles = self._candles.get(symbol)
+            if candles is None:
+                candles = self._candles[symbol] = self._stored(symbol)
+        minutes = INTERVAL_MINUTES[interval]
+        ts = candles["timestamp"]
+        hi = int(np.searchsorted(ts, self.clock - MINUTE_MS, side="right"))
+        if end is not None:
+            hi = min(hi, int(np.searchsorted(ts, end, side="right")))
+        lo = max(0, hi - (limit + 1) * minutes)
+        df = array_to_frame(candles[lo:hi])
+        if minutes > 1:
+            df = resample(df, interval)
+        if start is not None:
+            df = df[df.index.as_unit("ms").asi8 >= start]
+        df = df.tail(limit)
+        rows = np.column_stack([df.index.as_unit("ms").asi8, df.to_numpy(dtype=float)])
+        return rows[::-1].tolist()
+
+    def last_price(self, symbol):
+        """Close of the last 1m candle closed on the replay clock, or None."""
+        candles = self._candles.get(symbol)
+        if candles is None or not len(candles):
+            return None
+        i = self._closed_before(symbol, self.clock)
+        return float(candles["close"][i - 1]) if i else None
+
+    def _run(self):
+        wall = clock0 = None
+        while True:
+            with self._cond:
+                if not self._running:
+                    return
+                target, self._seek_to = self._seek_to, None
+                restore, self._restore = self._restore, set()
+                if self._reanchor:
+                    wall, self._reanchor = None, False
+                if target is None and not restore and not self.playing:
+                    self._cond.wait(0.1)
+                    continue
+                speed = self.speed
+            if target is not None:
+                self._seek(target)
+                continue
+            for topic in restore & set(self.index.topics):
+                self._restore_book(topic, self._pos)
+            ts, source = self._next_event()
+            if ts is None:
+                self.playing = False  # End of the recording
+                continue
+            if speed:
+                if wall is None:
+                    wall, clock0 = time.monotonic(), self.clock
+                delay = wall + (ts - clock0) / 1000 / speed - time.monotonic()
+                if delay > 0.002:
+                    with self._cond:
+                        self._cond.wait(delay)  # Woken early by controls
+                    continue
+            self.clock = max(self.clock, ts)
+            if source is None:
+                self._dispatch_line(self._next_line())
+            else:
+                self._close_candle(source)
+
+    def _next_line(self):
+        i = np.searchsorted(self._lines, self._pos)
+        return int(self._lines[i]) if i < len(self._lines) else None
+
+    def _next_event(self):
+        """(timestamp, source) of the next message: source is a symbol for candle closes."""
+        line = self._next_line()
+        best = (int(self.index.ts[line]), None) if line is not None else (None, None)
+        with self._cond:
+            pending = [(symbol, i, self._candles[symbol]) for symbol, i in self._next_candle.items()]
+        for symbol, i, candles in pending:
+            if i < len(candles):
+                closes = int(candles["timestamp"][i]) + MINUTE_MS
+                if closes <= self.end_ts and (best[0] is None or closes < best[0]):
+                    best = (closes, symbol)
+        return best
+
+    def _close_candle(self, symbol):
+        with self._cond:
+            i = self._next_candle[symbol]
+            self._next_candle[symbol] = i + 1
+            candles = self._candles[symbol]
+        closed_at = int(candles["timestamp"][i]) + MINUTE_MS
+        for topic in list(self._callbacks):
+            if not topic.startswith("kline.") or topic.split(".", 2)[2] != symbol:
+                continue
+            interval = topic.split(".", 2)[1]
+            if interval not in INTERVAL_MINUTES:
+                continue
+            ms = INTERVAL_MINUTES[interval] * MINUTE_MS
+            first = int(np.searchsorted(candles["timestamp"], int(candles["timestamp"][i]) // ms * ms))
+            self._dispatch(kline_message(symbol, interval, candles[first:i + 1], closed_at))
+
+    def _dispatch_line(self, line):
+        self._pos = line + 1
+        self._file.seek(self.index.offset[line])
+        self._dispatch(loads(self._file.readline()))
+
+    def _dispatch(self, message):
+        with self._cond:
+            callbacks = list(self._callbacks.get(message["topic"], ()))
+        for callback in callbacks:
+            try:
+                callback(message)
+            except Exception as e:
+                print(f"Error handling {message['topic']} message: {e}")
+        self.dispatched += 1
+
+    def _seek(self, target):
+        index = self.index
+        self.clock = target
+        self._pos = int(np.searchsorted(index.ts, target, side="right"))
+        with self._cond:
+            for symbol in self._next_candle:
+                self._next_candle[symbol] = self._closed_before(symbol, target)
+        self.candle_cache.invalidate()
+        for topic in [t for t in list(self._callbacks) if t.startswith("orderbook.") and t in index.topics]:
+            self._restore_book(topic, self._pos)
+        if self.on_seek is not None:
+            self.on_seek()
+
+    def _restore_book(self, topic, pos):
+        """Bring subscribers of a book to its state at line `pos`: checkpoint, then deltas."""
+        index = self.index
+        code = index.topics.index(topic)
+        first = 0
+        mine = np.flatnonzero((index.cp_code == code) & (index.cp_line < pos))
+        if len(mine):
+            j = mine[-1]
+            a, b, c = index.cp_bounds[j]
+            self._dispatch({
+                "topic": topic, "type": "snapshot", "ts": int(index.ts[index.cp_line[j]]),
+                "data": {"s": topic.rsplit(".", 1)[-1], "a": index.cp_levels[a:b].tolist(),
+                         "b": index.cp_levels[b:c].tolist(), "u": int(index.cp_update[j])},
+            })
+            first = int(index.cp_line[j]) + 1
+        for line in np.flatnonzero(index.code[first:pos] == code) + first:
+            self._file.seek(index.offset[line])
+            self._dispatch(loads(self._file.readline()))
+
+
+def fill_market(prices, sizes, qty):
+    """Walk book levels (best first) for `qty`; returns (filled qty, average price)."""
+    cumulative = np.cumsum(sizes)
+    n = int(np.searchsorted(cumulative, qty)) + 1
+    taken = sizes[:n].copy()
+    if len(taken):
+        taken[-1] -= max(0.0, cumulative[min(n, len(cumulative)) - 1] - qty)
+    filled = float(taken.sum())
+    return filled, (float(np.dot(prices[:n], taken) / filled) if filled else None)
+
+
+class SimulatedExecutor:
+    """orders.OrderExecutor stand-in that fills market orders against the replayed book.
+
+    Buys walk the asks and sells the bids of book_for(symbol); whatever the
+    book cannot fill is filled at price_for(symbol). Positions and realized
+    PnL are kept per symbol and reported on the console.
+    """
+
+    def __init__(self, instruments, book_for, price_for, depth=50):
+        self.instruments = instruments
+        self.book_for = book_for
+        self.price_for = price_for
+        self.depth = depth
+        self.mark_prices = {}
+        self.positions = {}  # symbol -> (signed qty, average entry price)
+        self.realized = 0.0
+        self.fills = []
+
+    def on_ticker(self, message):
+        data = message['data']
+        if data.get('markPrice'):
+            self.mark_prices[data['symbol']] = float(data['markPrice'])
+
+    def prepare(self, symbol):
+        pass
+
+    def warm(self):
+        pass
+
+    def stop(self):
+        pass
+
+    def submit_market(self, symbol, side, notional, leverage):
+        """Fill immediately; returns a completed Future like the live executor."""
+        future = Future()
+        try:
+            future.set_result(self._fill(symbol, side, notional))
+        except Exception as err:
+            print(f"Error simulating order: {err}")
+            future.set_result(None)
+        return future
+
+    def _fill(self, symbol, side, notional):
+        book = self.book_for(symbol)
+        fallback = self.price_for(symbol) or self.mark_prices.get(symbol)
+        prices = sizes = np.empty(0)
+        reference = fallback
+        if book is not None:
+            with book.lock:
+                book_side = book.asks if side == 'buy' else book.bids
+                prices, sizes, _ = book_side.top(self.depth)
+                reference = book.mid() or fallback
+        if not reference:
+            raise ValueError(f"no replayed price for {symbol} yet")
+        info = self.instruments.peek(symbol)
+        qty = round(notional / reference, info.qty_precision if info else 3)
+        filled, average = fill_market(prices, sizes, qty)
+        if filled < qty:
+            rest = qty - filled
+            last = float(prices[-1]) if len(prices) else fallback or reference
+            average = ((average or 0) * filled + last * rest) / qty
+        signed = qty if side == 'buy' else -qty
+        self._book_position(symbol, signed, average)
+        slippage = (average / reference - 1) * 10_000 * (1 if side == 'buy' else -1)
+        held, entry = self.positions.get(symbol, (0.0, 0.0))
+        print(f"Simulated {side} {qty} {symbol} at {average:.6g} ({slippage:+.1f} bps vs mid); "
+              f"position {held:+g} at {entry:.6g}, realized PnL {self.realized:+.2f} USDT")
+        fill = {"symbol": symbol, "side": side, "qty": qty, "price": average, "slippage_bps": slippage}
+        self.fills.append(fill)
+        return fill
+
+    def _book_position(self, symbol, signed, price):
+        held, entry = self.positions.get(symbol, (0.0, 0.0))
+        if held and (held > 0) != (signed > 0):
+            closed = min(abs(held), abs(signed))
+            self.realized += closed * (price - entry) * (1 if held > 0 else -1)
+        total = held + signed
+        if not total:
+            self.positions.pop(symbol, None)
+        elif held and (held > 0) == (total > 0) and abs(total) < abs(held):
+            self.positions[symbol] = (total, entry)  # Reduced: entry unchanged
+        elif held and (held > 0) == (signed > 0):
+            self.positions[symbol] = (total, (held * entry + signed * price) / total)
+        else:
+            self.positions[symbol] = (total, price)  # Opened, or flipped through zero
+
+
+class ReplayBar:
+    """Play/pause, speed, position and go-to-time controls for a ReplayStream."""
+
+    def __init__(self, parent, stream, refresh_ms=200):
+        self.stream = stream
+        self.refresh_ms = refresh_ms
+        self.frame = tk.Frame(parent)
+        self.button = tk.Button(self.frame, text="Play", width=6, command=self.toggle)
+        self.button.pack(side=tk.LEFT, padx=2)
+        label = next((name for name, speed in SPEEDS.items() if speed == stream.speed), "1x")
+        self.speed_var = tk.StringVar(value=label)
+        tk.OptionMenu(self.frame, self.speed_var, *SPEEDS,
+                      command=lambda name: stream.set_speed(SPEEDS[name])).pack(side=tk.LEFT, padx=2)
+        self.position = tk.Scale(self.frame, from_=0, to=1000, orient=tk.HORIZONTAL, showvalue=False, length=300)
+        self.position.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=2)
+        self.position.bind("<ButtonPress-1>", lambda e: setattr(self, "dragging", True))
+        self.position.bind("<ButtonRelease-1>", self._on_release)
+        self.goto = tk.Entry(self.frame, width=20)
+        self.goto.pack(side=tk.LEFT, padx=2)
+        self.goto.bind("<Return>", self._on_goto)
+        self.clock_label = tk.Label(self.frame, font=("Arial", 10), width=36, anchor="w")
+        self.clock_label.pack(side=tk.LEFT, padx=2)
+        self.dragging = False
+        self._counted = (time.monotonic(), 0)
+        self._refresh()
+
+    def pack(self, **kwargs):
+        self.frame.pack(**kwargs)
+
+    def toggle(self):
+        if self.stream.playing:
+            self.stream.pause()
+        else:
+            self.stream.play()
+
+    def _on_release(self, event):
+        self.dragging = False
+        span = self.stream.end_ts - self.stream.start_ts
+        self.stream.seek(self.stream.start_ts + span * self.position.get() / 1000)
+
+    def _on_goto(self, event):
+        text = self.goto.get().strip()
+        for fmt in ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M", "%Y-%m-%d"):
+            try:
+                moment = datetime.strptime(text, fmt).replace(tzinfo=timezone.utc)
+            except ValueError:
+                continue
+            self.stream.seek(moment.timestamp() * 1000)
+            return
+        print(f"Replay: cannot read time {text!r}; use YYYY-MM-DD HH:MM[:SS] (UTC)")
+
+    def _refresh(self):
+        stream = self.stream
+        now, dispatched = time.monotonic(), stream.dispatched
+        rate = (dispatched - self._counted[1]) / max(now - self._counted[0], 1e-6)
+        self._counted = (now, dispatched)
+        moment = datetime.fromtimestamp(stream.clock / 1000, timezone.utc)
+        self.clock_label.config(text=f"{moment:%Y-%m-%d %H:%M:%S} UTC  {rate:,.0f} msg/s")
+        self.button.config(text="Pause" if stream.playing else "Play")
+        if not self.dragging:
+            span = max(stream.end_ts - stream.start_ts, 1)
+            self.position.set(round((stream.clock - stream.start_ts) / span * 1000))
+        self.frame.after(self.refresh_ms, self._refresh)
@@ -0,0 +1,70 @@
+import numpy as np
+import pandas as pd
+
+BASE_INTERVAL = "1"
+
+# Bybit intervals that are whole multiples of one minute and aligned to the epoch
+INTERVAL_MINUTES = {
+    "1": 1, "3": 3, "5": 5, "15": 15, "30": 30, "60": 60,
+    "120": 120, "240": 240, "360": 360, "720": 720, "D": 1440
+}
+
+
+def can_resample(interval):
+    return str(interval) in INTERVAL_MINUTES
+
+
+def resample(df, interval):
+    """Aggregate 1-minute OHLCV candles into `interval` candles.
+
+    Buckets are aligned to the epoch like Bybit's own klines, so a partial
+    bucket at either end is simply a candle with fewer minutes in it.
+    """
+    if df.empty:
+        return df
+    ms = INTERVAL_MINUTES[str(interval)] * 60_000
+    ts = df.index.as_unit('ms').asi8
+    buckets = ts - ts % ms
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    ends = np.r_[starts[1:], len(ts)] - 1
+    out = {
+        "open": df["open"].to_numpy()[starts],
+        "high": np.maximum.reduceat(df["high"].to_numpy(), starts),
+        "low": np.minimum.reduceat(df["low"].to_numpy(), starts),
+        "close": df["close"].to_numpy()[ends],
+    }
+    for column in ("volume", "turnover"):
+        if column in df:
+            out[column] = np.add.reduceat(df[column].to_numpy(), starts)
+    index = pd.to_datetime(buckets[starts], unit='ms', utc=True)
+    index.name = df.index.name
+    return pd.DataFrame(out, index=index)
+
+
+class ResampledSeries:
+    """One higher timeframe kept in step with a growing 1-minute series.
+
+    update() re-aggregates only the 1-minute candles from the start of the
+    current (last) bucket onwards, unless the base gained older history, in
+    which case it rebuilds everything once.
+    """
+
+    def __init__(self, interval, max_candles=1000):
+        self.interval = str(interval)
+        self.max_candles = max_candles
+        self.frame = None
+        self.base_start = None
+
+    def update(self, base):
+        if base.empty:
+            return base
+        if self.frame is None or self.frame.empty or base.index[0] < self.base_start:
+            self.frame = resample(base, self.interval)
+        else:
+            last_start = self.frame.index[-1]
+            tail = base.iloc[base.index.searchsorted(last_start):]
+            self.frame = pd.concat([self.frame.iloc[:-1], resample(tail, self.interval)])
+        self.base_start = base.index[0]
+        if len(self.frame) > self.max_candles:
+            self.frame = self.frame.iloc[-self.max_candles:]
+        return self.frame
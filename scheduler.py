@@ -0,0 +1,97 @@
+import queue
+
+
+class Job:
+    def __init__(self, name, interval_ms, fetch, apply, key):
+        self.name = name
+        self.interval_ms = interval_ms
+        self.fetch = fetch
+        self.apply = apply
+        self.key = key
+        self.in_flight = False
+        self.pending = False
+
+
+class RefreshScheduler:
+    """Owns every periodic refresh in a Tk app.
+
+    Each job has one timer chain. `fetch(key)` runs on the shared
+    netloop.NetworkLoop and `apply(result)` runs back on the Tk thread. A refresh requested while
+    the job is in flight is merged into a single follow-up run, and a result
+    is dropped if the job's key (e.g. symbol and timeframe) changed while it
+    was being fetched. A fetch returning None skips apply, and a job whose
+    apply is None only runs its fetch.
+    """
+
+    def __init__(self, root, network, poll_ms=50):
+        self.root = root
+        self.network = network
+        self.poll_ms = poll_ms
+        self.jobs = {}
+        self.results = queue.Queue()
+        self.running = False
+
+    def add_job(self, name, interval_ms, fetch, apply, key=lambda: None):
+        """Register a job; interval_ms may be a callable returning the delay."""
+        job = self.jobs[name] = Job(name, interval_ms, fetch, apply, key)
+        if self.running:
+            self._tick(job)
+
+    def remove_job(self, name):
+        """Drop a job; its timer chain ends and an in-flight result is discarded."""
+        self.jobs.pop(name, None)
+
+    def start(self):
+        self.running = True
+        self._drain()
+        for job in list(self.jobs.values()):
+            self._tick(job)
+
+    def stop(self):
+        self.running = False
+
+    def request(self, name):
+        """Refresh a job now, or right after the run already in flight."""
+        job = self.jobs.get(name)
+        if job is None or not self.running:
+            return
+        if job.in_flight:
+            job.pending = True
+            return
+        job.in_flight = True
+        key = job.key()
+        self.network.submit(
+            job.fetch, key,
+            callback=lambda result, error: self.results.put((job, key, result, error))
+        )
+
+    def _tick(self, job):
+        if self.jobs.get(job.name) is not job or not self.running:
+            return  # Removed, or replaced by a job with its own timer chain
+        self.request(job.name)
+        delay = job.interval_ms() if callable(job.interval_ms) else job.interval_ms
+        self.root.after(delay, self._tick, job)
+
+    def _drain(self):
+        if not self.running:
+            return
+        while True:
+            try:
+                job, key, result, error = self.results.get_nowait()
+            except queue.Empty:
+                break
+            name = job.name
+            job.in_flight = False
+            if self.jobs.get(name) is not job:
+                continue  # Removed while in flight
+            if error is not None:
+                print(f"Error refreshing {name}: {error}")
+            elif result is not None and job.apply is not None and key == job.key():
+                try:
+                    job.apply(result)
+                except Exception as e:
+                    print(f"Error applying {name}: {e}")
+            if job.pending:
+                job.pending = False
+                self.request(name)
+        self.root.after(self.poll_ms, self._drain)
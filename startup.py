@@ -0,0 +1,49 @@
+import importlib
+import threading
+import time
+
+
+class StartupTimer:
+    """Startup milestones in ms since `started` (a perf_counter() taken before the imports)."""
+
+    def __init__(self, started):
+        self.started = started
+        self.marks = []
+        self.reported = False
+
+    def mark(self, name):
+        self.marks.append((name, (time.perf_counter() - self.started) * 1000))
+
+    def report(self):
+        if self.reported:
+            return
+        self.reported = True
+        print("Startup: " + ", ".join(f"{name} {ms:.0f} ms" for name, ms in self.marks))
+
+
+def import_modules(names):
+    """Import modules by name so the app's own imports of them are dict lookups later."""
+    for name in names:
+        importlib.import_module(name)
+
+
+def run_in_background(root, fn, on_done, poll_ms=20):
+    """Run fn() on a thread and call on_done(result, error) on the Tk thread."""
+    outcome = {}
+
+    def target():
+        try:
+            outcome["result"] = fn()
+        except Exception as e:
+            outcome["error"] = e
+
+    thread = threading.Thread(target=target, daemon=True)
+    thread.start()
+
+    def poll():
+        if thread.is_alive():
+            root.after(poll_ms, poll)
+        else:
+            on_done(outcome.get("result"), outcome.get("error"))
+
+    root.after(poll_ms, poll)
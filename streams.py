@@ -0,0 +1,156 @@
+import json
+import os
+import threading
+import time
+import websocket
+from parsing import loads
+
+PUBLIC_URL = os.environ.get("BYBIT_WS_PUBLIC", "wss://stream.bybit.com/v5/public/linear")
+PING_INTERVAL = 20
+
+
+def kline_topic(symbol, interval):
+    return f"kline.{interval}.{symbol}"
+
+
+def orderbook_topic(symbol, depth=50):
+    return f"orderbook.{depth}.{symbol}"
+
+
+def ticker_topic(symbol):
+    return f"tickers.{symbol}"
+
+
+def kline_rows_to_records(rows):
+    """Convert pushed kline dicts into REST-style rows, newest first."""
+    return [
+        [r['start'], r['open'], r['high'], r['low'], r['close'], r['volume'], r['turnover']]
+        for r in reversed(rows)
+    ]
+
+
+class MarketStream:
+    """Bybit public WebSocket feed dispatching messages to per-topic callbacks.
+
+    Runs on a daemon thread, reconnects with backoff and resubscribes every
+    topic after a reconnect. Callbacks run on that thread, so UI code must hand
+    results to Tk with root.after(). Pass `record_to` to append every raw
+    message to a file that ws_replay.py can play back later; it is opened by
+    start(), flushed after every message and closed by stop().
+    """
+
+    def __init__(self, url=PUBLIC_URL, record_to=None):
+        self.url = url
+        self.record_to = record_to
+        self._callbacks = {}
+        self._last_message = {}
+        self._lock = threading.Lock()
+        self._ws = None
+        self._connected = False
+        self._running = False
+        self._record = None
+        self._record_lock = threading.Lock()
+
+    def start(self):
+        if self._running:
+            return
+        self._running = True
+        if self.record_to:
+            self._record = open(self.record_to, "a")
+        threading.Thread(target=self._run, daemon=True).start()
+        threading.Thread(target=self._ping_loop, daemon=True).start()
+
+    def stop(self):
+        self._running = False
+        if self._ws is not None:
+            self._ws.close()
+        with self._record_lock:
+            if self._record is not None:
+                self._record.close()
+                self._record = None
+
+    def subscribe(self, topic, callback):
+        with self._lock:
+            new = topic not in self._callbacks
+            self._callbacks.setdefault(topic, []).append(callback)
+        if new:
+            self._send({"op": "subscribe", "args": [topic]})
+
+    def unsubscribe(self, topic, callback=None):
+        with self._lock:
+            callbacks = self._callbacks.get(topic, [])
+            if callback in callbacks:
+                callbacks.remove(callback)
+            if callback is None or not callbacks:
+                self._callbacks.pop(topic, None)
+                self._last_message.pop(topic, None)
+                gone = True
+            else:
+                gone = False
+        if gone:
+            self._send({"op": "unsubscribe", "args": [topic]})
+
+    def is_live(self, topic, max_age=10):
+        """True if the topic delivered a message within the last max_age seconds."""
+        last = self._last_message.get(topic)
+        return self._connected and last is not None and time.monotonic() - last < max_age
+
+    def _send(self, payload):
+        if self._connected:
+            try:
+                self._ws.send(json.dumps(payload))
+            except Exception as e:
+                print(f"Error sending to stream: {e}")
+
+    def _run(self):
+        delay = 1
+        while self._running:
+            self._ws = websocket.WebSocketApp(
+                self.url,
+                on_open=self._on_open,
+                on_message=self._on_message,
+                on_error=lambda ws, err: print(f"Error on stream: {err}"),
+                on_close=self._on_close
+            )
+            opened_at = time.monotonic()
+            self._ws.run_forever()
+            if not self._running:
+                break
+            if time.monotonic() - opened_at > 60:
+                delay = 1
+            time.sleep(delay)
+            delay = min(delay * 2, 30)
+
+    def _ping_loop(self):
+        while self._running:
+            time.sleep(PING_INTERVAL)
+            self._send({"op": "ping"})
+
+    def _on_open(self, ws):
+        self._connected = True
+        with self._lock:
+            topics = list(self._callbacks)
+        if topics:
+            self._send({"op": "subscribe", "args": topics})
+
+    def _on_close(self, ws, status, reason):
+        self._connected = False
+
+    def _on_message(self, ws, raw):
+        if self._record is not None:
+            with self._record_lock:
+                if self._record is not None:  # Not closed by stop() meanwhile
+                    self._record.write(raw.strip() + "\n")
+                    self._record.flush()
+        message = loads(raw)
+        topic = message.get('topic')
+        if not topic:
+            return  # subscribe acks and pongs
+        self._last_message[topic] = time.monotonic()
+        with self._lock:
+            callbacks = list(self._callbacks.get(topic, ()))
+        for callback in callbacks:
+            try:
+                callback(message)
+            except Exception as e:
+                print(f"Error handling {topic} message: {e}")
@@ -0,0 +1,84 @@
+import os
+import sys
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from netloop import NetworkLoop
+
+MINUTE_MS = 60_000
+T0 = 1_700_000_000_000 - 1_700_000_000_000 % (240 * MINUTE_MS)  # Aligned to every interval up to 4h
+
+
+def kline(ts, minutes=1):
+    """One raw kline row as the REST API returns it, derived from its timestamp."""
+    i = (ts - T0) // (minutes * MINUTE_MS)
+    price = 100 + (i * 7919 % 101) / 10
+    return [str(ts), str(price), str(price + 1), str(price - 1), str(price + 0.5), str(1 + i % 5), str(100 * price)]
+
+
+class FakeExchange:
+    """Stands in for candles.fetch_klines: candles every minute from `first` to `last`."""
+
+    def __init__(self, first=T0, last=T0 + 5000 * MINUTE_MS):
+        self.first = first
+        self.last = last
+        self.calls = []
+
+    def __call__(self, symbol, interval, limit=50, start=None, end=None):
+        self.calls.append((symbol, interval, limit, start, end))
+        minutes = int(interval)
+        step = minutes * MINUTE_MS
+        hi = self.last if end is None else min(self.last, end)
+        hi -= (hi - self.first) % step
+        lo = self.first if start is None else max(self.first, start)
+        rows = []
+        ts = hi
+        while ts >= lo and len(rows) < limit:
+            rows.append(kline(ts, minutes))
+            ts -= step
+        return rows
+
+
+class FakeRoot:
+    """Just enough of tk.Tk for code that schedules work with after().
+
+    run_pending() runs everything scheduled so far whatever its delay;
+    advance(ms) moves a fake clock and runs only what has come due.
+    """
+
+    def __init__(self):
+        self.pending = []
+        self.now = 0
+
+    def after(self, ms, fn, *args):
+        self.pending.append((self.now + ms, fn, args))
+
+    def run_pending(self):
+        pending, self.pending = self.pending, []
+        for _, fn, args in pending:
+            fn(*args)
+
+    def advance(self, ms):
+        self.now += ms
+        due = [entry for entry in self.pending if entry[0] <= self.now]
+        self.pending = [entry for entry in self.pending if entry[0] > self.now]
+        for _, fn, args in due:
+            fn(*args)
+
+
+@pytest.fixture
+def exchange():
+    return FakeExchange()
+
+
+@pytest.fixture
+def root():
+    return FakeRoot()
+
+
+@pytest.fixture
+def network():
+    loop = NetworkLoop()
+    yield loop
+    loop.stop()
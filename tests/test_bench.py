@@ -0,0 +1,48 @@
+import json
+import pytest
+import bench
+from bench import StandInServer, load_responses, make_klines, make_orderbook, make_tickers, report
+from netloop import make_session
+from parsing import records_to_array
+
+
+@pytest.fixture
+def server():
+    server = StandInServer(load_responses(None))
+    server.start()
+    yield server
+    server.stop()
+
+
+def test_synthesized_responses_look_like_bybit():
+    klines = make_klines(5)["result"]["list"]
+    assert len(klines) == 5
+    times = [int(row[0]) for row in klines]
+    assert times == sorted(times, reverse=True)  # Newest first
+    assert all(float(row[3]) <= min(float(row[1]), float(row[4])) for row in klines)
+    book = make_orderbook(3)["result"]
+    assert float(book["a"][0][0]) > float(book["b"][0][0])
+    assert len(make_tickers(4)["result"]["list"]) == 4
+
+
+def test_stand_in_cuts_responses_to_the_requested_limit(server):
+    session = make_session()
+    url = server.url + bench.ENDPOINTS["kline"]
+    response = session.get(url, params={"symbol": "BTCUSDT", "interval": "1", "limit": 50}, timeout=5)
+    assert len(records_to_array(response.json()["result"]["list"])) == 50
+    book = session.get(server.url + bench.ENDPOINTS["orderbook"], params={"limit": 10}, timeout=5).json()
+    assert len(book["result"]["a"]) == len(book["result"]["b"]) == 10
+    assert session.get(server.url + "/v5/unknown", timeout=5).status_code == 404
+
+
+def test_recorded_responses_are_loaded_by_endpoint(tmp_path):
+    for name in bench.ENDPOINTS:
+        (tmp_path / f"{name}.json").write_text(json.dumps(make_tickers(1)))
+    assert set(load_responses(str(tmp_path))) == set(bench.ENDPOINTS)
+
+
+def test_report_flags_only_real_slowdowns(capsys):
+    baseline = {"kline.parse/50": 1.0, "render.last/50": 0.05, "book.build/50": 2.0}
+    results = {"kline.parse/50": 1.5, "render.last/50": 0.1, "book.build/50": 2.1, "tickers.parse/all": 3.0}
+    assert report(results, baseline) == ["kline.parse/50"]  # The 0.05 ms render change is noise
+    assert "REGRESSION" in capsys.readouterr().out
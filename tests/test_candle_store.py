@@ -0,0 +1,85 @@
+import numpy as np
+import pytest
+from candle_store import CandleStore
+from conftest import MINUTE_MS, T0, FakeExchange
+from parsing import records_to_array
+
+
+@pytest.fixture
+def store(tmp_path):
+    return CandleStore(str(tmp_path))
+
+
+def minutes(exchange, first, last):
+    """Stored candles for minutes first..last of the exchange, as a write() array."""
+    return records_to_array(exchange("BTCUSDT", "1", limit=last - first + 1, end=T0 + last * MINUTE_MS))
+
+
+def timestamps(store):
+    return ((store.read("BTCUSDT", "1")["timestamp"] - T0) // MINUTE_MS).tolist()
+
+
+def test_write_appends_updates_in_place_and_rebuilds_for_older_history(store, exchange):
+    store.write("BTCUSDT", "1", minutes(exchange, 10, 19))
+    store.write("BTCUSDT", "1", minutes(exchange, 18, 24))  # Last two updated, five appended
+    assert timestamps(store) == list(range(10, 25))
+
+    changed = minutes(exchange, 15, 15)
+    changed["close"] = 1.5
+    store.write("BTCUSDT", "1", changed)
+    assert store.read("BTCUSDT", "1", start=T0 + 15 * MINUTE_MS, end=T0 + 15 * MINUTE_MS)["close"].tolist() == [1.5]
+
+    store.write("BTCUSDT", "1", minutes(exchange, 5, 12))  # Older history in front
+    assert timestamps(store) == list(range(5, 25))
+    assert store.read("BTCUSDT", "1")["close"][10] == 1.5  # Kept through the rebuild
+
+
+def test_write_fills_holes_inside_the_file(store, exchange):
+    store.write("BTCUSDT", "1", minutes(exchange, 0, 4))
+    store.write("BTCUSDT", "1", minutes(exchange, 10, 14))
+    store.write("BTCUSDT", "1", minutes(exchange, 3, 11))
+    assert timestamps(store) == list(range(15))
+    np.testing.assert_array_equal(store.read("BTCUSDT", "1"), minutes(exchange, 0, 14))
+
+
+def test_sync_pages_back_to_the_stored_candles(store):
+    exchange = FakeExchange(last=T0 + 2999 * MINUTE_MS)
+    store.write("BTCUSDT", "1", minutes(exchange, 0, 499))
+    exchange.calls.clear()
+
+    store.sync("BTCUSDT", "1", fetch=exchange)
+
+    assert timestamps(store) == list(range(3000))
+    assert [call[3:] for call in exchange.calls] == [
+        (T0 + 499 * MINUTE_MS, None),
+        (T0 + 499 * MINUTE_MS, T0 + 2000 * MINUTE_MS - 1),
+        (T0 + 499 * MINUTE_MS, T0 + 1000 * MINUTE_MS - 1),
+    ]
+
+
+def test_sync_on_an_empty_store_fetches_the_latest_candles(store, exchange):
+    store.sync("BTCUSDT", "1", fetch=exchange, limit=50)
+    assert timestamps(store) == list(range(4951, 5001))
+    assert exchange.calls == [("BTCUSDT", "1", 50, None, None)]
+
+
+def test_sync_replaces_history_it_cannot_reach(store, capsys):
+    exchange = FakeExchange(last=T0 + 2999 * MINUTE_MS)
+    store.write("BTCUSDT", "1", minutes(exchange, 0, 499))
+
+    store.sync("BTCUSDT", "1", fetch=exchange, max_pages=2)
+
+    assert timestamps(store) == list(range(1000, 3000))  # No gap between minute 499 and 1000
+    assert "replacing the stored history" in capsys.readouterr().out
+
+
+def test_truncated_file_keeps_its_whole_records(store, exchange):
+    store.write("BTCUSDT", "1", minutes(exchange, 0, 9))
+    path = store.path("BTCUSDT", "1")
+    with open(path, "ab") as f:
+        f.write(minutes(exchange, 10, 10).tobytes()[:-3])  # Crashed mid-append
+
+    assert timestamps(store) == list(range(10))
+    store.write("BTCUSDT", "1", minutes(exchange, 9, 12))
+    assert timestamps(store) == list(range(13))
+    np.testing.assert_array_equal(store.read("BTCUSDT", "1"), minutes(exchange, 0, 12))
@@ -0,0 +1,34 @@
+from candle_store import CandleStore
+from candles import CandleCache
+from conftest import MINUTE_MS, T0, FakeExchange, kline
+
+
+def test_stream_update_swaps_in_a_new_frame(exchange):
+    cache = CandleCache(history=50, fetch=exchange)
+    cache.get("BTCUSDT", "1")
+    held = cache._frames[("BTCUSDT", "1")]  # What a reader may still be copying
+    before = held.copy()
+
+    last = T0 + 5000 * MINUTE_MS
+    ticked = kline(last)
+    ticked[4] = "1.5"
+    assert cache.apply_stream("BTCUSDT", "1", [kline(last + MINUTE_MS), ticked])
+
+    assert held.equals(before)
+    df = cache.local("BTCUSDT", "1")
+    assert len(df) == 51
+    assert df["close"].iloc[-2] == 1.5
+    assert df.index.is_monotonic_increasing
+
+
+def test_invalidating_a_resampled_interval_drops_its_base(tmp_path):
+    exchange = FakeExchange()
+    cache = CandleCache(history=50, fetch=exchange, store=CandleStore(str(tmp_path)))
+    cache.get("BTCUSDT", "5")
+    assert cache.source_interval("5") == "1"
+    assert cache.has("BTCUSDT", "5")
+
+    cache.invalidate("BTCUSDT", "5")
+
+    assert not cache.has("BTCUSDT", "5")
+    assert not cache.has("BTCUSDT", "1")
@@ -0,0 +1,76 @@
+import io
+import json
+import threading
+from candle_store import CandleStore
+from candles import CandleCache
+from collector import Collector, RowWriter
+from conftest import MINUTE_MS, T0, FakeExchange, kline
+
+
+class Stream:
+    def start(self):
+        pass
+
+    def subscribe(self, topic, callback):
+        self.topic = topic
+
+    def stop(self):
+        pass
+
+
+def kline_push(ts, confirm):
+    t, o, h, l, c, v, turnover = kline(ts)
+    row = {"start": ts, "end": ts + MINUTE_MS - 1, "interval": "1", "open": o, "high": h, "low": l,
+           "close": c, "volume": v, "turnover": turnover, "confirm": confirm, "timestamp": ts}
+    return {"topic": "kline.1.BTCUSDT", "type": "snapshot", "ts": ts, "data": [row]}
+
+
+def test_resampled_interval_emits_each_candle_once_when_its_bucket_closes(tmp_path):
+    last = T0 + 99 * MINUTE_MS
+    out = io.StringIO()
+    cache = CandleCache(history=20, store=CandleStore(str(tmp_path)), fetch=FakeExchange(last=last))
+    stream = Stream()
+    collector = Collector(["BTCUSDT"], "5", RowWriter(out, "ndjson"), cache, stream, book_every=0)
+    collector.start()
+    assert stream.topic == "kline.1.BTCUSDT"  # 5m is built from the 1m stream
+
+    for minute in range(1, 11):
+        ts = last + minute * MINUTE_MS
+        collector.on_kline_message(kline_push(ts, confirm=False))
+        collector.on_kline_message(kline_push(ts, confirm=True))
+
+    rows = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert [row["timestamp"] for row in rows] == [T0 + 100 * MINUTE_MS, T0 + 105 * MINUTE_MS]
+    assert rows[0]["volume"] == sum(float(kline(T0 + m * MINUTE_MS)[5]) for m in range(100, 105))
+
+
+def test_failed_history_is_reloaded_off_the_stream_thread(tmp_path, capsys):
+    last = T0 + 99 * MINUTE_MS
+    exchange = FakeExchange(last=last)
+    gate, reloading = threading.Event(), threading.Event()
+    threads = []
+
+    def fetch(*args, **kwargs):
+        threads.append(threading.current_thread().name)
+        if len(threads) == 1:
+            raise ValueError("timeout")
+        reloading.set()
+        gate.wait(5)
+        return exchange(*args, **kwargs)
+
+    cache = CandleCache(history=20, store=CandleStore(str(tmp_path)), fetch=fetch)
+    collector = Collector(["BTCUSDT"], "1", RowWriter(io.StringIO(), "ndjson"), cache, Stream(), book_every=0)
+    collector.start()
+    assert "Error loading BTCUSDT history: timeout" in capsys.readouterr().err
+    try:
+        for minute in range(1, 4):  # Returns at once though the reload is blocked
+            collector.on_kline_message(kline_push(last + minute * MINUTE_MS, confirm=True))
+        assert reloading.wait(5)
+        assert len(threads) == 2  # One reload for the three pushes
+        assert threads[1].startswith("history")
+        gate.set()
+        collector.loader.shutdown(wait=True)
+        assert cache.has("BTCUSDT", "1")
+    finally:
+        gate.set()
+        collector.stop()
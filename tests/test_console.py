@@ -0,0 +1,152 @@
+import logging
+import pytest
+import console
+from console import ConsoleHandler, ConsoleStream, LogConsole, classify
+
+
+class Widget:
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def pack(self, **kwargs):
+        pass
+
+
+class StringVar:
+    def __init__(self, value=None):
+        self.value = value
+
+
+class Text(Widget):
+    """Lines and their tags, plus the after() callback LogConsole reschedules."""
+
+    def __init__(self, *args, **kwargs):
+        self.lines = []
+        self.inserts = 0
+        self.scheduled = None
+
+    def configure(self, **options):
+        pass
+
+    def tag_configure(self, tag, **options):
+        pass
+
+    def insert(self, index, text, tag=()):
+        self.inserts += 1
+        self.lines += [(line, tag) for line in text.split("\n")[:-1]]
+
+    def delete(self, start, end):
+        if end == console.tk.END:
+            self.lines = []
+        else:
+            del self.lines[:int(end.split(".")[0]) - 1]
+
+    def yview(self):
+        return 0.0, 1.0
+
+    def see(self, index):
+        pass
+
+    def after(self, ms, fn):
+        self.scheduled = fn
+
+
+@pytest.fixture
+def make_console(monkeypatch):
+    for name in ("Frame", "Label", "OptionMenu"):
+        monkeypatch.setattr(console.tk, name, Widget)
+    monkeypatch.setattr(console.tk, "StringVar", StringVar)
+    monkeypatch.setattr(console.tk, "Text", Text)
+
+    def make(**kwargs):
+        log = LogConsole(None, **kwargs)
+        log.start()
+        return log
+
+    return make
+
+
+def flush(log):
+    log.text.scheduled()
+
+
+def shown(log):
+    return [line for line, _ in log.text.lines]
+
+
+def test_lines_are_drawn_in_one_batch_and_trimmed_to_max_lines(make_console):
+    log = make_console(max_lines=5)
+    for i in range(8):
+        log.put(logging.INFO, f"line {i}")
+    flush(log)
+    assert shown(log) == [f"line {i}" for i in range(3, 8)]
+    assert log.text.inserts == 1
+
+    for i in range(8, 10):
+        log.put(logging.INFO, f"line {i}")
+    flush(log)
+    assert shown(log) == [f"line {i}" for i in range(5, 10)]
+    assert [line for _, line in log.lines] == shown(log)
+
+
+def test_level_filter_hides_lines_the_ring_keeps(make_console):
+    log = make_console(max_lines=10)
+    log.put(logging.INFO, "tick")
+    log.put(logging.WARNING, "Warning: slow")
+    log.put(logging.ERROR, "Error fetching balance")
+    flush(log)
+
+    log.set_level(logging.WARNING)
+    assert log.text.lines == [("Warning: slow", "WARNING"), ("Error fetching balance", "ERROR")]
+    log.put(logging.INFO, "hidden")
+    flush(log)
+    assert shown(log) == ["Warning: slow", "Error fetching balance"]
+
+    log.set_level(logging.INFO)
+    assert shown(log) == ["tick", "Warning: slow", "Error fetching balance", "hidden"]
+
+
+def test_stream_queues_whole_lines_with_their_level(make_console):
+    log = make_console()
+    stream = ConsoleStream(log)
+    stream.write("Error fetching")
+    stream.write(" balance\npartial")
+    stream.write(" line\n")
+    flush(log)
+    assert log.text.lines == [("Error fetching balance", "ERROR"), ("partial line", ())]
+
+
+def test_handler_and_mirror_file(make_console, tmp_path):
+    path = tmp_path / "app.log"
+    log = make_console(mirror_path=str(path))
+    logger = logging.getLogger("test_console")
+    logger.addHandler(ConsoleHandler(log))
+    try:
+        logger.warning("stream reconnecting")
+    finally:
+        logger.handlers.clear()
+    flush(log)
+    log.close()
+    assert log.text.lines == [("stream reconnecting", "WARNING")]
+    assert path.read_text().strip().endswith("WARNING stream reconnecting")
+
+
+def test_only_a_line_prefix_sets_the_level():
+    assert classify("Error fetching balance") == logging.ERROR
+    assert classify("Traceback (most recent call last):") == logging.ERROR
+    assert classify("Warning: order book out of sync at update 7, resubscribing") == logging.WARNING
+    assert classify("Backfill done, 0 errors") == logging.INFO
+    assert classify("BTCUSDT warning light off") == logging.INFO
+    assert classify("  File \"charts.py\", line 3", logging.ERROR) == logging.ERROR  # stderr's default
+
+
+def test_mirror_goes_through_the_handler_filters(make_console, tmp_path):
+    path = tmp_path / "app.log"
+    log = make_console(mirror_path=str(path))
+    log.mirror.addFilter(lambda record: record.levelno >= logging.WARNING)
+    log.put(logging.INFO, "tick")
+    log.put(logging.ERROR, "Error fetching balance")
+    flush(log)
+    log.close()
+    assert shown(log) == ["tick", "Error fetching balance"]
+    assert [line.split(" ", 2)[2] for line in path.read_text().splitlines()] == ["ERROR Error fetching balance"]
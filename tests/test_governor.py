@@ -0,0 +1,161 @@
+import threading
+import time
+import pytest
+import requests
+from governor import GovernedSession, RateLimited, RequestGovernor
+
+FAST = {"market": (1000, 1000), "order": (1000, 1000)}
+
+
+class ApiError(Exception):
+    """Like pybit's errors, which carry the HTTP status or retCode as status_code."""
+
+    def __init__(self, message, status_code):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class Flaky:
+    """Raises the given errors in turn, then returns "ok"."""
+
+    def __init__(self, *errors):
+        self.errors = list(errors)
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return "ok"
+
+
+@pytest.fixture
+def gov(monkeypatch):
+    monkeypatch.setattr("governor.backoff_delay", lambda attempt: 0.0)
+    return RequestGovernor(groups=FAST, ip_limit=(1000, 1000), max_retries=3)
+
+
+def test_identical_calls_in_flight_share_one_request(gov):
+    release = threading.Event()
+    calls = []
+
+    def slow(symbol):
+        calls.append(symbol)
+        release.wait(5)
+        return {"symbol": symbol}
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(gov.call("market", slow, "BTCUSDT", key="k")))
+               for _ in range(5)]
+    for t in threads:
+        t.start()
+    deadline = time.monotonic() + 5
+    while gov.stats["merged"] < 4 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    release.set()
+    for t in threads:
+        t.join()
+
+    assert calls == ["BTCUSDT"]
+    assert gov.stats["merged"] == 4
+    assert results == [{"symbol": "BTCUSDT"}] * 5
+    assert gov.call("market", slow, "ETHUSDT", key="k") == {"symbol": "ETHUSDT"}  # Nothing left in flight
+
+
+def test_merged_callers_get_the_owners_error(gov):
+    release = threading.Event()
+
+    def failing():
+        release.wait(5)
+        raise ValueError("bad symbol")
+
+    errors = []
+
+    def call():
+        try:
+            gov.call("market", failing, key="k")
+        except ValueError as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=call) for _ in range(3)]
+    for t in threads:
+        t.start()
+    deadline = time.monotonic() + 5
+    while gov.stats["merged"] < 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    release.set()
+    for t in threads:
+        t.join()
+    assert len(errors) == 3
+
+
+@pytest.mark.parametrize("error", [RateLimited("HTTP 429"), ApiError("Too many visits", 10006)])
+def test_rate_limits_are_retried_and_pause_the_group(gov, error):
+    fn = Flaky(error, error)
+    assert gov.call("order", fn) == "ok"
+    assert fn.calls == 3
+    assert gov.stats["rate_limited"] == 2
+    assert gov.stats["retries"] == 2
+
+
+def test_rate_limit_retry_after_blocks_the_bucket(gov):
+    fn = Flaky(RateLimited("HTTP 429", retry_after=0.2))
+    start = time.monotonic()
+    assert gov.call("market", fn) == "ok"
+    assert time.monotonic() - start >= 0.2
+    assert gov.buckets["market"].blocked_until >= start + 0.2
+
+
+def test_connection_errors_retry_reads_but_never_orders(gov):
+    read = Flaky(requests.ConnectionError("reset"), requests.Timeout("slow"))
+    assert gov.call("market", read) == "ok"
+    assert read.calls == 3
+
+    order = Flaky(requests.Timeout("slow"))
+    with pytest.raises(requests.Timeout):
+        gov.call("order", order)
+    assert order.calls == 1
+
+
+def test_other_errors_and_exhausted_retries_are_raised(gov):
+    rejected = Flaky(ApiError("Insufficient balance", 110007))
+    with pytest.raises(ApiError):
+        gov.call("order", rejected)
+    assert rejected.calls == 1
+
+    limited = Flaky(*[RateLimited("HTTP 429")] * 10)
+    with pytest.raises(RateLimited):
+        gov.call("market", limited)
+    assert limited.calls == 4  # The first try and max_retries more
+
+
+def test_session_merges_reads_but_not_orders(gov):
+    release = threading.Event()
+
+    class Session:
+        def __init__(self):
+            self.calls = []
+
+        def get_tickers(self, **kwargs):
+            self.calls.append("get_tickers")
+            release.wait(5)
+            return kwargs
+
+        def place_order(self, **kwargs):
+            self.calls.append("place_order")
+            release.wait(5)
+            return kwargs
+
+    session = Session()
+    governed = GovernedSession(session, gov)
+    threads = [threading.Thread(target=fn, kwargs={"category": "linear", "symbol": "BTCUSDT"})
+               for fn in (governed.get_tickers, governed.get_tickers, governed.place_order, governed.place_order)]
+    for t in threads:
+        t.start()
+    deadline = time.monotonic() + 5
+    while len(session.calls) + gov.stats["merged"] < 4 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    release.set()
+    for t in threads:
+        t.join()
+    assert sorted(session.calls) == ["get_tickers", "place_order", "place_order"]
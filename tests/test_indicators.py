@@ -0,0 +1,71 @@
+import numpy as np
+import pytest
+import indicators
+from candles import klines_to_frame
+from conftest import MINUTE_MS, T0, FakeExchange
+from indicators import Indicator, IndicatorEngine
+
+
+def candles(n):
+    return klines_to_frame(FakeExchange(last=T0 + (n - 1) * MINUTE_MS)("BTCUSDT", "1", limit=n))
+
+
+def forming(df, close):
+    """`df` with its last candle still open at `close`."""
+    df = df.copy()
+    last = df.index[-1]
+    df.loc[last, "close"] = close
+    df.loc[last, "high"] = max(df.loc[last, "high"], close)
+    df.loc[last, "low"] = min(df.loc[last, "low"], close)
+    df.loc[last, "volume"] += 1
+    return df
+
+
+def assert_matches_batch(engine, df):
+    expected = IndicatorEngine().update(df)
+    for col in engine.columns:
+        np.testing.assert_allclose(engine.values[col][-len(df):], expected.values[col], rtol=1e-9,
+                                   equal_nan=True, err_msg=col)
+
+
+def test_incremental_updates_match_a_batch_over_the_same_candles():
+    full = candles(400)
+    engine = IndicatorEngine().update(full.iloc[:300])
+    for end in range(301, 401, 3):
+        df = full.iloc[:end]
+        # The open candle ticks a few times before the next one starts
+        for close in (99.0, 111.0, df["close"].iloc[-1]):
+            engine.update(forming(df, close))
+            assert_matches_batch(engine, forming(df, close))
+        engine.update(df)
+    assert_matches_batch(engine, full)
+
+
+def test_older_history_or_a_gap_falls_back_to_a_batch():
+    full = candles(400)
+    engine = IndicatorEngine(max_steps=5).update(full.iloc[200:300])
+    engine.update(full.iloc[100:300])  # Older history loaded in front
+    assert_matches_batch(engine, full.iloc[100:300])
+    engine.update(full.iloc[100:320])  # More new candles than max_steps
+    assert_matches_batch(engine, full.iloc[100:320])
+
+
+def test_a_tick_converts_only_the_new_rows(monkeypatch):
+    full = candles(400)
+    engine = IndicatorEngine().update(full.iloc[:398])
+    converted = []
+    timestamps = indicators._timestamps
+    monkeypatch.setattr(indicators, "_timestamps", lambda index: converted.append(len(index)) or timestamps(index))
+    engine.update(forming(full.iloc[:398], 105.0))
+    engine.update(full)
+    assert converted == [1, 3]  # The open candle, then it and the two new ones
+    assert_matches_batch(engine, full)
+
+
+def test_indicators_must_implement_every_method():
+    class Partial(Indicator):
+        def step(self, row):
+            return ()
+
+    with pytest.raises(TypeError):
+        Partial()
@@ -0,0 +1,114 @@
+import threading
+import time
+import pytest
+from instruments import InstrumentRegistry, decimals
+
+
+def item(symbol, tick="0.10", step="0.001", leverage="100.00", min_qty="0.001"):
+    return {"symbol": symbol, "priceFilter": {"tickSize": tick},
+            "lotSizeFilter": {"qtyStep": step, "minOrderQty": min_qty},
+            "leverageFilter": {"maxLeverage": leverage}}
+
+
+class Session:
+    """get_instruments_info() serving `pages` of items, one page per cursor."""
+
+    def __init__(self, *pages):
+        self.pages = list(pages)
+        self.calls = []
+        self.gate = None  # An Event holds requests until it is set
+
+    def get_instruments_info(self, **params):
+        self.calls.append(params)
+        if self.gate is not None:
+            self.gate.wait(5)
+        page = int(params.get("cursor", 0))
+        cursor = str(page + 1) if page + 1 < len(self.pages) else ""
+        return {"result": {"list": self.pages[page], "nextPageCursor": cursor}}
+
+
+def test_decimals():
+    assert decimals("0.010") == 2
+    assert decimals("0.5") == 1
+    assert decimals("1") == 0
+
+
+def test_load_follows_pagination_and_parses_filters():
+    session = Session([item("BTCUSDT")], [item("ETHUSDT", tick="0.01", step="0.01", leverage="50", min_qty="0.01")])
+    registry = InstrumentRegistry(session, cache_path=None)
+
+    eth = registry.get("ETHUSDT")
+
+    assert registry.symbols() == ["BTCUSDT", "ETHUSDT"]
+    assert [call.get("cursor") for call in session.calls] == [None, "1"]
+    assert (eth.tick_size, eth.qty_step, eth.price_precision, eth.qty_precision) == (0.01, 0.01, 2, 2)
+    assert (eth.max_leverage, eth.min_order_qty) == (50, 0.01)
+    with pytest.raises(KeyError):
+        registry.get("XRPUSDT")
+    assert len(session.calls) == 2  # Lookups are served from memory
+
+
+def test_stale_registry_serves_old_data_while_refreshing_in_the_background():
+    session = Session([item("BTCUSDT")])
+    registry = InstrumentRegistry(session, ttl=60, cache_path=None)
+    registry.get("BTCUSDT")
+    session.pages = [[item("BTCUSDT", tick="0.50")]]
+    registry._loaded_at -= 61
+    session.gate = threading.Event()
+
+    assert registry.get("BTCUSDT").tick_size == 0.1  # Stale but immediate
+    session.gate.set()
+    deadline = time.monotonic() + 5
+    while registry.get("BTCUSDT").tick_size != 0.5 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert registry.get("BTCUSDT").tick_size == 0.5
+    assert len(session.calls) == 2
+
+
+def test_cache_serves_the_last_load_as_stale(tmp_path):
+    path = str(tmp_path / "instruments.json")
+    InstrumentRegistry(Session([item("BTCUSDT"), item("ETHUSDT", tick="0.01")]), cache_path=path).load()
+
+    session = Session([item("BTCUSDT")])
+    session.gate = threading.Event()
+    registry = InstrumentRegistry(session, cache_path=path)
+    assert registry.load_cached()
+    assert registry.known_symbols() == ["BTCUSDT", "ETHUSDT"]
+    assert registry.peek("ETHUSDT").tick_size == 0.01
+    assert session.calls == []
+
+    assert registry.get("ETHUSDT").price_precision == 2  # Served while the refresh waits
+    session.gate.set()
+    deadline = time.monotonic() + 5
+    while registry.known_symbols() != ["BTCUSDT"] and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert registry.known_symbols() == ["BTCUSDT"]
+    assert len(session.calls) == 1
+
+
+def test_missing_or_corrupt_cache_is_not_an_error(tmp_path, capsys):
+    path = tmp_path / "instruments.json"
+    assert not InstrumentRegistry(Session(), cache_path=str(path)).load_cached()
+    path.write_text("[[1, 2")
+    assert not InstrumentRegistry(Session(), cache_path=str(path)).load_cached()
+    assert "Error reading instrument cache" in capsys.readouterr().out
+
+
+def test_without_a_session_lookups_use_the_cache_or_fail_clearly(tmp_path):
+    registry = InstrumentRegistry(None, cache_path=str(tmp_path / "instruments.json"))
+    with pytest.raises(RuntimeError, match="no session"):
+        registry.get("BTCUSDT")
+
+    InstrumentRegistry(Session([item("BTCUSDT")]), cache_path=registry.cache_path).load()
+    registry.load_cached()
+    assert registry.get("BTCUSDT").tick_size == 0.1  # Stale, but nothing to refresh with yet
+    assert registry.symbols() == ["BTCUSDT"]
+
+    registry.session = session = Session([item("BTCUSDT", tick="0.50")])
+    session.gate = threading.Event()
+    registry.get("BTCUSDT")
+    session.gate.set()
+    deadline = time.monotonic() + 5
+    while registry.peek("BTCUSDT").tick_size != 0.5 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert registry.peek("BTCUSDT").tick_size == 0.5
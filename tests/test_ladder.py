@@ -0,0 +1,116 @@
+import numpy as np
+import pytest
+import ladder
+from orderbook import OrderBook
+
+
+class Canvas:
+    """Records what LadderView does to its canvas items; needs no display."""
+
+    def __init__(self, parent, **options):
+        self.items = {}
+        self.configured = []
+        self.moved = []
+
+    def _create(self, **options):
+        item = len(self.items) + 1
+        self.items[item] = options
+        return item
+
+    def create_rectangle(self, *coords, **options):
+        return self._create(coords=coords, **options)
+
+    def create_text(self, *coords, **options):
+        return self._create(coords=coords, **options)
+
+    def itemconfigure(self, item, **options):
+        self.items[item].update(options)
+        self.configured.append(item)
+
+    def coords(self, item, *coords):
+        self.items[item]["coords"] = coords
+        self.moved.append(item)
+
+    def bind(self, *args):
+        pass
+
+    def yview_moveto(self, fraction):
+        pass
+
+    def yview_scroll(self, *args):
+        pass
+
+    def reset(self):
+        self.configured, self.moved = [], []
+
+
+@pytest.fixture
+def view(monkeypatch):
+    monkeypatch.setattr(ladder.tk, "Canvas", Canvas)
+    return ladder.LadderView(None, depth=5, visible_levels=5)
+
+
+def sides(book, depth=5):
+    return book.asks.top(depth), book.bids.top(depth)
+
+
+def snapshot():
+    book = OrderBook()
+    book.load_snapshot([["101", "1"], ["102", "2"], ["103", "3"]], [["100", "1"], ["99", "2"], ["98", "3"]], 1)
+    return book
+
+
+def row_items(view, side, i):
+    bar, texts = view._rows[side][i]
+    return [bar] + texts
+
+
+def test_first_render_fills_every_level(view):
+    asks, bids = sides(snapshot())
+    view.render(asks, bids, price_precision=1, qty_precision=0, summary="Mid Price: 100.5")
+    canvas = view.canvas
+    texts = [canvas.items[item]["text"] for item in row_items(view, "ask", 0)[1:]]
+    assert texts == ["101.0", "1", "1"]
+    assert [canvas.items[item]["text"] for item in row_items(view, "bid", 2)[1:]] == ["98.0", "3", "6"]
+    assert canvas.items[row_items(view, "ask", 3)[1]].get("text", "") == ""  # Only three levels
+    assert canvas.items[view._summary]["text"] == "Mid Price: 100.5"
+
+
+def test_second_render_only_touches_changed_rows(view):
+    book = snapshot()
+    view.render(*sides(book), price_precision=1, qty_precision=0, summary="same")
+    view.canvas.reset()
+
+    book.apply({"type": "delta", "data": {"a": [["103", "4"]], "b": [], "u": 2}})
+    view.render(*sides(book), price_precision=1, qty_precision=0, summary="same")
+
+    ask_qty, ask_total = row_items(view, "ask", 2)[2:]
+    assert sorted(view.canvas.configured) == sorted([ask_qty, ask_total])
+    assert view.canvas.items[ask_qty]["text"] == "4"
+    # The deepest ask total is the new maximum: every other depth bar shrinks, it stays full width
+    bars = [view._rows[side][i][0] for side in ("ask", "bid") for i in range(3)]
+    assert sorted(view.canvas.moved) == sorted(bar for bar in bars if bar != row_items(view, "ask", 2)[0])
+
+
+def test_unchanged_book_touches_nothing(view):
+    asks, bids = sides(snapshot())
+    view.render(asks, bids, price_precision=1, summary="same")
+    view.canvas.reset()
+    view.render(asks, bids, price_precision=1, summary="same")
+    assert view.canvas.configured == []
+    assert view.canvas.moved == []
+
+
+def test_removed_level_is_cleared(view):
+    book = snapshot()
+    view.render(*sides(book), price_precision=1, qty_precision=0)
+    view.canvas.reset()
+    book.apply({"type": "delta", "data": {"a": [], "b": [["98", "0"]], "u": 2}})
+    view.render(*sides(book), price_precision=1, qty_precision=0)
+
+    cleared = row_items(view, "bid", 2)[1:]
+    assert sorted(view.canvas.configured) == sorted(cleared)
+    assert all(view.canvas.items[item]["text"] == "" for item in cleared)
+    bar = row_items(view, "bid", 2)[0]
+    x0, _, x1, _ = view.canvas.items[bar]["coords"]
+    assert np.isclose(x0, x1)  # Empty depth bar
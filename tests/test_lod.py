@@ -0,0 +1,85 @@
+import numpy as np
+from candles import klines_to_frame
+from conftest import MINUTE_MS, T0, FakeExchange
+from lod import C, H, L, O, T, V, CandlePyramid, frame_rows
+
+
+def rows(n):
+    return frame_rows(klines_to_frame(FakeExchange(last=T0 + (n - 1) * MINUTE_MS)("BTCUSDT", "1", limit=n)))
+
+
+def assert_same_levels(pyramid, expected):
+    assert len(pyramid.levels) >= len(expected.levels)
+    for k, level in enumerate(expected.levels):
+        np.testing.assert_array_equal(pyramid.levels[k].rows, level.rows, err_msg=f"level {k}")
+
+
+def assert_buckets_match_candles(pyramid, candles):
+    """Every bucket at every level aggregates the candles it covers, whatever the alignment."""
+    np.testing.assert_array_equal(pyramid.levels[0].rows, candles)
+    assert pyramid.levels[-1].n == 1
+    for k, level in enumerate(pyramid.levels):
+        positions = np.arange(len(candles)) + pyramid.origin
+        buckets = np.unique(positions >> k)
+        assert level.n == len(buckets), f"level {k}"
+        for bucket, row in zip(buckets, level.rows):
+            covered = candles[(positions >> k) == bucket]
+            expected = (covered[0, T], covered[0, O], covered[:, H].max(), covered[:, L].min(),
+                        covered[-1, C], covered[:, V].sum())
+            np.testing.assert_allclose(row, expected, err_msg=f"level {k} bucket {bucket}")
+
+
+def test_update_matches_a_rebuild_while_candles_tick_and_append():
+    full = rows(300)
+    pyramid = CandlePyramid(full[:1])
+    for n in range(2, 301):
+        ticking = full[n - 1].copy()
+        ticking[[2, 4, 5]] = ticking[3], ticking[3], 0  # Open candle at its low so far
+        assert pyramid.update(np.array([full[n - 2], ticking]))
+        assert pyramid.update(full[n - 1:n])
+        assert_same_levels(pyramid, CandlePyramid(full[:n]))
+
+
+def test_update_refuses_a_gap_and_ignores_older_rows():
+    full = rows(100)
+    pyramid = CandlePyramid(full[:50])
+    assert not pyramid.update(full[60:70])
+    assert pyramid.update(full[10:20])  # Already covered
+    assert pyramid.last_timestamp() == full[49, T]
+    assert pyramid.update(full[49:100])
+    assert_same_levels(pyramid, CandlePyramid(full))
+
+
+def test_buckets_cover_the_requested_range():
+    pyramid = CandlePyramid(rows(1000))
+    k, buckets, ends = pyramid.buckets(100, 900, max_buckets=100)
+    assert k == 3  # 800 candles in buckets of 8
+    assert len(buckets) == 101  # Candle 100 is mid-bucket, so one extra partial bucket
+    assert buckets[0, T] == pyramid.timestamps[96]  # Buckets are aligned to the first candle
+    assert ends[-1] == pyramid.timestamps[903]
+
+
+def test_prepend_keeps_every_bucket_and_the_open_candle_updates_after_it():
+    full = rows(700)
+    pyramid, first = CandlePyramid(full[500:]), 500
+    for start in (497, 400, 399, 100, 0):  # Odd, even and larger pages than the history
+        pyramid.prepend(full[start:first + 10])  # Overlaps the first candles; those rows are ignored
+        assert_buckets_match_candles(pyramid, full[start:])
+        first = start
+    ticking = full[-1].copy()
+    ticking[C] = ticking[L]
+    assert pyramid.update(np.array([ticking]))
+    assert_buckets_match_candles(pyramid, np.vstack([full[:-1], ticking]))
+
+
+def test_prepended_row_at_the_first_timestamp_replaces_it():
+    full = rows(64)
+    pyramid = CandlePyramid(full[33:])
+    completed = full[33].copy()
+    completed[V] += 5
+    pyramid.prepend(np.vstack([full[:33], completed]))
+    expected = full.copy()
+    expected[33] = completed
+    assert_buckets_match_candles(pyramid, expected)
+    k, buckets, ends = pyramid.buckets(0, 64, max_buckets=8)
+    assert (k, len(buckets), ends[-1]) == (3, 9, full[63, T])  # No longer aligned to the first candle
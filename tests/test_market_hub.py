@@ -0,0 +1,122 @@
+import time
+from types import SimpleNamespace
+from candle_store import CandleStore
+from candles import CandleCache
+from conftest import MINUTE_MS, T0, FakeExchange, kline
+from lod import CandlePyramid, frame_rows
+from market_hub import MarketHub
+
+
+def wait_for(root, results, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not results and time.monotonic() < deadline:
+        root.run_pending()
+        time.sleep(0.01)
+    assert results, "history callback never ran"
+    return results[0]
+
+
+def test_history_reads_the_whole_store_and_backfills_older_pages(tmp_path, root, network):
+    exchange = FakeExchange(first=T0, last=T0 + 3999 * MINUTE_MS)
+    store = CandleStore(str(tmp_path))
+    store.write_records("BTCUSDT", "1", exchange("BTCUSDT", "1", limit=1000))  # Newest 1000 only
+    cache = CandleCache(store=store, fetch=exchange)
+    hub = MarketHub(root, None, SimpleNamespace(network=network), cache, streaming=False)
+
+    results = []
+    hub.history("BTCUSDT", "5", lambda fetched, pyramid: results.append((fetched, pyramid)), pages=2,
+                prepare=lambda frame: CandlePyramid(frame_rows(frame)))
+    fetched, pyramid = wait_for(root, results)
+
+    assert fetched == 2000
+    assert len(store.read("BTCUSDT", "1")) == 3000
+    assert isinstance(pyramid, CandlePyramid)
+    assert len(pyramid) == 600  # 3000 one-minute candles as 5m buckets
+    assert pyramid.first_timestamp() == T0 + 1000 * MINUTE_MS
+
+
+def test_paging_back_reads_only_the_candles_before_the_first_one_shown(tmp_path, root, network):
+    exchange = FakeExchange(first=T0, last=T0 + 3999 * MINUTE_MS)
+    store = CandleStore(str(tmp_path))
+    store.write_records("BTCUSDT", "1", exchange("BTCUSDT", "1", limit=998))
+    hub = MarketHub(root, None, SimpleNamespace(network=network), CandleCache(store=store, fetch=exchange),
+                    streaming=False)
+    first = T0 + 3002 * MINUTE_MS  # The stored 1m history starts mid 5m bucket
+    assert store.first_timestamp("BTCUSDT", "1") == first
+
+    results = []
+    hub.history("BTCUSDT", "5", lambda fetched, frame: results.append((fetched, frame)), pages=1,
+                before=first - first % (5 * MINUTE_MS))
+    fetched, frame = wait_for(root, results)
+
+    assert fetched == 1000
+    assert len(frame) == 201  # 1000 older minutes, then the bucket they complete
+    assert frame.index[-1].value // 1_000_000 == first - 2 * MINUTE_MS
+    assert frame["volume"].iloc[-1] == sum(float(kline(T0 + m * MINUTE_MS)[5]) for m in range(3000, 3005))
+
+
+def test_history_without_pages_reports_no_fetch(tmp_path, root, network):
+    exchange = FakeExchange()
+    store = CandleStore(str(tmp_path))
+    store.write_records("BTCUSDT", "1", exchange("BTCUSDT", "1", limit=50))
+    hub = MarketHub(root, None, SimpleNamespace(network=network), CandleCache(store=store, fetch=exchange),
+                    streaming=False)
+
+    results = []
+    hub.history("BTCUSDT", "1", lambda fetched, frame: results.append((fetched, frame)))
+    fetched, frame = wait_for(root, results)
+
+    assert fetched is None
+    assert len(frame) == 50
+    assert exchange.calls == [("BTCUSDT", "1", 50, None, None)]
+
+
+class Stream:
+    def __init__(self):
+        self.calls = []
+
+    def subscribe(self, topic, callback):
+        self.calls.append(("subscribe", topic))
+
+    def unsubscribe(self, topic, callback=None):
+        self.calls.append(("unsubscribe", topic))
+
+    def is_live(self, topic, max_age=10):
+        return True
+
+
+class Scheduler:
+    def __init__(self):
+        self.jobs = {}
+
+    def add_job(self, name, interval_ms, fetch, apply, key=None):
+        self.jobs[name] = (fetch, apply)
+
+    def remove_job(self, name):
+        self.jobs.pop(name, None)
+
+    def request(self, name):
+        pass
+
+
+def book_message(kind, update_id, asks=(), bids=()):
+    return {"topic": "orderbook.50.BTCUSDT", "type": kind, "ts": T0,
+            "data": {"s": "BTCUSDT", "a": [list(a) for a in asks], "b": [list(b) for b in bids], "u": update_id}}
+
+
+def test_book_gap_resubscribes_once_until_the_next_snapshot(root):
+    stream = Stream()
+    hub = MarketHub(root, stream, Scheduler(), CandleCache())
+    hub.book("BTCUSDT", 10, lambda book: None)
+    stream.calls.clear()
+
+    hub._on_message(book_message("snapshot", 1, asks=[("101", "1")], bids=[("99", "1")]))
+    hub._on_message(book_message("delta", 2, asks=[("101", "2")]))
+    for update_id in range(4, 20):  # Update 3 was missed
+        hub._on_message(book_message("delta", update_id, bids=[("99", "3")]))
+    assert stream.calls == [("unsubscribe", "orderbook.50.BTCUSDT"), ("subscribe", "orderbook.50.BTCUSDT")]
+
+    hub._on_message(book_message("snapshot", 30, asks=[("102", "1")], bids=[("98", "1")]))
+    hub._on_message(book_message("delta", 32))  # A second gap resubscribes again
+    assert len(stream.calls) == 4
+    assert hub.current_book("BTCUSDT").best_ask() == 102
@@ -0,0 +1,58 @@
+import threading
+import time
+from netloop import NetworkLoop
+
+
+def test_submit_runs_off_the_calling_thread_and_returns_a_future(network):
+    future = network.submit(lambda a, b=0: (a + b, threading.current_thread().name), 2, b=3)
+    total, thread = future.result(5)
+    assert total == 5
+    assert thread.startswith("net")
+
+
+def test_callback_gets_the_result_or_the_error(network):
+    outcomes = []
+    done = threading.Event()
+
+    def callback(result, error):
+        outcomes.append((result, error))
+        if len(outcomes) == 2:
+            done.set()
+
+    def fail():
+        raise ValueError("bad response")
+
+    network.submit(lambda: "ok", callback=callback)
+    network.submit(fail, callback=callback)
+    assert done.wait(5)
+    assert ("ok", None) in outcomes
+    [error] = [error for result, error in outcomes if error is not None]
+    assert isinstance(error, ValueError)
+
+
+def test_calls_are_bounded_by_max_concurrency():
+    network = NetworkLoop(max_concurrency=2)
+    running, peak = [0], [0]
+    lock = threading.Lock()
+
+    def call():
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        time.sleep(0.05)
+        with lock:
+            running[0] -= 1
+
+    try:
+        futures = [network.submit(call) for _ in range(6)]
+        for future in futures:
+            future.result(5)
+    finally:
+        network.stop()
+    assert peak[0] == 2
+
+
+def test_timeout_is_left_to_the_call_itself(network):
+    # Timing out the wait would leave the call holding its worker, so timeout= goes to fn
+    future = network.submit(lambda url, timeout=None: (url, timeout), "/v5/market/time", timeout=10)
+    assert future.result(5) == ("/v5/market/time", 10)
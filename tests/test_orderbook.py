@@ -0,0 +1,74 @@
+import numpy as np
+from orderbook import OrderBook
+
+
+def message(update_id, asks=(), bids=(), kind="delta"):
+    return {"topic": "orderbook.50.BTCUSDT", "type": kind,
+            "data": {"s": "BTCUSDT", "a": [list(a) for a in asks], "b": [list(b) for b in bids], "u": update_id}}
+
+
+def snapshot_book(update_id=10):
+    book = OrderBook()
+    assert book.apply(message(update_id, asks=[("101", "1"), ("102", "2"), ("103", "3")],
+                              bids=[("100", "1"), ("99", "2"), ("98", "3")], kind="snapshot"))
+    return book
+
+
+def test_deltas_in_sequence_update_levels_and_keep_sides_sorted():
+    book = snapshot_book()
+    assert book.apply(message(11, asks=[("102", "0"), ("100.5", "4")], bids=[("99.5", "1"), ("98", "0")]))
+    assert book.apply(message(12, asks=[("104", "1"), ("101", "5")]))
+
+    assert book.update_id == 12
+    assert book.asks.prices.tolist() == [100.5, 101, 103, 104]
+    assert book.asks.sizes.tolist() == [4, 5, 3, 1]
+    assert book.bids.prices.tolist() == [100, 99.5, 99]
+    assert book.spread() == 0.5
+    assert np.isclose(book.mid(), 100.25)
+
+
+def test_stale_duplicate_is_ignored():
+    book = snapshot_book()
+    assert book.apply(message(11, asks=[("101", "7")]))
+    assert book.apply(message(11, asks=[("101", "9")]))
+    assert book.apply(message(5, bids=[("100", "0")]))
+
+    assert book.synced
+    assert book.update_id == 11
+    assert book.asks.sizes[0] == 7
+    assert book.best_bid() == 100
+
+
+def test_gap_marks_the_book_out_of_sync_until_the_next_snapshot():
+    book = snapshot_book()
+    assert not book.apply(message(12, asks=[("101", "7")]))
+    assert not book.synced
+    assert not book.apply(message(13, asks=[("101", "8")]))
+    assert book.asks.sizes[0] == 1  # Nothing applied while out of sync
+
+    assert book.apply(message(40, asks=[("105", "1")], bids=[("95", "1")], kind="snapshot"))
+    assert book.synced
+    assert book.best_ask() == 105 and book.best_bid() == 95
+    assert book.apply(message(41, asks=[("104", "2")]))
+    assert book.best_ask() == 104
+
+
+def test_update_id_one_is_a_service_restart_snapshot():
+    book = snapshot_book(update_id=500)
+    assert book.apply(message(1, asks=[("200", "1")], bids=[("199", "1")]))
+    assert book.synced
+    assert book.update_id == 1
+    assert book.asks.prices.tolist() == [200]
+    assert book.bids.prices.tolist() == [199]
+    assert book.apply(message(2, bids=[("198", "3")]))
+    assert book.bids.prices.tolist() == [199, 198]
+
+
+def test_depth_and_imbalance():
+    book = snapshot_book()
+    assert book.imbalance(levels=1) == 0.0
+    assert book.imbalance(levels=3) == 0.0
+    book.apply(message(11, bids=[("100", "3")]))
+    assert book.imbalance(levels=1) == 0.5
+    bid, ask = book.depth_within_bps(150)  # Mid 100.5, so 98.99 to 102.01
+    assert (bid, ask) == (5.0, 3.0)
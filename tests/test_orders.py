@@ -0,0 +1,170 @@
+import pytest
+from instruments import Instrument
+from orders import BATCH_LIMIT, BATCH_NOT_PERMITTED, OrderExecutor, floor_qty
+
+BTC = Instrument(symbol="BTCUSDT", tick_size=0.1, qty_step=0.001, price_precision=1, qty_precision=3,
+                 max_leverage=100, min_order_qty=0.001)
+
+
+class ApiError(Exception):
+    """Shaped like pybit's errors: status_code is the HTTP status or the retCode."""
+
+    def __init__(self, message, status_code):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class Registry:
+    def get(self, symbol):
+        return BTC
+
+
+class Session:
+    def __init__(self, batch_error=None):
+        self.batch_error = batch_error
+        self.calls = []
+        self.orders = []
+
+    def place_batch_order(self, category, request):
+        self.calls.append(("batch", len(request)))
+        if self.batch_error is not None:
+            raise self.batch_error
+        return {"result": {"list": [{"orderId": f"b{i}"} for i in range(len(request))]},
+                "retExtInfo": {"list": [{"code": 0, "msg": "OK"} for _ in request]}}
+
+    def place_order(self, category, **order):
+        assert "leverage" not in order  # Not a v5 place_order parameter
+        self.calls.append(("single", order.get("price")))
+        self.orders.append(order)
+        return {"result": {"orderId": "s"}}
+
+    def get_tickers(self, category, symbol):
+        return {"result": {"list": [{"markPrice": "50000"}]}}
+
+    def set_leverage(self, **kwargs):
+        self.calls.append(("leverage", kwargs["buyLeverage"]))
+
+
+def limit_orders(n):
+    return [{"symbol": "BTCUSDT", "side": "Buy", "orderType": "Limit", "qty": "0.001", "price": str(40000 + i)}
+            for i in range(n)]
+
+
+@pytest.fixture
+def make_executor():
+    executors = []
+
+    def make(session):
+        executor = OrderExecutor(session, Registry())
+        executors.append(executor)
+        return executor
+    yield make
+    for executor in executors:
+        executor.stop()
+
+
+def test_large_groups_split_into_concurrent_batch_requests(make_executor):
+    session = Session()
+    results = make_executor(session).submit_batch(limit_orders(25)).result()
+    assert sorted(session.calls) == [("batch", 5), ("batch", 10), ("batch", 10)]
+    assert len(results) == 25 and all(r.ok for r in results)
+
+
+def test_http_failure_is_never_resent(make_executor):
+    session = Session(batch_error=ApiError("502 Bad Gateway", 502))
+    executor = make_executor(session)
+    results = executor.submit_batch(limit_orders(5)).result()
+    assert session.calls == [("batch", 5)]
+    assert not any(r.ok for r in results)
+    assert executor.batch_orders
+
+
+def test_parameter_error_is_not_taken_for_a_refused_batch(make_executor):
+    session = Session(batch_error=ApiError("params error", 10001))
+    executor = make_executor(session)
+    results = executor.submit_batch(limit_orders(3)).result()
+    assert session.calls == [("batch", 3)]
+    assert not any(r.ok for r in results)
+    assert executor.batch_orders
+
+
+def test_refused_batch_falls_back_to_single_orders(make_executor):
+    session = Session(batch_error=ApiError("batch not permitted", BATCH_NOT_PERMITTED))
+    executor = make_executor(session)
+    results = executor.submit_batch(limit_orders(3)).result()
+    assert session.calls[0] == ("batch", 3)
+    assert sorted(session.calls[1:]) == [("single", str(40000 + i)) for i in range(3)]
+    assert all(r.ok for r in results)
+    executor.submit_batch(limit_orders(2)).result()
+    assert sorted(session.calls[4:]) == [("single", "40000"), ("single", "40001")]  # Batch endpoint skipped
+
+
+def test_batch_limit_is_respected(make_executor):
+    session = Session()
+    make_executor(session).submit_batch(limit_orders(BATCH_LIMIT)).result()
+    assert session.calls == [("batch", BATCH_LIMIT)]
+
+
+class PagedPositions(Session):
+    def __init__(self, pages):
+        super().__init__()
+        self.pages = pages
+        self.requests = []
+
+    def get_positions(self, **params):
+        self.requests.append(params)
+        page = int(params.get("cursor", 0))
+        cursor = str(page + 1) if page + 1 < len(self.pages) else ""
+        return {"result": {"list": self.pages[page], "nextPageCursor": cursor}}
+
+
+def test_close_all_follows_every_positions_page(make_executor):
+    position = lambda symbol, side: {"symbol": symbol, "side": side, "size": "1", "positionIdx": 0}
+    session = PagedPositions([
+        [position(f"A{i}USDT", "Buy") for i in range(200)],
+        [position("BTCUSDT", "Sell"), {"symbol": "ETHUSDT", "side": "", "size": "0"}],
+    ])
+    results = make_executor(session).submit_close_all().result()
+    assert [r["limit"] for r in session.requests] == [200, 200]
+    assert len(results) == 201
+    assert results[-1].symbol == "BTCUSDT" and results[-1].side == "Buy"
+
+
+def test_scale_in_refuses_orders_below_the_minimum_size(capsys):
+    registry = Registry()
+    registry.get = lambda symbol: BTC._replace(min_order_qty=0.01)
+    session = Session()
+    executor = OrderExecutor(session, registry)
+    try:
+        assert executor.submit_scale_in("BTCUSDT", "buy", 1000, 10, 5, 0.2).result() is None
+    finally:
+        executor.stop()
+    assert not [call for call in session.calls if call[0] in ("batch", "single")]
+    assert "too small" in capsys.readouterr().out
+
+
+def test_market_orders_apply_leverage_once_per_change(make_executor):
+    session = Session()
+    executor = make_executor(session)
+    for leverage in (10, 10, 25):
+        executor.submit_market("BTCUSDT", "buy", 500, leverage).result()
+    assert session.calls == [("leverage", "10"), ("single", None), ("single", None),
+                             ("leverage", "25"), ("single", None)]
+
+
+def test_market_order_size_is_floored_to_the_step_and_checked_against_the_minimum(make_executor, capsys):
+    session = Session()
+    executor = make_executor(session)
+    executor.submit_market("BTCUSDT", "buy", 149.99, 10).result()  # 0.0029998 BTC at 50000
+    assert [order["qty"] for order in session.orders] == [0.002]
+
+    assert executor.submit_market("BTCUSDT", "buy", 40, 10).result() is None  # 0.0008 BTC
+    assert len(session.orders) == 1
+    assert "below the minimum order of 0.001 BTCUSDT" in capsys.readouterr().out
+
+
+def test_floor_qty():
+    lots = BTC._replace(qty_step=0.1, qty_precision=1)
+    assert floor_qty(0.3, lots) == 0.3
+    assert floor_qty(0.39, lots) == 0.3
+    assert floor_qty(17, BTC._replace(qty_step=5, qty_precision=0)) == 15
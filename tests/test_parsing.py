@@ -0,0 +1,34 @@
+import json
+import numpy as np
+from conftest import MINUTE_MS, T0, FakeExchange, kline
+from parsing import CANDLE_COLUMNS, array_to_frame, levels_to_array, loads, records_to_array
+
+
+def test_records_become_an_ascending_typed_array():
+    records = FakeExchange(last=T0 + 9 * MINUTE_MS)("BTCUSDT", "1", limit=10)
+    arr = records_to_array(records)
+    assert arr["timestamp"].dtype == np.int64
+    assert arr["timestamp"].tolist() == [T0 + m * MINUTE_MS for m in range(10)]
+    first = kline(T0)
+    assert [arr[name][0] for name in CANDLE_COLUMNS] == [float(value) for value in first[1:]]
+    assert len(records_to_array([])) == 0
+
+
+def test_frame_is_indexed_by_utc_time_with_every_column():
+    arr = records_to_array(FakeExchange(last=T0 + 4 * MINUTE_MS)("BTCUSDT", "1", limit=5))
+    df = array_to_frame(arr)
+    assert list(df.columns) == CANDLE_COLUMNS
+    assert df.index.name == "timestamp"
+    assert str(df.index.tz) == "UTC"
+    assert df.index.as_unit("ms").asi8.tolist() == arr["timestamp"].tolist()
+    assert df["close"].tolist() == arr["close"].tolist()
+
+
+def test_levels_and_json():
+    levels = levels_to_array([["101.5", "2"], ["102", "0.25"]])
+    assert levels.shape == (2, 2)
+    assert levels.tolist() == [[101.5, 2.0], [102.0, 0.25]]
+    assert levels_to_array([]).shape == (0, 2)
+    message = {"topic": "orderbook.50.BTCUSDT", "data": {"a": [["101.5", "2"]], "u": 7}}
+    assert loads(json.dumps(message)) == message
+    assert loads(json.dumps(message).encode()) == message
@@ -0,0 +1,90 @@
+import numpy as np
+import pytest
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from candles import klines_to_frame
+from conftest import MINUTE_MS, T0, FakeExchange
+from renderer import CandleRenderer
+
+
+class Canvas(FigureCanvasAgg):
+    """Agg canvas counting full draws and blits."""
+
+    def __init__(self, figure):
+        super().__init__(figure)
+        self.draws = 0
+        self.blits = 0
+
+    def draw_idle(self, *args, **kwargs):
+        self.draws += 1
+        self.draw()
+
+    def blit(self, bbox=None):
+        self.blits += 1
+
+
+def candles(n):
+    return klines_to_frame(FakeExchange(last=T0 + (n - 1) * MINUTE_MS)("BTCUSDT", "1", limit=n))
+
+
+@pytest.fixture
+def renderer():
+    figure = Figure(figsize=(6, 4))
+    canvas = Canvas(figure)
+    ax_price, ax_volume = figure.subplots(2, 1, sharex=True)
+    return CandleRenderer(ax_price, ax_volume, canvas, window=50)
+
+
+def last_body(renderer):
+    return renderer.bodies.get_paths()[-1].vertices[:4]
+
+
+def test_open_candle_change_is_blitted_without_a_full_draw(renderer):
+    df = candles(60)
+    renderer.update(df, title="BTCUSDT")
+    assert (renderer.canvas.draws, renderer.canvas.blits) == (1, 0)
+    assert len(renderer.bodies.get_paths()) == 50
+
+    ticked = df.copy()
+    ticked.iloc[-1, ticked.columns.get_loc("close")] = df["low"].iloc[-1]
+    renderer.update(ticked)
+
+    assert renderer.canvas.draws == 1
+    assert renderer.canvas.blits == 2  # Price and volume axes
+    body = last_body(renderer)
+    assert sorted(set(body[:, 1])) == sorted({df["open"].iloc[-1], df["low"].iloc[-1]})
+
+
+def test_new_candle_or_a_price_off_the_scale_takes_a_full_draw(renderer):
+    df = candles(61)
+    renderer.update(df.iloc[:60])
+    renderer.update(df)  # One more candle: the time axis moves
+    assert (renderer.canvas.draws, renderer.canvas.blits) == (2, 0)
+
+    spike = df.copy()
+    spike.iloc[-1, spike.columns.get_loc("high")] = df["high"].max() * 2
+    renderer.update(spike)
+    assert (renderer.canvas.draws, renderer.canvas.blits) == (3, 0)
+    assert renderer.ax_price.get_ylim()[1] > df["high"].max() * 2
+
+
+def test_ticks_after_an_append_blit_over_the_new_background(renderer):
+    df = candles(61)
+    renderer.update(df.iloc[:60])
+    renderer.update(df)  # Appended: full draw, which caches the shifted axes
+    assert (renderer.canvas.draws, renderer.canvas.blits) == (2, 0)
+    background = renderer._background
+
+    ticked = df.copy()
+    ticked.iloc[-1, ticked.columns.get_loc("close")] = df["low"].iloc[-1]
+    renderer.update(ticked)
+    assert (renderer.canvas.draws, renderer.canvas.blits) == (2, 2)
+    assert renderer._background is background
+    assert renderer._times[-1] == df.index[-1]
+
+
+def test_volume_threshold_follows_the_window(renderer):
+    df = candles(80)
+    renderer.update(df)
+    expected = df["volume"].tail(50).mean() * 1.1
+    assert np.allclose(renderer.threshold.get_ydata(), expected)
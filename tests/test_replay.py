@@ -0,0 +1,111 @@
+import json
+import threading
+import time
+import numpy as np
+import pytest
+from candle_store import CandleStore
+from conftest import MINUTE_MS, T0, FakeExchange, kline
+from orderbook import OrderBook
+from replay import CHECKPOINT_MS, ReplayStream, fill_market, load_index
+
+TOPIC = "orderbook.50.BTCUSDT"
+SYMBOLS = ["BTCUSDT", "ETHUSDT", "SOLUSDT", "XRPUSDT"]
+
+
+def book_messages(n, every_ms=50):
+    rng = np.random.default_rng(1)
+    messages = [{"topic": TOPIC, "type": "snapshot", "ts": T0, "data": {
+        "s": "BTCUSDT", "u": 1,
+        "a": [[str(100 + i / 2), "1"] for i in range(1, 40)],
+        "b": [[str(100 - i / 2), "1"] for i in range(40)]}}]
+    for k in range(n):
+        price = 100 + int(rng.integers(-30, 31)) / 2
+        side = "a" if price > 100 else "b"
+        messages.append({"topic": TOPIC, "type": "delta", "ts": T0 + k * every_ms,
+                         "data": {"s": "BTCUSDT", "u": k + 2, side: [[str(price), str(int(rng.integers(0, 3)))]]}})
+    return messages
+
+
+@pytest.fixture
+def session(tmp_path):
+    messages = book_messages(3 * CHECKPOINT_MS // 50)
+    path = tmp_path / "session.jsonl"
+    path.write_text('{"success":true,"op":"subscribe"}\n' + "".join(json.dumps(m) + "\n" for m in messages))
+    store = CandleStore(str(tmp_path / "store"))
+    exchange = FakeExchange(first=T0 - 500 * MINUTE_MS, last=T0 + 200 * MINUTE_MS)
+    for symbol in SYMBOLS:
+        store.write_records(symbol, "1", exchange(symbol, "1", limit=1000))
+    return str(path), messages, store
+
+
+def test_index_is_saved_and_reused(session):
+    path, messages, _ = session
+    index = load_index(path)
+    assert len(index.ts) == len(messages) + 1
+    assert len(index.cp_line) >= 3
+    assert np.array_equal(load_index(path).offset, index.offset)
+
+
+def test_seek_restores_the_book_from_the_nearest_checkpoint(session):
+    path, messages, store = session
+    target = T0 + 2 * CHECKPOINT_MS + 1234
+    expected = OrderBook()
+    for message in messages:
+        if message["ts"] <= target:
+            expected.apply(message)
+
+    stream = ReplayStream(path, store=store, speed=0)
+    book = OrderBook()
+    stream.subscribe(TOPIC, book.apply)
+    stream.start()
+    try:
+        stream.seek(target)
+        deadline = time.monotonic() + 5
+        while book.update_id != expected.update_id and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        stream.stop()
+    assert book.update_id == expected.update_id
+    assert np.array_equal(book.asks.prices, expected.asks.prices)
+    assert np.array_equal(book.bids.sizes, expected.bids.sizes)
+    assert stream.dispatched < 1 + CHECKPOINT_MS // 50  # Only the deltas after the checkpoint
+
+
+def test_fetch_klines_never_serves_candles_after_the_replay_clock(session):
+    path, _, store = session
+    stream = ReplayStream(path, store=store)
+    stream.clock = T0 + 17 * MINUTE_MS + 5
+    rows = stream.fetch_klines("BTCUSDT", "5", limit=10)
+    assert len(rows) == 10
+    # The forming 5m candle holds only the 1m candles closed by then: minutes 15 and 16
+    assert rows[0][0] == T0 + 15 * MINUTE_MS
+    assert rows[0][5] == sum(float(kline(T0 + m * MINUTE_MS)[5]) for m in (15, 16))
+    assert rows[1][0] == T0 + 10 * MINUTE_MS
+
+
+def test_subscribing_during_playback_keeps_the_replay_thread_alive(session):
+    path, _, store = session
+    stream = ReplayStream(path, store=store, speed=0)
+    stream.subscribe("kline.1.BTCUSDT", lambda message: None)
+    stream.subscribe(TOPIC, lambda message: None)
+    errors = []
+    hook, threading.excepthook = threading.excepthook, errors.append
+    stream.start()
+    stream.play()
+    try:
+        for i in range(3000):  # Each new symbol adds to the candle state the replay thread walks
+            stream.subscribe(f"kline.1.S{i}USDT", lambda message: None)
+            if i % 100 == 0:
+                stream.seek(stream.start_ts)
+                stream.play()
+    finally:
+        stream.stop()
+        time.sleep(0.2)
+        threading.excepthook = hook
+    assert not errors
+
+
+def test_fill_market_walks_levels():
+    filled, price = fill_market(np.array([1.0, 2.0, 3.0]), np.array([1.0, 1.0, 1.0]), 2.5)
+    assert filled == 2.5
+    assert price == pytest.approx((1 + 2 + 1.5) / 2.5)
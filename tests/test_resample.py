@@ -0,0 +1,40 @@
+import pandas as pd
+import pytest
+from candles import klines_to_frame
+from conftest import MINUTE_MS, T0, FakeExchange, kline
+from resample import ResampledSeries, resample
+
+
+def minutes(n, start=T0):
+    return klines_to_frame(FakeExchange(first=start, last=start + (n - 1) * MINUTE_MS)("BTCUSDT", "1", limit=n))
+
+
+def test_resample_aggregates_aligned_buckets():
+    df = resample(minutes(11, start=T0 + 3 * MINUTE_MS), "5")  # Partial buckets at both ends
+    assert df.index.as_unit("ms").asi8.tolist() == [T0 + m * MINUTE_MS for m in (0, 5, 10)]
+    first = [kline(T0 + m * MINUTE_MS) for m in (3, 4)]
+    assert df["open"].iloc[0] == float(first[0][1])
+    assert df["high"].iloc[0] == max(float(row[2]) for row in first)
+    assert df["close"].iloc[0] == float(first[-1][4])
+    assert df["volume"].iloc[0] == sum(float(row[5]) for row in first)
+
+
+@pytest.mark.parametrize("interval", ["3", "5", "15", "60"])
+def test_series_kept_in_step_matches_a_full_resample(interval):
+    base = minutes(600)
+    series = ResampledSeries(interval)
+    series.update(base.iloc[:100])
+    for end in range(101, 601, 7):
+        tail = base.iloc[:end].copy()
+        tail.iloc[-1, tail.columns.get_loc("close")] += 0.25  # Open minute still ticking
+        pd.testing.assert_frame_equal(series.update(tail), resample(tail, interval))
+        pd.testing.assert_frame_equal(series.update(base.iloc[:end]), resample(base.iloc[:end], interval))
+
+
+def test_series_rebuilds_once_older_history_is_added():
+    base = minutes(600)
+    series = ResampledSeries("15", max_candles=30)
+    series.update(base.iloc[300:])
+    result = series.update(base)
+    pd.testing.assert_frame_equal(result, resample(base, "15").iloc[-30:])
+    assert len(result) == 30
@@ -0,0 +1,109 @@
+import threading
+import time
+from scheduler import RefreshScheduler
+
+POLL_MS = 50
+INTERVAL_MS = 60_000  # Long enough that timers never fire while a test runs
+
+
+def pump(root, done, timeout=5):
+    """Run the scheduler's polls until done() holds."""
+    deadline = time.monotonic() + timeout
+    while not done() and time.monotonic() < deadline:
+        root.advance(POLL_MS)
+        time.sleep(0.005)
+    assert done(), "scheduler never delivered"
+
+
+class Fetch:
+    """A job's fetch that waits for `gate` and counts its calls."""
+
+    def __init__(self):
+        self.gate = threading.Event()
+        self.keys = []
+
+    def __call__(self, key):
+        self.keys.append(key)
+        self.gate.wait(5)
+        return len(self.keys)
+
+
+def test_requests_while_in_flight_merge_into_one_follow_up(root, network):
+    fetch = Fetch()
+    applied = []
+    scheduler = RefreshScheduler(root, network, poll_ms=POLL_MS)
+    scheduler.add_job("book", INTERVAL_MS, fetch, lambda result: applied.append((result, threading.current_thread())))
+    scheduler.start()
+    for _ in range(3):
+        scheduler.request("book")
+    fetch.gate.set()
+
+    pump(root, lambda: len(applied) == 2)
+    root.advance(POLL_MS * 4)
+    assert len(fetch.keys) == 2  # The first run and one merged follow-up
+    assert [result for result, _ in applied] == [1, 2]
+    assert all(thread is threading.main_thread() for _, thread in applied)  # Applied on the "Tk" thread
+    scheduler.stop()
+
+
+def test_result_for_a_stale_key_is_dropped(root, network):
+    fetch = Fetch()
+    applied = []
+    market = ["BTCUSDT"]
+    scheduler = RefreshScheduler(root, network, poll_ms=POLL_MS)
+    scheduler.add_job("chart", INTERVAL_MS, fetch, applied.append, key=lambda: market[0])
+    scheduler.start()
+    market[0] = "ETHUSDT"  # Switched while the BTCUSDT fetch is in flight
+    fetch.gate.set()
+    pump(root, lambda: scheduler.jobs["chart"].in_flight is False)
+    assert applied == []
+
+    scheduler.request("chart")
+    pump(root, lambda: applied)
+    assert fetch.keys == ["BTCUSDT", "ETHUSDT"]
+    assert applied == [2]
+    scheduler.stop()
+
+
+def test_failed_fetch_skips_apply_and_does_not_stall_the_job(root, network, capsys):
+    calls = []
+
+    def fetch(key):
+        calls.append(key)
+        if len(calls) == 1:
+            raise ValueError("timeout")
+        return "ok"
+
+    applied = []
+    scheduler = RefreshScheduler(root, network, poll_ms=POLL_MS)
+    scheduler.add_job("balance", INTERVAL_MS, fetch, applied.append)
+    scheduler.start()
+    pump(root, lambda: not scheduler.jobs["balance"].in_flight)
+    assert "Error refreshing balance: timeout" in capsys.readouterr().out
+    assert applied == []
+
+    scheduler.request("balance")
+    pump(root, lambda: applied)
+    assert applied == ["ok"]
+    scheduler.stop()
+
+
+
+def test_removed_job_never_delivers_and_its_timer_chain_ends(root, network):
+    fetch = Fetch()
+    applied = []
+    scheduler = RefreshScheduler(root, network, poll_ms=POLL_MS)
+    scheduler.add_job("ticker", INTERVAL_MS, fetch, applied.append)
+    scheduler.start()
+    job = scheduler.jobs["ticker"]
+    scheduler.remove_job("ticker")  # While its first fetch is in flight
+    fetch.gate.set()
+    pump(root, lambda: not job.in_flight)
+    root.advance(INTERVAL_MS * 2)
+    assert applied == []
+    assert len(fetch.keys) == 1
+
+    scheduler.add_job("ticker", INTERVAL_MS, fetch, applied.append)  # Same name, new chain
+    pump(root, lambda: applied)
+    assert applied == [2]
+    scheduler.stop()
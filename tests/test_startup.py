@@ -0,0 +1,61 @@
+import sys
+import threading
+import pytest
+from conftest import FakeRoot
+from startup import StartupTimer, import_modules, run_in_background
+
+
+def deliver(root, outcomes, poll_ms=20):
+    """Run the poll chain until on_done has been called."""
+    while not outcomes:
+        root.advance(poll_ms)
+
+
+def test_timer_reports_its_marks_once(capsys):
+    timer = StartupTimer(0.0)
+    timer.mark("window")
+    timer.mark("first chart")
+    timer.report()
+    timer.report()
+    out = capsys.readouterr().out
+    assert out.count("Startup: ") == 1
+    assert out.index("window") < out.index("first chart")
+    assert [name for name, _ in timer.marks] == ["window", "first chart"]
+
+
+def test_background_result_is_delivered_on_the_root_thread():
+    root, outcomes = FakeRoot(), []
+    release = threading.Event()
+    main = threading.current_thread()
+
+    def fn():
+        release.wait(5)
+        return 42
+
+    run_in_background(root, fn, lambda result, error: outcomes.append((result, error, threading.current_thread())))
+    root.advance(20)
+    assert outcomes == []  # Still running: the poll reschedules itself
+    release.set()
+    deliver(root, outcomes)
+    assert outcomes == [(42, None, main)]
+
+
+def test_background_error_is_delivered():
+    root, outcomes = FakeRoot(), []
+
+    def fn():
+        raise ValueError("no network")
+
+    run_in_background(root, fn, lambda result, error: outcomes.append((result, error)))
+    deliver(root, outcomes)
+    result, error = outcomes[0]
+    assert result is None
+    assert isinstance(error, ValueError)
+
+
+def test_import_modules(monkeypatch):
+    monkeypatch.delitem(sys.modules, "colorsys", raising=False)
+    import_modules(["colorsys"])
+    assert "colorsys" in sys.modules
+    with pytest.raises(ImportError):
+        import_modules(["no_such_module"])
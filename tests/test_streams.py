@@ -0,0 +1,96 @@
+import json
+import threading
+import pytest
+import streams
+from conftest import MINUTE_MS, T0, kline
+from orderbook import OrderBook
+from streams import MarketStream, kline_topic, orderbook_topic
+from ws_replay import ReplayServer, load_messages
+
+
+def kline_message(minute):
+    t, o, h, l, c, v, turnover = kline(T0 + minute * MINUTE_MS)
+    row = {"start": int(t), "end": int(t) + MINUTE_MS - 1, "interval": "1", "open": o, "high": h, "low": l,
+           "close": c, "volume": v, "turnover": turnover, "confirm": True, "timestamp": int(t)}
+    return {"topic": kline_topic("BTCUSDT", "1"), "type": "snapshot", "ts": int(t), "data": [row]}
+
+
+def book_message(update_id, asks, bids, kind="delta"):
+    return {"topic": orderbook_topic("BTCUSDT"), "type": kind, "ts": T0 + update_id,
+            "data": {"s": "BTCUSDT", "a": asks, "b": bids, "u": update_id}}
+
+
+@pytest.fixture
+def session(tmp_path):
+    """A recorded session: klines for two symbols interleaved with order book updates."""
+    messages = [book_message(1, [["101", "1"], ["102", "2"]], [["100", "1"]], kind="snapshot")]
+    for minute in range(10):
+        messages.append(kline_message(minute))
+        other = dict(kline_message(minute), topic=kline_topic("ETHUSDT", "1"))
+        messages.append(other)
+        messages.append(book_message(minute + 2, [["101", str(minute + 2)]], [["99", "1"]]))
+    path = tmp_path / "session.jsonl"
+    path.write_text("".join(json.dumps(m) + "\n" for m in messages))
+    return path
+
+
+@pytest.fixture
+def server(session):
+    server = ReplayServer(load_messages(session), speed=0)
+    server.start()
+    yield server
+    server.stop()
+
+
+def test_stream_delivers_only_subscribed_topics_in_order(server, tmp_path):
+    record = tmp_path / "record.jsonl"
+    stream = MarketStream(url=server.url, record_to=str(record))
+    book = OrderBook()
+    klines = []
+    done = threading.Event()
+
+    def on_book(message):
+        assert book.apply(message)
+        if book.update_id == 11:
+            done.set()
+
+    stream.subscribe(kline_topic("BTCUSDT", "1"), lambda message: klines.append(message["data"][0]["start"]))
+    stream.subscribe(orderbook_topic("BTCUSDT"), on_book)
+    stream.start()
+    try:
+        assert done.wait(5), "order book updates never arrived"
+        assert stream.is_live(orderbook_topic("BTCUSDT"))
+    finally:
+        stream.stop()
+
+    assert klines == [T0 + minute * MINUTE_MS for minute in range(10)]
+    assert book.synced
+    assert book.asks.prices.tolist() == [101, 102]
+    assert book.asks.sizes.tolist() == [11, 2]
+    assert book.bids.prices.tolist() == [100, 99]
+    recorded = load_messages(record)
+    assert {m.get("topic") for m in recorded if "topic" in m} == {kline_topic("BTCUSDT", "1"),
+                                                                 orderbook_topic("BTCUSDT")}
+
+
+def test_recording_opens_the_file_once_and_flushes_every_message(server, tmp_path, monkeypatch):
+    record = tmp_path / "record.jsonl"
+    opened = []
+
+    def counting_open(*args, **kwargs):
+        opened.append(args[0])
+        return open(*args, **kwargs)
+
+    monkeypatch.setattr(streams, "open", counting_open, raising=False)
+    stream = MarketStream(url=server.url, record_to=str(record))
+    done = threading.Event()
+    stream.subscribe(orderbook_topic("BTCUSDT"), lambda message: message["data"]["u"] == 11 and done.set())
+    stream.start()
+    try:
+        assert done.wait(5), "order book updates never arrived"
+        recorded = load_messages(record)  # Readable before stop()
+        assert [m["data"]["u"] for m in recorded if m.get("topic") == orderbook_topic("BTCUSDT")][-1] == 11
+    finally:
+        stream.stop()
+    assert opened == [str(record)]
+    assert stream._record is None
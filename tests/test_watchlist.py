@@ -0,0 +1,108 @@
+from types import SimpleNamespace
+import pytest
+import watchlist
+from watchlist import COLUMNS, WatchlistView, parse_tickers
+
+TICKERS = [
+    {"symbol": "BTCUSDT", "lastPrice": "50000", "price24hPcnt": "0.01", "turnover24h": "9e9", "fundingRate": "0.0001"},
+    {"symbol": "ETHUSDT", "lastPrice": "3000", "price24hPcnt": "-0.02", "turnover24h": "5e9", "fundingRate": ""},
+    {"symbol": "SOLUSDT", "lastPrice": "150", "price24hPcnt": "0.05", "turnover24h": "1e9", "fundingRate": "-0.0002"},
+]
+
+
+class Canvas:
+    """Keeps the text of every item and the event bindings; needs no display."""
+
+    def __init__(self, parent, **options):
+        self.texts = {}
+        self.bindings = {}
+        self.configured = []
+
+    def create_text(self, *coords, text="", **options):
+        item = len(self.texts) + 1
+        self.texts[item] = text
+        return item
+
+    def itemconfigure(self, item, text=None, **options):
+        self.texts[item] = text
+        self.configured.append(item)
+
+    def tag_bind(self, item, event, callback):
+        self.bindings[(item, event)] = callback
+
+    def bind(self, event, callback):
+        self.bindings[event] = callback
+
+
+@pytest.fixture
+def selected():
+    return []
+
+
+@pytest.fixture
+def view(monkeypatch, selected):
+    monkeypatch.setattr(watchlist.tk, "Canvas", Canvas)
+    return WatchlistView(None, rows=2, row_height=18, on_select=selected.append)
+
+
+def shown(view):
+    """Text of every visible cell, row by row, the header excluded."""
+    texts = list(view.canvas.texts.values())[len(COLUMNS):]
+    return [texts[r * len(COLUMNS):(r + 1) * len(COLUMNS)] for r in range(view.rows)]
+
+
+def symbols(view):
+    return [row[0] for row in shown(view)]
+
+
+def test_empty_tickers_have_every_column():
+    data = parse_tickers([])
+    assert set(data) == {column for column, _ in COLUMNS}
+    assert data["symbol"].dtype.kind == "U"
+
+
+def test_headers_sort_before_the_first_update(view):
+    for column, _ in COLUMNS:
+        view.sort_by(column)
+    assert symbols(view) == ["", ""]
+
+
+def test_update_sorts_by_turnover_and_draws_the_visible_rows(view):
+    view.update(parse_tickers(TICKERS))
+    assert shown(view) == [["BTCUSDT", "50000", "+1.00", "9,000.0M", "0.0100"],
+                           ["ETHUSDT", "3000", "-2.00", "5,000.0M", "-"]]
+    view.scroll(5)  # Clamped to the last full page
+    assert symbols(view) == ["ETHUSDT", "SOLUSDT"]
+
+
+def test_sort_by_toggles_direction_and_keeps_missing_values_last(view):
+    view.update(parse_tickers(TICKERS))
+    view.sort_by("change")
+    assert symbols(view) == ["SOLUSDT", "BTCUSDT"]
+    view.sort_by("change")
+    assert symbols(view) == ["ETHUSDT", "BTCUSDT"]
+    view.sort_by("symbol")
+    assert symbols(view) == ["BTCUSDT", "ETHUSDT"]
+    view.sort_by("funding")
+    view.scroll(1)
+    assert symbols(view) == ["SOLUSDT", "ETHUSDT"]  # No funding rate: last whichever the direction
+    view.sort_by("funding")
+    assert symbols(view) == ["BTCUSDT", "ETHUSDT"]
+
+
+def test_clicking_a_header_sorts_and_a_row_selects(view, selected):
+    view.update(parse_tickers(TICKERS))
+    header = list(view.canvas.texts)[0]
+    view.canvas.bindings[(header, "<Button-1>")](None)  # Symbol, ascending
+    assert symbols(view) == ["BTCUSDT", "ETHUSDT"]
+    view.canvas.bindings["<Button-1>"](SimpleNamespace(y=2.5 * view.row_height))
+    assert selected == ["ETHUSDT"]
+
+
+def test_only_changed_cells_are_redrawn(view):
+    view.update(parse_tickers(TICKERS))
+    view.canvas.configured = []
+    tickers = [dict(t) for t in TICKERS]
+    tickers[0]["lastPrice"] = "50100"
+    view.update(parse_tickers(tickers))
+    assert [view.canvas.texts[item] for item in view.canvas.configured] == ["50100"]
@@ -0,0 +1,134 @@
+import tkinter as tk
+import numpy as np
+
+COLUMNS = [
+    ("symbol", "Symbol"),
+    ("last", "Last"),
+    ("change", "24h %"),
+    ("turnover", "Vol (USDT)"),
+    ("funding", "Funding %"),
+]
+TICKER_FIELDS = {"last": "lastPrice", "change": "price24hPcnt", "turnover": "turnover24h", "funding": "fundingRate"}
+
+
+def fetch_tickers(session, category='linear'):
+    """Every ticker in the category from one bulk get_tickers call."""
+    return session.get_tickers(category=category)['result']['list']
+
+
+def parse_tickers(items):
+    """Column arrays (symbol plus float columns) from a get_tickers result list."""
+    data = {"symbol": np.array([t['symbol'] for t in items], dtype=str)}
+    for column, field in TICKER_FIELDS.items():
+        data[column] = np.array([float(t.get(field) or 'nan') for t in items])
+    return data
+
+
+def format_value(column, value):
+    if column == "symbol":
+        return str(value)
+    if np.isnan(value):
+        return "-"
+    if column == "change":
+        return f"{value * 100:+.2f}"
+    if column == "funding":
+        return f"{value * 100:.4f}"
+    if column == "turnover":
+        return f"{value / 1e6:,.1f}M" if value >= 1e6 else f"{value:,.0f}"
+    return f"{value:.8g}"
+
+
+class WatchlistView:
+    """Sortable ticker table that only ever creates `rows` rows of canvas items.
+
+    The full data set lives in NumPy columns; scrolling and sorting change
+    which slice is shown and only the cells whose text changed are updated.
+    Click a header to sort, click a row to call on_select(symbol).
+    """
+
+    def __init__(self, parent, rows=20, width=430, row_height=18, font=("Arial", 9), on_select=None):
+        self.rows = rows
+        self.row_height = row_height
+        self.on_select = on_select
+        self.data = parse_tickers([])  # Every column, so headers sort before the first update
+        self.order = np.array([], dtype=int)
+        self.sort_column = "turnover"
+        self.descending = True
+        self.offset = 0
+        self.canvas = tk.Canvas(parent, width=width, height=(rows + 1) * row_height, highlightthickness=0)
+        self._x = [width * f for f in (0.02, 0.42, 0.58, 0.8, 0.98)]
+        anchors = ['w', 'e', 'e', 'e', 'e']
+
+        self._headers = []
+        for col, ((column, title), x, anchor) in enumerate(zip(COLUMNS, self._x, anchors)):
+            item = self.canvas.create_text(x, row_height / 2, anchor=anchor, text=title, font=(font[0], font[1], "bold"))
+            self.canvas.tag_bind(item, "<Button-1>", lambda e, c=column: self.sort_by(c))
+            self._headers.append(item)
+        self._cells = []
+        self._shown = []
+        for r in range(rows):
+            y = (r + 1.5) * row_height
+            self._cells.append([
+                self.canvas.create_text(x, y, anchor=anchor, text="", font=font)
+                for x, anchor in zip(self._x, anchors)
+            ])
+            self._shown.append([None] * len(COLUMNS))
+        self.canvas.bind("<Button-1>", self._on_click)
+        self.canvas.bind("<MouseWheel>", lambda e: self.scroll(-3 if e.delta > 0 else 3))
+        self.canvas.bind("<Button-4>", lambda e: self.scroll(-3))
+        self.canvas.bind("<Button-5>", lambda e: self.scroll(3))
+
+    def pack(self, **kwargs):
+        self.canvas.pack(**kwargs)
+
+    def update(self, data):
+        self.data = data
+        self._sort()
+        self._draw()
+
+    def sort_by(self, column):
+        if column == self.sort_column:
+            self.descending = not self.descending
+        else:
+            self.sort_column = column
+            self.descending = column != "symbol"
+        self._sort()
+        self._draw()
+
+    def scroll(self, rows):
+        limit = max(0, len(self.order) - self.rows)
+        self.offset = min(max(0, self.offset + rows), limit)
+        self._draw()
+
+    def _sort(self):
+        values = self.data[self.sort_column]
+        if values.dtype.kind in "fi":
+            # Negate rather than reverse so NaNs stay at the bottom either way
+            self.order = np.argsort(-values if self.descending else values, kind="stable")
+        else:
+            self.order = np.argsort(values, kind="stable")
+            if self.descending:
+                self.order = self.order[::-1]
+        self.offset = min(self.offset, max(0, len(self.order) - self.rows))
+
+    def _draw(self):
+        visible = self.order[self.offset:self.offset + self.rows]
+        for r in range(self.rows):
+            for col, (column, _) in enumerate(COLUMNS):
+                text = format_value(column, self.data[column][visible[r]]) if r < len(visible) else ""
+                if text == self._shown[r][col]:
+                    continue
+                self._shown[r][col] = text
+                item = self._cells[r][col]
+                if column == "change":
+                    self.canvas.itemconfigure(item, text=text, fill='red' if text.startswith('-') else 'green')
+                else:
+                    self.canvas.itemconfigure(item, text=text)
+
+    def _on_click(self, event):
+        r = int(event.y // self.row_height) - 1
+        if self.on_select is None or r < 0:
+            return
+        i = self.offset + r
+        if i < len(self.order):
+            self.on_select(str(self.data["symbol"][self.order[i]]))
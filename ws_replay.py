@@ -0,0 +1,190 @@
+"""Local stand-in for the Bybit public WebSocket that replays recorded messages.
+
+Record a session with MarketStream(record_to="session.jsonl"), then serve it:
+
+    python ws_replay.py session.jsonl --port 8765 --speed 10
+    BYBIT_WS_PUBLIC=ws://127.0.0.1:8765 python charts.py
+
+Clients get only the recorded messages for the topics they subscribe to,
+spaced by the recorded `ts` values divided by `speed` (0 means no delay).
+"""
+import argparse
+import base64
+import hashlib
+import json
+import socketserver
+import struct
+import threading
+import time
+
+WS_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+
+def load_messages(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def _recv_exact(sock, n):
+    buf = b""
+    while len(buf) < n:
+        chunk = sock.recv(n - len(buf))
+        if not chunk:
+            raise ConnectionError("client closed")
+        buf += chunk
+    return buf
+
+
+def read_frame(sock):
+    """Read one client frame and return (opcode, payload)."""
+    b1, b2 = _recv_exact(sock, 2)
+    opcode = b1 & 0x0F
+    length = b2 & 0x7F
+    if length == 126:
+        length = struct.unpack(">H", _recv_exact(sock, 2))[0]
+    elif length == 127:
+        length = struct.unpack(">Q", _recv_exact(sock, 8))[0]
+    mask = _recv_exact(sock, 4) if b2 & 0x80 else b"\0\0\0\0"
+    payload = bytearray(_recv_exact(sock, length))
+    for i in range(length):
+        payload[i] ^= mask[i % 4]
+    return opcode, bytes(payload)
+
+
+def send_frame(sock, payload, opcode=0x1):
+    """Send one unmasked server frame."""
+    if isinstance(payload, str):
+        payload = payload.encode()
+    header = bytes([0x80 | opcode])
+    if len(payload) < 126:
+        header += bytes([len(payload)])
+    elif len(payload) < 1 << 16:
+        header += bytes([126]) + struct.pack(">H", len(payload))
+    else:
+        header += bytes([127]) + struct.pack(">Q", len(payload))
+    sock.sendall(header + payload)
+
+
+class ReplayHandler(socketserver.BaseRequestHandler):
+
+    def handle(self):
+        sock = self.request
+        if not self._handshake(sock):
+            return
+        self.topics = set()
+        self.send_lock = threading.Lock()
+        self.closed = threading.Event()
+        replay = None
+        try:
+            while True:
+                opcode, payload = read_frame(sock)
+                if opcode == 0x8:
+                    break
+                if opcode == 0x9:
+                    self._send(payload, 0xA)
+                    continue
+                if opcode != 0x1:
+                    continue
+                request = json.loads(payload)
+                op = request.get("op")
+                if op == "subscribe":
+                    self.topics.update(request.get("args", []))
+                    if replay is None:
+                        replay = threading.Thread(target=self._replay, daemon=True)
+                        replay.start()
+                elif op == "unsubscribe":
+                    self.topics.difference_update(request.get("args", []))
+                elif op == "ping":
+                    self._send(json.dumps({"op": "pong", "success": True}))
+                    continue
+                self._send(json.dumps({"op": op, "success": True, "conn_id": "replay"}))
+        except (ConnectionError, OSError):
+            pass
+        finally:
+            self.closed.set()
+
+    def _handshake(self, sock):
+        request = b""
+        while b"\r\n\r\n" not in request:
+            chunk = sock.recv(4096)
+            if not chunk:
+                return False
+            request += chunk
+        headers = {}
+        for line in request.decode().split("\r\n")[1:]:
+            if ":" in line:
+                name, value = line.split(":", 1)
+                headers[name.strip().lower()] = value.strip()
+        key = headers.get("sec-websocket-key", "")
+        accept = base64.b64encode(hashlib.sha1((key + WS_GUID).encode()).digest()).decode()
+        sock.sendall((
+            "HTTP/1.1 101 Switching Protocols\r\n"
+            "Upgrade: websocket\r\n"
+            "Connection: Upgrade\r\n"
+            f"Sec-WebSocket-Accept: {accept}\r\n\r\n"
+        ).encode())
+        return True
+
+    def _send(self, payload, opcode=0x1):
+        with self.send_lock:
+            send_frame(self.request, payload, opcode)
+
+    def _replay(self):
+        speed = self.server.speed
+        previous_ts = None
+        try:
+            for message in self.server.messages:
+                if self.closed.is_set():
+                    return
+                if message.get("topic") not in self.topics:
+                    continue
+                ts = message.get("ts")
+                if speed and previous_ts is not None and ts is not None:
+                    time.sleep(max(0, ts - previous_ts) / 1000 / speed)
+                previous_ts = ts
+                self._send(json.dumps(message))
+        except OSError:
+            pass
+
+
+class ReplayServer(socketserver.ThreadingTCPServer):
+    """Threaded WebSocket server replaying `messages` to each client."""
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, messages, host="127.0.0.1", port=0, speed=1.0):
+        super().__init__((host, port), ReplayHandler)
+        self.messages = messages
+        self.speed = speed
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"ws://{host}:{port}"
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self.url
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("path", help="recorded messages, one JSON object per line")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--speed", type=float, default=1.0)
+    args = parser.parse_args()
+    server = ReplayServer(load_messages(args.path), args.host, args.port, args.speed)
+    print(f"Replaying {len(server.messages)} messages on {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()